@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1 import admin, auth, chat, library, posts, therapist, users
+from app.api.v1 import admin, auth, chat, chat_ws, library, posts, therapist, users
 
 v1_router = APIRouter(prefix="/v1")
 
@@ -9,5 +9,6 @@ v1_router.include_router(users.router)
 v1_router.include_router(posts.router)
 v1_router.include_router(library.router)
 v1_router.include_router(chat.router)
+v1_router.include_router(chat_ws.router)
 v1_router.include_router(admin.router)
 v1_router.include_router(therapist.router)
@@ -3,19 +3,28 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends
 
+from app.core.config import settings
 from app.core.dependencies import get_current_user_id
+from app.core.observability import chat_metrics
 from app.core.scraper import scrape_reflexoes
 from app.core.storage import append_etl_run, get_etl_runs
 from app.domain.admin.schemas import (
     AlertsResponse,
+    AnswerCacheMetrics,
+    ChatLatencyMetrics,
     ETLExecuteResponse,
     ETLRun,
     ETLRunsResponse,
     GrowthDay,
     GrowthMetric,
+    HistoryCompactionResponse,
     StorageMetric,
     SystemAlert,
 )
+from app.integrations.llm_client import get_llm_client
+from app.repositories.library_repo import history_store
+from app.services.answer_cache import answer_cache
+from app.services.quota_watcher import quota_watcher
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -62,14 +71,32 @@ MOCK_ALERTS = [
         level="info",
         triggered_at="2024-10-25T05:00:00Z",
     ),
-    SystemAlert(
-        id="alert-003",
-        title="Connection Spike",
+]
+
+# Instante em que o p95 do chat passou do limite (None enquanto estiver normal)
+_latency_alert_since: str | None = None
+
+
+def _latency_alert() -> SystemAlert | None:
+    """Alerta de latência do chat, pelo p95 da janela recente em memória."""
+    global _latency_alert_since
+    p95, samples = chat_metrics.recent_latency_p95()
+    breached = (
+        p95 is not None
+        and samples >= settings.chat_latency_alert_min_samples
+        and p95 > settings.chat_latency_alert_p95_seconds
+    )
+    if not breached:
+        _latency_alert_since = None
+        return None
+    _latency_alert_since = _latency_alert_since or _now_iso()
+    return SystemAlert(
+        id="alert-chat-latency",
+        title=f"Chat p95 {p95:.1f}s",
         subtitle="RAG service high latency",
         level="error",
-        triggered_at="2024-10-24T12:00:00Z",
-    ),
-]
+        triggered_at=_latency_alert_since,
+    )
 
 
 @router.get("/metrics/storage", response_model=StorageMetric)
@@ -84,6 +111,38 @@ def get_growth_metrics(user_id: str = Depends(get_current_user_id)) -> GrowthMet
     return MOCK_GROWTH
 
 
+@router.get("/metrics/answer-cache", response_model=AnswerCacheMetrics)
+def get_answer_cache_metrics(user_id: str = Depends(get_current_user_id)) -> AnswerCacheMetrics:
+    """Retorna ocupação e taxa de acerto do cache de respostas do chat."""
+    stats = answer_cache.stats
+    return AnswerCacheMetrics(
+        entries=len(answer_cache),
+        size_bytes=answer_cache.size_bytes,
+        max_bytes=answer_cache.max_bytes,
+        exact_hits=stats.exact_hits,
+        near_hits=stats.near_hits,
+        misses=stats.misses,
+        bypassed=stats.bypassed,
+        evictions=stats.evictions,
+        expirations=stats.expirations,
+        hit_rate=round(stats.hit_rate, 4),
+    )
+
+
+@router.get("/metrics/chat", response_model=ChatLatencyMetrics)
+def get_chat_metrics(user_id: str = Depends(get_current_user_id)) -> ChatLatencyMetrics:
+    """Histogramas de latência e tokens do chat, por modelo e tipo de usuário."""
+    p95, samples = chat_metrics.total_latency_p95()
+    client = get_llm_client()
+    return ChatLatencyMetrics(
+        series=chat_metrics.snapshot(),
+        total_p95_seconds=round(p95, 4) if p95 is not None else None,
+        samples=samples,
+        hedged_requests=client.hedges if client else 0,
+        deadlines_exceeded=client.deadlines_exceeded if client else 0,
+    )
+
+
 @router.get("/etl/runs", response_model=ETLRunsResponse)
 def list_etl_runs(user_id: str = Depends(get_current_user_id)) -> ETLRunsResponse:
     """Lista as últimas execuções reais de ETL (persistidas em etl_runs.json)."""
@@ -126,7 +185,17 @@ def execute_etl(user_id: str = Depends(get_current_user_id)) -> ETLExecuteRespon
     )
 
 
+@router.post("/library/history/compact", response_model=HistoryCompactionResponse)
+def compact_history(user_id: str = Depends(get_current_user_id)) -> HistoryCompactionResponse:
+    """Compacta os meses fechados do histórico de leitura de todos os usuários."""
+    stats = history_store.compact()
+    return HistoryCompactionResponse(
+        partitions=stats.partitions, lines_before=stats.lines_before, lines_after=stats.lines_after
+    )
+
+
 @router.get("/alerts", response_model=AlertsResponse)
 def get_alerts(user_id: str = Depends(get_current_user_id)) -> AlertsResponse:
-    """Retorna alertas operacionais recentes."""
-    return AlertsResponse(alerts=MOCK_ALERTS)
+    """Retorna alertas operacionais recentes (latência do chat e cotas dos pacientes em tempo real)."""
+    latency = _latency_alert()
+    return AlertsResponse(alerts=([latency] if latency else []) + quota_watcher.alerts() + MOCK_ALERTS)
@@ -1,10 +1,25 @@
-import os
+import hashlib
+import json
+import math
+import re
+import time
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
-from app.core.dependencies import get_current_user_id
+from app.core.config import settings
+from app.core.guardrail import GuardrailViolation, TopicGuard
+from app.core.dependencies import MOCK_USER_ID, get_current_user_id
+from app.core.observability import chat_metrics
+from app.core.rate_limit import Quota, get_rate_limiter
+from app.core.single_flight import SingleFlight, SingleFlightOverflowError, SingleFlightTimeoutError
+from app.core.tokens import count_tokens
 from app.domain.chat.schemas import (
     ChatMessage,
     Citation,
@@ -13,24 +28,29 @@ from app.domain.chat.schemas import (
     MessagesResponse,
     SendMessageRequest,
     SendMessageResponse,
+    StreamStats,
+    TokenUsage,
 )
+from app.integrations.ai_provider import DeadlineExceededError
+from app.integrations.llm_client import LLMBusyError, get_llm_client
+from app.repositories.chat_repo import chat_repo
+from app.repositories.library_repo import favorite_store
+from app.repositories.user_repo import load_settings
+from app.services.answer_cache import answer_cache, normalize_question
+from app.services.context_builder import ChatContext, build_context
+from app.services.patient_search import patient_search
+from app.services.prompt_compiler import CompiledPrompt, prompt_compiler
+from app.services.quota_watcher import quota_watcher
+from app.services.retrieval import Retrieval, archive_retriever
+from app.services.therapist_overview import therapist_overview
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
-# ── Prompt de sistema — especialista bíblico ──────────────────────────────────
-SYSTEM_PROMPT = """Você é um especialista em Bíblia Sagrada com profundo conhecimento das escrituras cristãs.
-Responda sempre em Português do Brasil de forma pastoral, respeitosa e edificante.
-Ao citar versículos, indique o livro, capítulo e versículo (ex.: "João 3:16").
-Baseie suas respostas exclusivamente nas escrituras bíblicas.
-Seja conciso, claro e espiritualmente enriquecedor."""
-
-# ── Dados mock (conversa inicial) ─────────────────────────────────────────────
+# ── Dados mock (conversa inicial do usuário mock) ─────────────────────────────
 MOCK_CONVERSATION = Conversation(
     id="conv-001",
-    user_id="user-mock-001",
+    user_id=MOCK_USER_ID,
     created_at="2024-10-24T10:00:00Z",
-    message_count=2,
-    last_message_preview="A Bíblia oferece um conforto profundo para a ansiedade...",
 )
 
 MOCK_MESSAGES = [
@@ -61,43 +81,262 @@ MOCK_MESSAGES = [
 ]
 
 
+# Perguntas idênticas em andamento compartilham uma única chamada ao LLM
+_flights = SingleFlight(
+    max_waiters=settings.single_flight_max_waiters,
+    timeout=settings.single_flight_timeout_seconds,
+)
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
 # ── Integração OpenAI ─────────────────────────────────────────────────────────
 
-def _call_openai(user_message: str) -> tuple[str, list[Citation]]:
+_FALLBACK_ANSWER = (
+    "Com base na sua pergunta, posso compartilhar que a Bíblia oferece "
+    "sabedoria profunda sobre este tema. "
+    "Provérbios 3:5-6 nos instrui a confiar no Senhor de todo o coração "
+    "e não nos apoiar no nosso próprio entendimento."
+)
+
+# Encerra respostas cortadas pelo guardrail de `avoid_topics`
+_GUARDRAIL_NOTICE = (
+    "Prefiro não me aprofundar nesse assunto por aqui — ele pode ser conversado "
+    "com o seu psicólogo. Que a paz de Cristo guarde o seu coração (Filipenses 4:7)."
+)
+
+# Ex.: "João 3:16", "1 Pedro 5:7", "Filipenses 4:6-7"
+_CITATION_RE = re.compile(
+    r"\b((?:[1-3]\s*)?[A-ZÀ-Ú][a-zà-ú]+)\s+(\d{1,3}):(\d{1,3}(?:\s*[-–]\s*\d{1,3})?)"
+)
+
+
+def _extract_citations(text: str) -> list[Citation]:
+    """Extrai as referências bíblicas citadas na resposta (sem repetição)."""
+    citations: list[Citation] = []
+    seen: set[str] = set()
+    for match in _CITATION_RE.finditer(text):
+        book = match.group(1).strip()
+        verse = re.sub(r"\s*[-–]\s*", "-", match.group(3))
+        reference = f"{book} {match.group(2)}:{verse}"
+        if reference in seen:
+            continue
+        seen.add(reference)
+        citations.append(
+            Citation(reference=reference, book=book, chapter=int(match.group(2)), verse=verse)
+        )
+    return citations
+
+
+def _flight_key(messages: list[dict]) -> str:
+    """Chave do single-flight: modelo + contexto enviado + pergunta normalizada."""
+    *context, question = messages
+    raw = json.dumps(
+        [settings.openai_model, context, normalize_question(question["content"])],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def _call_openai(messages: list[dict]) -> tuple[str, list[Citation]]:
     """
-    Chama o GPT-4o-mini com o prompt bíblico.
+    Chama o GPT-4o-mini com o contexto montado pelo cliente LLM compartilhado.
     Retorna (conteúdo da resposta, lista de citações extraídas).
-    Faz fallback para resposta mock se a chave não estiver configurada.
+    Faz fallback para resposta mock se a chave não estiver configurada ou
+    se o provedor estourar o prazo da chamada.
     """
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+    client = get_llm_client()
+    if client is None:
         # Fallback mock quando a chave não está configurada
-        return (
-            "Com base na sua pergunta, posso compartilhar que a Bíblia oferece "
-            "sabedoria profunda sobre este tema. "
-            "Provérbios 3:5-6 nos instrui a confiar no Senhor de todo o coração "
-            "e não nos apoiar no nosso próprio entendimento.",
-            [Citation(reference="Provérbios 3:5-6", book="Provérbios", chapter=3, verse="5-6")],
-        )
+        return _FALLBACK_ANSWER, _extract_citations(_FALLBACK_ANSWER)
 
-    from openai import OpenAI  # Import local para evitar erro se não instalado
+    try:
+        content = await _flights.do(_flight_key(messages), lambda: client.complete(messages))
+    except DeadlineExceededError:
+        return _FALLBACK_ANSWER, _extract_citations(_FALLBACK_ANSWER)
+    return content, _extract_citations(content)
 
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_message},
-        ],
-        max_tokens=600,
-        temperature=0.7,
+
+def _word_deltas(text: str) -> list[str]:
+    """Quebra um texto pronto em deltas palavra a palavra (mock e respostas em cache)."""
+    return [word if i == 0 else f" {word}" for i, word in enumerate(text.split(" "))]
+
+
+async def _stream_openai(messages: list[dict]) -> AsyncIterator[str]:
+    """Versão em streaming de `_call_openai`: gera os deltas de texto da resposta."""
+    client = get_llm_client()
+    if client is None:
+        for delta in _word_deltas(_FALLBACK_ANSWER):
+            yield delta
+        return
+
+    try:
+        # aclosing: se a resposta for interrompida (guardrail, cliente saiu), o
+        # single-flight sabe na hora que este consumidor desistiu
+        async with aclosing(_flights.stream(_flight_key(messages), lambda: client.stream(messages))) as deltas:
+            async for delta in deltas:
+                yield delta
+    except DeadlineExceededError:
+        # O prazo vale até o primeiro trecho, então nada foi enviado ainda
+        for delta in _word_deltas(_FALLBACK_ANSWER):
+            yield delta
+
+
+def _cut_at_topic(guard: TopicGuard, content: str) -> str | None:
+    """Resposta cortada antes do primeiro tema a evitar, ou None se estiver limpa."""
+    guarded = guard.stream()
+    try:
+        guarded.feed(content)
+        guarded.finish()
+    except GuardrailViolation as exc:
+        return f"{exc.safe_text.rstrip()}\n\n{_GUARDRAIL_NOTICE}".lstrip()
+    return None
+
+
+async def _guarded_answer(guard: TopicGuard, messages: list[dict], content: str) -> tuple[str, bool]:
+    """Aplica o guardrail a uma resposta completa: gera de novo uma vez e, se ainda
+    tocar num tema a evitar, corta. Retorna (conteúdo, se o guardrail atuou)."""
+    if _cut_at_topic(guard, content) is None:
+        return content, False
+    reminder = {
+        "role": "system",
+        "content": f"Não mencione nem aluda a: {', '.join(guard.topics)}.",
+    }
+    retry, _ = await _call_openai([*messages[:-1], reminder, messages[-1]])
+    cut = _cut_at_topic(guard, retry)
+    return (retry if cut is None else cut), True
+
+
+async def _cached_deltas(content: str) -> AsyncIterator[str]:
+    for delta in _word_deltas(content):
+        yield delta
+
+
+def _retrieve(user_id: str, question: str) -> Retrieval:
+    """Trechos do acervo para a pergunta; favoritos pesam mais com `rag_memory`."""
+    if not settings.rag_enabled:
+        return Retrieval()
+    favorites = None
+    if load_settings(user_id).rag_memory:
+        favorites = favorite_store.post_ids(user_id)
+    return archive_retriever.retrieve(question, favorites)
+
+
+def _merge_citations(citations: list[Citation], retrieval: Retrieval) -> list[Citation]:
+    """Citações do texto seguidas dos posts do acervo usados como fonte."""
+    seen = {c.post_id for c in citations if c.post_id}
+    return citations + [c for c in retrieval.citations if c.post_id not in seen]
+
+
+def _answer_cache_allowed(patient: dict | None, context: ChatContext, retrieval: Retrieval) -> bool:
+    """Pacientes seguem diretrizes do psicólogo e recebem respostas individuais.
+
+    O cache compartilhado só vale para eles quando o psicólogo libera
+    (`shared_answer_cache` na ficha do paciente). Perguntas com histórico
+    na conversa, ou cuja busca no acervo foi influenciada pelos favoritos
+    do usuário, dependem do contexto e nunca usam o cache.
+    """
+    if not settings.answer_cache_enabled or context.has_history or retrieval.personalized:
+        return False
+    if patient is not None and not patient.get("shared_answer_cache"):
+        answer_cache.record_bypass()
+        return False
+    return True
+
+
+# ── Conversas ─────────────────────────────────────────────────────────────────
+
+def _seed_mock_conversation(user_id: str) -> None:
+    """Fase 1: o usuário mock começa com a conversa de exemplo gravada no store."""
+    if user_id != MOCK_USER_ID or chat_repo.get_conversation(user_id, MOCK_CONVERSATION.id):
+        return
+    chat_repo.create_conversation(user_id, MOCK_CONVERSATION.id, MOCK_CONVERSATION.created_at)
+    for message in MOCK_MESSAGES:
+        chat_repo.append_message(user_id, MOCK_CONVERSATION.id, message.model_dump())
+
+
+def _get_conversation_or_404(user_id: str, conversation_id: str) -> dict:
+    _seed_mock_conversation(user_id)
+    conversation = chat_repo.get_conversation(user_id, conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversa não encontrada.")
+    return conversation
+
+
+def _usage(context: ChatContext, content: str, cached: bool) -> TokenUsage:
+    if cached:
+        return TokenUsage(prompt_tokens=0, completion_tokens=count_tokens(content), cached=True)
+    return TokenUsage(
+        prompt_tokens=context.prompt_tokens,
+        completion_tokens=count_tokens(content),
+        summarized_messages=context.summarized_messages,
     )
-    content = response.choices[0].message.content or ""
-    return content, []  # Citações extraídas do texto — simplificado para Fase 1
+
+
+def _quota(patient: dict | None) -> Quota | None:
+    if patient is None:
+        return None
+    # A ficha do prompt compilado pode ter um limite antigo; o vigia tem o atual
+    limit = quota_watcher.limit(patient["id"])
+    return Quota(
+        key=patient["id"],
+        used=patient["messages_used"],
+        limit=patient["messages_limit"] if limit is None else limit,
+    )
+
+
+def _messages_used_changed(patient: dict | None, used: int | None) -> None:
+    if patient is not None and used is not None:
+        therapist_overview.messages_used_changed(patient["id"], used)
+        patient_search.messages_used_changed(patient["id"], used)
+
+
+async def _enforce_rate_limit(user_id: str, patient: dict | None) -> None:
+    """Aplica o token bucket do usuário e consome uma mensagem da cota do paciente.
+
+    Negações respondem 429 com `Retry-After`, antes de qualquer trabalho.
+    """
+    if not settings.rate_limit_enabled:
+        return
+    quota = _quota(patient)
+    decision = await get_rate_limiter().acquire(user_id, quota)
+    if not decision.allowed:
+        detail = (
+            "Limite de mensagens definido pelo psicólogo atingido."
+            if decision.reason == "quota"
+            else "Muitas mensagens em pouco tempo — aguarde um instante."
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+        )
+    _messages_used_changed(patient, decision.messages_used)
+
+
+async def _refund_rate_limit(user_id: str, patient: dict | None) -> None:
+    """Devolve o que `_enforce_rate_limit` consumiu quando o provedor falha."""
+    if not settings.rate_limit_enabled:
+        return
+    used = await get_rate_limiter().release(user_id, _quota(patient))
+    _messages_used_changed(patient, used)
+
+
+def _metric_labels(patient: dict | None) -> tuple[str, str]:
+    """Rótulos das métricas de latência: modelo e tipo de usuário."""
+    model = settings.openai_model if get_llm_client() is not None else "mock"
+    return model, "patient" if patient is not None else "user"
+
+
+def _sse(event: str, data: BaseModel | dict | list) -> str:
+    if isinstance(data, BaseModel):
+        payload = data.model_dump_json()
+    else:
+        payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
@@ -105,31 +344,36 @@ def _call_openai(user_message: str) -> tuple[str, list[Citation]]:
 @router.post("/conversations", response_model=Conversation, status_code=201)
 def create_conversation(user_id: str = Depends(get_current_user_id)) -> Conversation:
     """Cria uma nova conversa."""
-    return Conversation(
-        id=f"conv-{uuid.uuid4().hex[:8]}",
-        user_id=user_id,
-        created_at=_now_iso(),
-        message_count=0,
-    )
+    header = chat_repo.create_conversation(user_id, f"conv-{uuid.uuid4().hex[:8]}", _now_iso())
+    return Conversation(**header)
 
 
 @router.get("/conversations", response_model=ConversationListResponse)
 def list_conversations(
     user_id: str = Depends(get_current_user_id),
 ) -> ConversationListResponse:
-    """Lista as conversas do usuário."""
-    return ConversationListResponse(conversations=[MOCK_CONVERSATION])
+    """Lista as conversas do usuário (somente os cabeçalhos, sem ler as mensagens)."""
+    _seed_mock_conversation(user_id)
+    return ConversationListResponse(
+        conversations=[Conversation(**h) for h in chat_repo.list_conversations(user_id)]
+    )
 
 
 @router.get("/conversations/{conversation_id}/messages", response_model=MessagesResponse)
 def get_messages(
     conversation_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: int | None = Query(None, ge=0),
     user_id: str = Depends(get_current_user_id),
 ) -> MessagesResponse:
-    """Retorna o histórico de mensagens de uma conversa."""
+    """Retorna uma janela do histórico: as últimas `limit` mensagens ou, com
+    `before`, as `limit` anteriores a essa posição (use o `next_cursor`)."""
+    _get_conversation_or_404(user_id, conversation_id)
+    messages, start = chat_repo.read_messages(user_id, conversation_id, limit, before)
     return MessagesResponse(
         conversation_id=conversation_id,
-        messages=MOCK_MESSAGES,
+        messages=[ChatMessage(**m) for m in messages],
+        next_cursor=start if start > 0 else None,
     )
 
 
@@ -138,12 +382,20 @@ def get_messages(
     response_model=SendMessageResponse,
     status_code=201,
 )
-def send_message(
+async def send_message(
     conversation_id: str,
     body: SendMessageRequest,
     user_id: str = Depends(get_current_user_id),
 ) -> SendMessageResponse:
     """Envia uma mensagem e recebe resposta real do GPT-4o-mini."""
+    _get_conversation_or_404(user_id, conversation_id)
+    compiled = prompt_compiler.for_user(user_id)
+    patient = compiled.patient
+    await _enforce_rate_limit(user_id, patient)
+    retrieval = _retrieve(user_id, body.content)
+    context = build_context(
+        user_id, conversation_id, body.content, compiled.system_prompt, knowledge=retrieval.context
+    )
     now = _now_iso()
 
     user_msg = ChatMessage(
@@ -154,7 +406,35 @@ def send_message(
         created_at=now,
     )
 
-    ai_content, citations = _call_openai(body.content)
+    labels = _metric_labels(patient)
+    t0 = time.perf_counter()
+    use_cache = _answer_cache_allowed(patient, context, retrieval)
+    cached = answer_cache.get(body.content, compiled.version) if use_cache else None
+    if cached is not None:
+        ai_content, citations = cached
+    else:
+        try:
+            ai_content, citations = await _call_openai(context.messages)
+            if compiled.guard is not None:
+                ai_content, guarded = await _guarded_answer(compiled.guard, context.messages, ai_content)
+                if guarded:
+                    use_cache = False
+                    citations = _extract_citations(ai_content)
+            citations = _merge_citations(citations, retrieval)
+        except (LLMBusyError, SingleFlightOverflowError) as exc:
+            chat_metrics.record_error(*labels)
+            await _refund_rate_limit(user_id, patient)
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+        except SingleFlightTimeoutError as exc:
+            chat_metrics.record_error(*labels)
+            await _refund_rate_limit(user_id, patient)
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc))
+        except Exception:
+            chat_metrics.record_error(*labels)
+            await _refund_rate_limit(user_id, patient)
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Falha ao gerar a resposta.")
+        if use_cache and ai_content != _FALLBACK_ANSWER:
+            answer_cache.put(body.content, compiled.version, ai_content, citations)
 
     assistant_msg = ChatMessage(
         id=f"msg-ai-{uuid.uuid4().hex[:8]}",
@@ -162,6 +442,174 @@ def send_message(
         content=ai_content,
         citations=citations,
         created_at=_now_iso(),
+        usage=_usage(context, ai_content, cached is not None),
+    )
+    # Sem streaming, o primeiro token chega junto com a resposta inteira
+    elapsed = time.perf_counter() - t0
+    chat_metrics.record(
+        *labels,
+        ttft=elapsed,
+        total=elapsed,
+        prompt_tokens=assistant_msg.usage.prompt_tokens,
+        completion_tokens=assistant_msg.usage.completion_tokens,
+        cache_hit=cached is not None,
     )
 
+    chat_repo.append_message(user_id, conversation_id, user_msg.model_dump())
+    chat_repo.append_message(user_id, conversation_id, assistant_msg.model_dump())
     return SendMessageResponse(user_message=user_msg, assistant_message=assistant_msg)
+
+
+# ── Streaming (SSE e WebSocket) ───────────────────────────────────────────────
+
+@dataclass
+class PreparedTurn:
+    """Pergunta validada e contexto montado, pronta para gerar a resposta."""
+    conversation_id: str
+    content: str
+    compiled: CompiledPrompt
+    retrieval: Retrieval
+    context: ChatContext
+    user_msg: ChatMessage
+    use_cache: bool
+    labels: tuple[str, str]
+
+
+async def prepare_turn(user_id: str, conversation_id: str, content: str) -> PreparedTurn:
+    """Validações e montagem do contexto; erros saem como HTTPException (404, 429)."""
+    _get_conversation_or_404(user_id, conversation_id)
+    compiled = prompt_compiler.for_user(user_id)
+    await _enforce_rate_limit(user_id, compiled.patient)
+    retrieval = _retrieve(user_id, content)
+    context = build_context(user_id, conversation_id, content, compiled.system_prompt, knowledge=retrieval.context)
+    return PreparedTurn(
+        conversation_id=conversation_id,
+        content=content,
+        compiled=compiled,
+        retrieval=retrieval,
+        context=context,
+        user_msg=ChatMessage(
+            id=f"msg-user-{uuid.uuid4().hex[:8]}",
+            role="user",
+            content=content,
+            citations=[],
+            created_at=_now_iso(),
+        ),
+        use_cache=_answer_cache_allowed(compiled.patient, context, retrieval),
+        labels=_metric_labels(compiled.patient),
+    )
+
+
+async def stream_turn(user_id: str, turn: PreparedTurn) -> AsyncIterator[tuple[str, BaseModel | dict | list]]:
+    """Gera a resposta em eventos `(nome, dados)` e grava as mensagens na conversa.
+
+    Ordem dos eventos: `user_message`, `delta` (um por trecho de texto),
+    `citations`, `assistant_message` (mensagem final completa) e `done`
+    (tempo até o primeiro token e tempo total, em ms); `error` encerra a
+    sequência se a geração falhar — nesse caso só a mensagem do usuário fica.
+    """
+    compiled, labels = turn.compiled, turn.labels
+    t0 = time.perf_counter()
+    ttft_ms: float | None = None
+    parts: list[str] = []
+
+    cached = answer_cache.get(turn.content, compiled.version) if turn.use_cache else None
+    deltas = _cached_deltas(cached[0]) if cached else _stream_openai(turn.context.messages)
+    # Respostas do cache já passaram pelo guardrail (a chave inclui o prompt do paciente)
+    guarded = compiled.guard.stream() if compiled.guard is not None and not cached else None
+    blocked = False
+
+    chat_repo.append_message(user_id, turn.conversation_id, turn.user_msg.model_dump())
+    yield "user_message", turn.user_msg
+    try:
+        async for delta in deltas:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - t0) * 1000
+            if guarded is not None:
+                try:
+                    delta = guarded.feed(delta)
+                except GuardrailViolation as exc:
+                    delta, blocked = exc.safe_text, True
+            if delta:
+                parts.append(delta)
+                yield "delta", {"content": delta}
+            if blocked:
+                await deltas.aclose()  # interrompe a geração no provedor
+                break
+        if guarded is not None and not blocked:
+            try:
+                delta = guarded.finish()
+            except GuardrailViolation as exc:
+                delta, blocked = exc.safe_text, True
+            if delta:
+                parts.append(delta)
+                yield "delta", {"content": delta}
+        if blocked:
+            delta = f"\n\n{_GUARDRAIL_NOTICE}" if parts else _GUARDRAIL_NOTICE
+            parts.append(delta)
+            yield "delta", {"content": delta}
+    except (LLMBusyError, SingleFlightOverflowError, SingleFlightTimeoutError) as exc:
+        chat_metrics.record_error(*labels)
+        await _refund_rate_limit(user_id, compiled.patient)
+        yield "error", {"detail": str(exc)}
+        return
+    except Exception:
+        chat_metrics.record_error(*labels)
+        await _refund_rate_limit(user_id, compiled.patient)
+        yield "error", {"detail": "Falha ao gerar a resposta."}
+        return
+
+    content = "".join(parts)
+    citations = cached[1] if cached else _merge_citations(_extract_citations(content), turn.retrieval)
+    if turn.use_cache and not cached and not blocked and content != _FALLBACK_ANSWER:
+        answer_cache.put(turn.content, compiled.version, content, citations)
+    yield "citations", [c.model_dump() for c in citations]
+
+    assistant_msg = ChatMessage(
+        id=f"msg-ai-{uuid.uuid4().hex[:8]}",
+        role="assistant",
+        content=content,
+        citations=citations,
+        created_at=_now_iso(),
+        usage=_usage(turn.context, content, cached is not None),
+    )
+    chat_repo.append_message(user_id, turn.conversation_id, assistant_msg.model_dump())
+    total_ms = (time.perf_counter() - t0) * 1000
+    chat_metrics.record(
+        *labels,
+        ttft=ttft_ms / 1000 if ttft_ms is not None else None,
+        total=total_ms / 1000,
+        prompt_tokens=assistant_msg.usage.prompt_tokens,
+        completion_tokens=assistant_msg.usage.completion_tokens,
+        cache_hit=cached is not None,
+    )
+    yield "assistant_message", assistant_msg
+    yield "done", StreamStats(
+        assistant_message_id=assistant_msg.id,
+        ttft_ms=round(ttft_ms, 1) if ttft_ms is not None else None,
+        total_ms=round(total_ms, 1),
+    )
+
+
+@router.post("/conversations/{conversation_id}/messages/stream")
+async def send_message_stream(
+    conversation_id: str,
+    body: SendMessageRequest,
+    user_id: str = Depends(get_current_user_id),
+) -> StreamingResponse:
+    """Envia uma mensagem e recebe a resposta em Server-Sent Events.
+
+    Eventos na ordem de `stream_turn`. As duas mensagens são gravadas na
+    conversa; se a geração falhar, só a do usuário fica.
+    """
+    turn = await prepare_turn(user_id, conversation_id, body.content)
+
+    async def events() -> AsyncIterator[str]:
+        async for event, data in stream_turn(user_id, turn):
+            yield _sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
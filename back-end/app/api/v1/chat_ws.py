@@ -0,0 +1,206 @@
+"""Chat por WebSocket — várias conversas multiplexadas numa única conexão.
+
+Conexão: `GET /v1/chat/ws?token=<JWT>` (ou cabeçalho `Authorization: Bearer`).
+O token de acesso é validado uma vez, na abertura; sem token de acesso
+válido (um refresh token não serve) a conexão é fechada com o código 4401.
+
+Quadros do cliente (JSON):
+    {"type": "send", "conversation_id": "...", "content": "...", "client_id": "opcional"}
+    {"type": "cancel", "conversation_id": "..."}
+    {"type": "ping"}
+
+Quadros do servidor (JSON), sempre com `conversation_id` quando se referem a
+uma conversa:
+    ack        pergunta aceita (`client_id`, `message_id`)
+    typing     `{"active": true|false}` enquanto o assistente gera a resposta
+    user_message, delta, citations, assistant_message, done, error
+               os mesmos eventos do streaming SSE, em `data`
+    pong
+
+Cada conversa tem no máximo uma resposta em andamento; conversas diferentes
+geram em paralelo (até `chat_ws_max_active`). Todos os quadros passam por uma
+fila esvaziada por um único escritor. Os quadros das respostas consomem um
+crédito (`chat_ws_queue_size` por conexão) devolvido quando o quadro é
+enviado: se o cliente lê devagar, os créditos acabam, os geradores param de
+consumir o modelo e a pressão chega até o provedor em vez de acumular
+memória no servidor. Quadros de controle (`typing` inativo, `pong` e erros
+dos quadros recebidos) não esperam crédito — não se perdem nem travam o
+leitor, que continua atendendo `cancel`. Se o cliente acumula mais de
+`chat_ws_queue_size` respostas a quadros seus sem ler, a conexão é fechada
+com o código 1008.
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+
+from app.api.v1.chat import prepare_turn, stream_turn
+from app.core.config import settings
+from app.core.security import decode_token
+
+router = APIRouter(prefix="/chat", tags=["Chat"])
+
+WS_UNAUTHORIZED = 4401
+WS_POLICY_VIOLATION = 1008
+
+
+def _authenticate(websocket: WebSocket) -> str | None:
+    token = websocket.query_params.get("token")
+    if not token:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    if not token:
+        return None
+    try:
+        payload = decode_token(token)
+    except Exception:
+        return None
+    return payload.get("sub") if payload.get("type") == "access" else None
+
+
+def _payload(data: BaseModel | dict | list) -> dict | list:
+    return data.model_dump() if isinstance(data, BaseModel) else data
+
+
+class ChatConnection:
+    def __init__(self, websocket: WebSocket, user_id: str) -> None:
+        self.websocket = websocket
+        self.user_id = user_id
+        self.outbox: asyncio.Queue[tuple[dict, bool]] = asyncio.Queue()  # (quadro, consumiu crédito)
+        self.active: dict[str, asyncio.Task] = {}
+        self._credits = asyncio.Semaphore(settings.chat_ws_queue_size)
+        self._pending_control = 0
+        # respostas do leitor + um `typing` inativo por conversa em andamento
+        self._control_limit = settings.chat_ws_queue_size + settings.chat_ws_max_active
+
+    async def send(self, frame: dict) -> None:
+        """Enfileira um quadro de resposta; bloqueia sem crédito (backpressure)."""
+        await self._credits.acquire()
+        self.outbox.put_nowait((frame, True))
+
+    def notify(self, frame: dict) -> None:
+        """Enfileira um quadro de controle, sem esperar crédito."""
+        self._pending_control += 1
+        self.outbox.put_nowait((frame, False))
+
+    async def _writer(self) -> None:
+        while True:
+            frame, credited = await self.outbox.get()
+            try:
+                await self.websocket.send_json(frame)
+            finally:
+                if credited:
+                    self._credits.release()
+                else:
+                    self._pending_control -= 1
+
+    async def _answer(self, conversation_id: str, content: str, client_id: str | None) -> None:
+        try:
+            turn = await prepare_turn(self.user_id, conversation_id, content)
+        except HTTPException as exc:
+            await self.send({
+                "type": "error",
+                "conversation_id": conversation_id,
+                "client_id": client_id,
+                "data": {"status": exc.status_code, "detail": exc.detail},
+            })
+            return
+        except Exception:
+            await self.send({
+                "type": "error",
+                "conversation_id": conversation_id,
+                "client_id": client_id,
+                "data": {"status": 500, "detail": "Falha ao preparar a resposta."},
+            })
+            return
+        await self.send({
+            "type": "ack",
+            "conversation_id": conversation_id,
+            "client_id": client_id,
+            "message_id": turn.user_msg.id,
+        })
+        await self.send({"type": "typing", "conversation_id": conversation_id, "data": {"active": True}})
+        try:
+            async for event, data in stream_turn(self.user_id, turn):
+                await self.send({"type": event, "conversation_id": conversation_id, "data": _payload(data)})
+        finally:
+            self.notify({"type": "typing", "conversation_id": conversation_id, "data": {"active": False}})
+
+    def _start(self, frame: dict) -> dict | None:
+        """Inicia a resposta; devolve um quadro de erro se a pergunta for recusada."""
+        conversation_id = frame.get("conversation_id")
+        content = frame.get("content")
+        client_id = frame.get("client_id")
+        if not isinstance(conversation_id, str) or not isinstance(content, str) or not content.strip():
+            return {"type": "error", "client_id": client_id, "data": {"status": 422, "detail": "Quadro inválido."}}
+        if conversation_id in self.active:
+            detail = "Já há uma resposta em andamento nesta conversa."
+            return {
+                "type": "error",
+                "conversation_id": conversation_id,
+                "client_id": client_id,
+                "data": {"status": 409, "detail": detail},
+            }
+        if len(self.active) >= settings.chat_ws_max_active:
+            detail = "Muitas conversas gerando ao mesmo tempo nesta conexão."
+            return {
+                "type": "error",
+                "conversation_id": conversation_id,
+                "client_id": client_id,
+                "data": {"status": 429, "detail": detail},
+            }
+        task = asyncio.create_task(self._answer(conversation_id, content, client_id))
+        self.active[conversation_id] = task
+        task.add_done_callback(lambda _: self.active.pop(conversation_id, None))
+        return None
+
+    def _handle(self, frame: dict) -> None:
+        kind = frame.get("type")
+        if kind == "send":
+            error = self._start(frame)
+            if error:
+                self.notify(error)
+        elif kind == "cancel":
+            task = self.active.get(frame.get("conversation_id"))
+            if task is not None:
+                task.cancel()
+        elif kind == "ping":
+            self.notify({"type": "pong"})
+        else:
+            self.notify({"type": "error", "data": {"status": 422, "detail": f"Tipo desconhecido: {kind!r}"}})
+
+    async def run(self) -> None:
+        writer = asyncio.create_task(self._writer())
+        try:
+            while self._pending_control <= self._control_limit:
+                try:
+                    frame = json.loads(await self.websocket.receive_text())
+                except ValueError:
+                    frame = None
+                if not isinstance(frame, dict):
+                    self.notify({"type": "error", "data": {"status": 422, "detail": "Quadro inválido."}})
+                    continue
+                self._handle(frame)
+            await self.websocket.close(code=WS_POLICY_VIOLATION, reason="Cliente não está lendo as respostas")
+        except WebSocketDisconnect:
+            pass
+        finally:
+            tasks = [*self.active.values(), writer]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket) -> None:
+    """Chat multiplexado por WebSocket (protocolo na docstring do módulo)."""
+    user_id = _authenticate(websocket)
+    # Aceita antes de recusar: fechar sem `accept()` vira um 403 no handshake
+    # e o cliente nunca recebe o código 4401
+    await websocket.accept()
+    if user_id is None:
+        await websocket.close(code=WS_UNAUTHORIZED, reason="Token inválido ou ausente")
+        return
+    await ChatConnection(websocket, user_id).run()
@@ -1,56 +1,39 @@
-import uuid
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 from typing import Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 
 from app.core.dependencies import get_current_user_id
-from app.core.storage import read_json, write_json
 from app.domain.library.schemas import (
+    FavoriteBulkRequest,
+    FavoriteBulkResponse,
     FavoriteToggleResponse,
     HistoryRecordRequest,
-    LibraryItem,
     LibraryResponse,
 )
 from app.domain.auth.schemas import MessageResponse
+from app.repositories.library_repo import favorite_store, history_store, load_favorites, load_history
 
 router = APIRouter(prefix="/library", tags=["Library"])
 
-MOCK_HISTORY: list[LibraryItem] = [
-    LibraryItem(
-        id="hist-001",
-        post_id="post-001",
-        title="Encontrando Paz no Meio do Caos",
-        subtitle="Acessado hoje • #Paz",
-        type="post",
-        saved_at="2024-10-25",
-        tags=["Paz"],
-    ),
-    LibraryItem(
-        id="hist-002",
-        post_id="post-002",
-        title="A Força na Fraqueza",
-        subtitle="Acessado ontem • #Força",
-        type="post",
-        saved_at="2024-10-24",
-        tags=["Força"],
-    ),
-]
-
-
-# ── Helpers de persistência ───────────────────────────────────────────────────
-
-def _load_favorites() -> list[LibraryItem]:
-    """Carrega favoritos do arquivo JSON."""
-    data = read_json("favorites.json")
-    if not isinstance(data, list):
-        return []
-    return [LibraryItem(**item) for item in data]
-
-
-def _save_favorites(items: list[LibraryItem]) -> None:
-    """Persiste lista de favoritos no arquivo JSON."""
-    write_json("favorites.json", [item.model_dump() for item in items])
+Period = Literal["today", "week", "month"]
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _period_range(
+    period: Period | None, start: date | None, end: date | None, today: date
+) -> tuple[date | None, date | None]:
+    """Intervalo de dias (inclusivo) do filtro: `start`/`end` explícitos têm precedência."""
+    if start or end:
+        return start, end
+    if period == "today":
+        return today, today
+    if period == "week":
+        return today - timedelta(days=6), today
+    if period == "month":
+        return today.replace(day=1), today
+    return None, None
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
@@ -60,11 +43,26 @@ def get_library(
     tab: Literal["favorites", "history"] = "favorites",
     query: str | None = None,
     tag: str | None = None,
-    period: str | None = None,
+    period: Period | None = None,
+    start: date | None = None,
+    end: date | None = None,
     user_id: str = Depends(get_current_user_id),
 ) -> LibraryResponse:
-    """Lista itens da biblioteca (favoritos ou histórico) com filtros."""
-    items = _load_favorites() if tab == "favorites" else list(MOCK_HISTORY)
+    """Lista itens da biblioteca (favoritos ou histórico) com filtros.
+
+    `period` (today, week, month) ou `start`/`end` restringem pela data em que o
+    post foi salvo (favoritos) ou lido pela última vez (histórico).
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=422, detail="`start` deve ser anterior a `end`.")
+    first, last = _period_range(period, start, end, datetime.now(timezone.utc).date())
+    if tab == "history":
+        items = load_history(user_id, first, last)
+    else:
+        items = [
+            i for i in load_favorites(user_id)
+            if (not first or i.saved_at >= first.isoformat()) and (not last or i.saved_at <= last.isoformat())
+        ]
 
     if query:
         items = [i for i in items if query.lower() in i.title.lower()]
@@ -79,23 +77,8 @@ def add_favorite(
     post_id: str,
     user_id: str = Depends(get_current_user_id),
 ) -> FavoriteToggleResponse:
-    """Adiciona um post aos favoritos e persiste no JSON."""
-    items = _load_favorites()
-
-    # Evita duplicata
-    if not any(i.post_id == post_id for i in items):
-        new_item = LibraryItem(
-            id=f"fav-{uuid.uuid4().hex[:8]}",
-            post_id=post_id,
-            title=f"Post {post_id}",
-            subtitle=f"Salvo em {date.today().strftime('%d/%m/%Y')}",
-            type="post",
-            saved_at=date.today().isoformat(),
-            tags=[],
-        )
-        items.append(new_item)
-        _save_favorites(items)
-
+    """Adiciona um post aos favoritos do usuário (idempotente)."""
+    favorite_store.add(user_id, [post_id])
     return FavoriteToggleResponse(
         post_id=post_id,
         is_favorited=True,
@@ -108,11 +91,8 @@ def remove_favorite(
     post_id: str,
     user_id: str = Depends(get_current_user_id),
 ) -> FavoriteToggleResponse:
-    """Remove um post dos favoritos e persiste no JSON."""
-    items = _load_favorites()
-    items = [i for i in items if i.post_id != post_id]
-    _save_favorites(items)
-
+    """Remove um post dos favoritos do usuário (idempotente)."""
+    favorite_store.remove(user_id, [post_id])
     return FavoriteToggleResponse(
         post_id=post_id,
         is_favorited=False,
@@ -120,10 +100,21 @@ def remove_favorite(
     )
 
 
+@router.post("/favorites", response_model=FavoriteBulkResponse)
+def update_favorites(
+    body: FavoriteBulkRequest,
+    user_id: str = Depends(get_current_user_id),
+) -> FavoriteBulkResponse:
+    """Adiciona e remove vários favoritos de uma vez."""
+    added, removed = favorite_store.apply(user_id, add=body.add, remove=body.remove)
+    return FavoriteBulkResponse(added=added, removed=removed, total=len(favorite_store.post_ids(user_id)))
+
+
 @router.post("/history", response_model=MessageResponse, status_code=201)
 def record_history(
     body: HistoryRecordRequest,
     user_id: str = Depends(get_current_user_id),
 ) -> MessageResponse:
     """Registra um acesso ao histórico de leitura."""
+    history_store.record(user_id, body.post_id)
     return MessageResponse(message=f"Acesso ao post {body.post_id} registrado.")
@@ -1,32 +1,55 @@
 """Endpoints do Dashboard do Psicólogo (Fase 1 — dados persistidos em JSON)."""
 
 import uuid
-from datetime import datetime, timezone
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.core.dependencies import get_current_user_id  # TODO Fase 2: adicionar require_therapist_role
-from app.core.storage import read_json, write_json
 from app.domain.therapist.schemas import (
     CreateSessionRequest,
     DashboardOverview,
+    MoodPoint,
+    MoodTrendResponse,
     NearLimitPatient,
+    NearLimitResponse,
+    OverviewCheckResponse,
     PatientConfig,
+    PatientImportReport,
     PatientIntakeForm,
     PatientListResponse,
     PatientSummary,
-    RecentActivity,
     SessionListResponse,
     TherapySession,
+    TopicCount,
+    TopicTrendResponse,
     UpdateMessageLimitRequest,
     UpdatePatientConfigRequest,
     UpdatePatientStatusRequest,
 )
+from app.repositories import patient_repo
+from app.repositories.patient_repo import (
+    PatientNotFound,
+    SessionNotFound,
+    VersionConflict,
+    add_patients,
+    load_patients,
+    record_version,
+)
+from app.services.patient_export import MEDIA_TYPES, export_patients
+from app.services.patient_import import import_patients, new_patient_record
+from app.services.patient_search import patient_search
+from app.services.prompt_compiler import prompt_compiler
+from app.services.quota_watcher import quota_watcher
+from app.services.session_analytics import session_analytics
+from app.services.therapist_overview import therapist_overview
 
 router = APIRouter(prefix="/therapist", tags=["Therapist"])
 
-PATIENTS_FILE = "patients.json"
-
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
@@ -36,159 +59,7 @@ def _gen_id(prefix: str = "pat") -> str:
     return f"{prefix}-{uuid.uuid4().hex[:8]}"
 
 
-# ── Dados mock iniciais ─────────────────────────────────────────────────────
-
-MOCK_PATIENTS: list[dict] = [
-    {
-        "id": "pat-001",
-        "name": "Ana Beatriz Souza",
-        "email": "ana.beatriz@email.com",
-        "status": "active",
-        "created_at": "2025-09-10T08:00:00Z",
-        "chief_complaint": "Ansiedade frequente e dificuldade para dormir",
-        "anxiety_level": "moderate",
-        "depression_level": "mild",
-        "sleep_quality": "poor",
-        "suicidal_ideation": False,
-        "current_medication": "Sertralina 50mg",
-        "therapy_goal": "Desenvolver estratégias de enfrentamento para ansiedade",
-        "therapeutic_approach": "Terapia Cognitivo-Comportamental",
-        "focus_topics": ["ansiedade", "sono", "autoestima"],
-        "avoid_topics": [],
-        "response_depth": "moderate",
-        "messages_used": 87,
-        "messages_limit": 100,
-        "sessions": [
-            {
-                "id": "sess-001",
-                "patient_id": "pat-001",
-                "date": "2025-11-01",
-                "summary": "Paciente relata melhora na qualidade do sono após exercícios de respiração.",
-                "mood": "good",
-                "topics_covered": ["sono", "respiração", "rotina"],
-                "homework": "Praticar respiração diafragmática antes de dormir",
-                "next_session_date": "2025-11-15",
-                "created_at": "2025-11-01T14:00:00Z",
-            },
-            {
-                "id": "sess-002",
-                "patient_id": "pat-001",
-                "date": "2025-11-15",
-                "summary": "Discutimos gatilhos de ansiedade no trabalho. Reestruturação cognitiva aplicada.",
-                "mood": "neutral",
-                "topics_covered": ["ansiedade", "trabalho", "pensamentos automáticos"],
-                "homework": "Diário de pensamentos automáticos",
-                "next_session_date": "2025-11-29",
-                "created_at": "2025-11-15T14:00:00Z",
-            },
-        ],
-    },
-    {
-        "id": "pat-002",
-        "name": "Pedro Henrique Lima",
-        "email": "pedro.lima@email.com",
-        "status": "paused",
-        "created_at": "2025-08-20T10:00:00Z",
-        "chief_complaint": "Luto pela perda de familiar",
-        "anxiety_level": "mild",
-        "depression_level": "moderate",
-        "sleep_quality": "fair",
-        "suicidal_ideation": False,
-        "current_medication": None,
-        "therapy_goal": "Elaboração do luto e fortalecimento emocional",
-        "therapeutic_approach": "Abordagem Humanista",
-        "focus_topics": ["luto", "família", "espiritualidade"],
-        "avoid_topics": ["detalhes do falecimento"],
-        "response_depth": "detailed",
-        "messages_used": 42,
-        "messages_limit": 200,
-        "sessions": [
-            {
-                "id": "sess-003",
-                "patient_id": "pat-002",
-                "date": "2025-10-05",
-                "summary": "Sessão focada em memórias positivas do familiar. Paciente chorou mas sentiu alívio.",
-                "mood": "low",
-                "topics_covered": ["luto", "memórias", "aceitação"],
-                "homework": "Escrever carta para o familiar",
-                "next_session_date": "2025-10-19",
-                "created_at": "2025-10-05T10:00:00Z",
-            },
-        ],
-    },
-    {
-        "id": "pat-003",
-        "name": "Maria Clara Santos",
-        "email": "maria.clara@email.com",
-        "status": "active",
-        "created_at": "2025-10-01T09:00:00Z",
-        "chief_complaint": "Baixa autoestima e dificuldade em relacionamentos",
-        "anxiety_level": "mild",
-        "depression_level": "none",
-        "sleep_quality": "good",
-        "suicidal_ideation": False,
-        "current_medication": None,
-        "therapy_goal": "Fortalecer autoestima e melhorar comunicação interpessoal",
-        "therapeutic_approach": "Terapia Cognitivo-Comportamental",
-        "focus_topics": ["autoestima", "relacionamentos", "comunicação"],
-        "avoid_topics": [],
-        "response_depth": "brief",
-        "messages_used": 15,
-        "messages_limit": 50,
-        "sessions": [
-            {
-                "id": "sess-004",
-                "patient_id": "pat-003",
-                "date": "2025-10-15",
-                "summary": "Primeira sessão. Anamnese inicial e estabelecimento de vínculo terapêutico.",
-                "mood": "neutral",
-                "topics_covered": ["anamnese", "expectativas", "vínculo"],
-                "homework": None,
-                "next_session_date": "2025-10-29",
-                "created_at": "2025-10-15T09:00:00Z",
-            },
-            {
-                "id": "sess-005",
-                "patient_id": "pat-003",
-                "date": "2025-10-29",
-                "summary": "Trabalhamos crenças centrais sobre autoestima. Paciente engajada.",
-                "mood": "good",
-                "topics_covered": ["autoestima", "crenças centrais", "autoconhecimento"],
-                "homework": "Listar 3 qualidades pessoais diariamente",
-                "next_session_date": "2025-11-12",
-                "created_at": "2025-10-29T09:00:00Z",
-            },
-            {
-                "id": "sess-006",
-                "patient_id": "pat-003",
-                "date": "2025-11-12",
-                "summary": "Revisão do exercício de qualidades. Paciente relatou melhora significativa.",
-                "mood": "great",
-                "topics_covered": ["autoestima", "progresso", "assertividade"],
-                "homework": "Praticar comunicação assertiva em uma situação social",
-                "next_session_date": "2025-11-26",
-                "created_at": "2025-11-12T09:00:00Z",
-            },
-        ],
-    },
-]
-
-
-# ── Helpers de persistência ──────────────────────────────────────────────────
-
-def _load_patients() -> list[dict]:
-    data = read_json(PATIENTS_FILE)
-    if not data:
-        write_json(PATIENTS_FILE, MOCK_PATIENTS)
-        return list(MOCK_PATIENTS)
-    if isinstance(data, list):
-        return data
-    return MOCK_PATIENTS
-
-
-def _save_patients(patients: list[dict]) -> None:
-    write_json(PATIENTS_FILE, patients)
-
+# ── Helpers ──────────────────────────────────────────────────────────────────
 
 def _find_patient(patients: list[dict], patient_id: str) -> dict:
     for p in patients:
@@ -197,61 +68,92 @@ def _find_patient(patients: list[dict], patient_id: str) -> dict:
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Paciente não encontrado")
 
 
+def _etag(record: dict) -> str:
+    return f'"{record_version(record)}"'
+
+
+def _if_match(header: str | None) -> set[int] | None:
+    """Versões aceitas pelo cabeçalho If-Match (None = sem condição ou `*`).
+
+    Uma ETag que não é versão conhecida vira um conjunto vazio: a gravação
+    falha com 412, como manda o RFC 9110.
+    """
+    if header is None:
+        return None
+    versions = set()
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag == "*":
+            return None
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+@contextmanager
+def _conditional_write() -> Iterator[None]:
+    """Converte os erros da escrita otimista do repositório em respostas HTTP."""
+    try:
+        yield
+    except PatientNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Paciente não encontrado")
+    except SessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sessão não encontrada")
+    except VersionConflict as exc:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="O registro foi alterado por outra pessoa; recarregue e tente novamente.",
+            headers={"ETag": f'"{exc.current}"'},
+        )
+
+
 # ── Endpoints ────────────────────────────────────────────────────────────────
 
 @router.get("/overview", response_model=DashboardOverview)
 def get_overview(user_id: str = Depends(get_current_user_id)) -> DashboardOverview:
-    """Retorna visão geral do dashboard do psicólogo."""
-    patients = _load_patients()
+    """Retorna visão geral do dashboard do psicólogo (agregados incrementais)."""
+    return therapist_overview.overview()
 
-    active = [p for p in patients if p["status"] == "active"]
-    paused = [p for p in patients if p["status"] == "paused"]
-    discharged = [p for p in patients if p["status"] == "discharged"]
 
-    threshold = 0.8
-    near_limit = [
-        NearLimitPatient(
-            id=p["id"],
-            name=p["name"],
-            messages_used=p["messages_used"],
-            messages_limit=p["messages_limit"],
-        )
-        for p in patients
-        if p["messages_limit"] > 0 and p["messages_used"] / p["messages_limit"] >= threshold
-    ]
+@router.get("/overview/check", response_model=OverviewCheckResponse)
+def check_overview(user_id: str = Depends(get_current_user_id)) -> OverviewCheckResponse:
+    """Recalcula a visão geral do zero, compara e corrige os agregados se divergirem."""
+    differences = therapist_overview.check()
+    return OverviewCheckResponse(consistent=not differences, differences=differences)
 
-    recent = [
-        RecentActivity(patient_name=p["name"], action="Sessão registrada", timestamp=p["created_at"])
-        for p in sorted(patients, key=lambda x: x["created_at"], reverse=True)[:5]
-    ]
 
-    return DashboardOverview(
-        total_patients=len(patients),
-        active_patients=len(active),
-        paused_patients=len(paused),
-        discharged_patients=len(discharged),
-        near_limit_patients=near_limit,
-        recent_activity=recent,
-    )
+@router.get("/patients", response_model=PatientListResponse)
+def list_patients(
+    q: str | None = Query(None, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id),
+) -> PatientListResponse:
+    """Lista pacientes (versão resumida, sem sessões).
 
+    Com `q`, busca aproximada por nome e e-mail (índice de trigramas, sem
+    acentos, tolerante a erros de digitação), do mais ao menos parecido.
+    `offset`/`limit` paginam; `total` conta todos os resultados.
+    """
+    summaries, total = patient_search.search(q, offset, limit)
+    return PatientListResponse(patients=[PatientSummary(**s) for s in summaries], total=total)
 
-@router.get("/patients", response_model=PatientListResponse)
-def list_patients(user_id: str = Depends(get_current_user_id)) -> PatientListResponse:
-    """Lista todos os pacientes (versão resumida, sem sessões)."""
-    patients = _load_patients()
-    summaries = [
-        PatientSummary(
-            id=p["id"],
-            name=p["name"],
-            email=p["email"],
-            status=p["status"],
-            messages_used=p["messages_used"],
-            messages_limit=p["messages_limit"],
-            created_at=p["created_at"],
+
+@router.get("/patients/near-limit", response_model=NearLimitResponse)
+def list_near_limit_patients(
+    k: int = Query(5, ge=1, le=100),
+    user_id: str = Depends(get_current_user_id),
+) -> NearLimitResponse:
+    """Os k pacientes com maior fração do limite de mensagens já usada (heap do vigia de cotas)."""
+    return NearLimitResponse(patients=[
+        NearLimitPatient(
+            id=entry.patient_id,
+            name=entry.name,
+            messages_used=entry.messages_used,
+            messages_limit=entry.messages_limit,
         )
-        for p in patients
-    ]
-    return PatientListResponse(patients=summaries, total=len(summaries))
+        for entry in quota_watcher.top(k)
+    ])
 
 
 @router.post("/patients", response_model=PatientConfig, status_code=201)
@@ -260,59 +162,85 @@ def create_patient(
     user_id: str = Depends(get_current_user_id),
 ) -> PatientConfig:
     """Cadastra novo paciente via formulário de intake."""
-    patients = _load_patients()
-    patient_id = _gen_id()
-    now = _now_iso()
-
-    new_patient: dict = {
-        "id": patient_id,
-        "name": body.name,
-        "email": body.email,
-        "status": "active",
-        "created_at": now,
-        "chief_complaint": body.chief_complaint,
-        "anxiety_level": body.anxiety_level,
-        "depression_level": body.depression_level,
-        "sleep_quality": body.sleep_quality,
-        "suicidal_ideation": body.suicidal_ideation,
-        "current_medication": body.current_medication,
-        "therapy_goal": body.therapy_goal,
-        "therapeutic_approach": body.therapeutic_approach,
-        "focus_topics": body.focus_topics,
-        "avoid_topics": body.avoid_topics,
-        "response_depth": body.response_depth,
-        "messages_used": 0,
-        "messages_limit": body.messages_limit,
-        "sessions": [],
-    }
-
-    if body.first_session_date:
-        session = {
-            "id": _gen_id("sess"),
-            "patient_id": patient_id,
-            "date": body.first_session_date,
-            "summary": body.first_session_summary or "",
-            "mood": body.first_session_mood or "neutral",
-            "topics_covered": [],
-            "homework": None,
-            "next_session_date": None,
-            "created_at": now,
-        }
-        new_patient["sessions"].append(session)
-
-    patients.append(new_patient)
-    _save_patients(patients)
+    new_patient = new_patient_record(body)
+    patient_id = new_patient["id"]
+
+    add_patients([new_patient])
+    prompt_compiler.invalidate(patient_id)
+    therapist_overview.patient_created(new_patient)
+    patient_search.patient_saved(new_patient)
+    session_analytics.patient_created(new_patient)
     return PatientConfig(**new_patient)
 
 
+@router.post("/patients/import", response_model=PatientImportReport)
+async def import_patients_file(
+    request: Request,
+    fmt: str | None = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    user_id: str = Depends(get_current_user_id),
+) -> PatientImportReport:
+    """Importa pacientes em lote de um CSV ou NDJSON enviado no corpo da requisição.
+
+    O formato vem de `?format=` ou do Content-Type (`text/csv`,
+    `application/x-ndjson`). O corpo é lido em fluxo e gravado em lotes (fora
+    do laço de eventos); linhas inválidas são relatadas sem interromper a
+    importação.
+    """
+    if fmt is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        fmt = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/ndjson": "ndjson"}.get(
+            content_type
+        )
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envie text/csv ou application/x-ndjson (ou informe ?format=).",
+        )
+    return await import_patients(request.stream(), fmt, on_batch=_patients_imported)
+
+
+def _patients_imported(batch: list[dict]) -> None:
+    """Ganchos de cadastro para um lote recém-gravado da importação."""
+    prompt_compiler.invalidate_users(p["user_id"] for p in batch if p["user_id"])
+    for patient in batch:
+        therapist_overview.patient_created(patient)
+        patient_search.patient_saved(patient)
+        session_analytics.patient_created(patient)
+
+
+@router.get("/patients/export")
+def export_patients_file(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    status_filter: list[Literal["active", "paused", "discharged"]] | None = Query(None, alias="status"),
+    created_from: date | None = Query(None),
+    created_to: date | None = Query(None),
+    gzip: bool = Query(False),
+    user_id: str = Depends(get_current_user_id),
+) -> StreamingResponse:
+    """Exporta fichas completas com sessões em NDJSON ou CSV, em fluxo.
+
+    Filtros: `status` (repetível) e intervalo de cadastro
+    (`created_from`/`created_to`, inclusivos). Com `gzip=true` o arquivo sai
+    comprimido (`.gz`) enquanto é gerado.
+    """
+    filename = f"patients.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_patients(fmt, set(status_filter or ()), created_from, created_to, gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/patients/{patient_id}", response_model=PatientConfig)
 def get_patient(
     patient_id: str,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
 ) -> PatientConfig:
-    """Retorna ficha completa de um paciente."""
-    patients = _load_patients()
+    """Retorna ficha completa de um paciente (com `ETag` da versão, para o `If-Match` das edições)."""
+    patients = load_patients()
     patient = _find_patient(patients, patient_id)
+    response.headers["ETag"] = _etag(patient)
     return PatientConfig(**patient)
 
 
@@ -320,14 +248,17 @@ def get_patient(
 def update_patient(
     patient_id: str,
     body: UpdatePatientConfigRequest,
+    response: Response,
+    if_match: str | None = Header(None),
     user_id: str = Depends(get_current_user_id),
 ) -> PatientConfig:
-    """Atualiza dados clínicos e diretrizes de um paciente."""
-    patients = _load_patients()
-    patient = _find_patient(patients, patient_id)
-    updates = body.model_dump(exclude_unset=True)
-    patient.update(updates)
-    _save_patients(patients)
+    """Atualiza dados clínicos e diretrizes de um paciente (412 se o `If-Match` estiver desatualizado)."""
+    with _conditional_write():
+        patient = patient_repo.update_patient(patient_id, body.model_dump(exclude_unset=True), _if_match(if_match))
+    response.headers["ETag"] = _etag(patient)
+    prompt_compiler.invalidate(patient_id)
+    therapist_overview.patient_updated(patient)
+    patient_search.patient_saved(patient)
     return PatientConfig(**patient)
 
 
@@ -335,13 +266,17 @@ def update_patient(
 def update_patient_status(
     patient_id: str,
     body: UpdatePatientStatusRequest,
+    response: Response,
+    if_match: str | None = Header(None),
     user_id: str = Depends(get_current_user_id),
 ) -> PatientConfig:
     """Altera o status do paciente (active, paused, discharged)."""
-    patients = _load_patients()
-    patient = _find_patient(patients, patient_id)
-    patient["status"] = body.status
-    _save_patients(patients)
+    with _conditional_write():
+        patient = patient_repo.update_patient(patient_id, {"status": body.status}, _if_match(if_match))
+    response.headers["ETag"] = _etag(patient)
+    prompt_compiler.invalidate(patient_id)
+    therapist_overview.patient_updated(patient)
+    patient_search.patient_saved(patient)
     return PatientConfig(**patient)
 
 
@@ -349,13 +284,19 @@ def update_patient_status(
 def update_patient_limit(
     patient_id: str,
     body: UpdateMessageLimitRequest,
+    response: Response,
+    if_match: str | None = Header(None),
     user_id: str = Depends(get_current_user_id),
 ) -> PatientConfig:
     """Ajusta o limite de mensagens do paciente."""
-    patients = _load_patients()
-    patient = _find_patient(patients, patient_id)
-    patient["messages_limit"] = body.messages_limit
-    _save_patients(patients)
+    with _conditional_write():
+        patient = patient_repo.update_patient(
+            patient_id, {"messages_limit": body.messages_limit}, _if_match(if_match)
+        )
+    response.headers["ETag"] = _etag(patient)
+    # O limite não entra no prompt compilado; o chat o lê do vigia de cotas
+    therapist_overview.patient_updated(patient)
+    patient_search.patient_saved(patient)
     return PatientConfig(**patient)
 
 
@@ -365,7 +306,7 @@ def list_sessions(
     user_id: str = Depends(get_current_user_id),
 ) -> SessionListResponse:
     """Lista sessões terapêuticas de um paciente."""
-    patients = _load_patients()
+    patients = load_patients()
     patient = _find_patient(patients, patient_id)
     sessions = patient.get("sessions", [])
     return SessionListResponse(
@@ -381,17 +322,16 @@ def create_session(
     user_id: str = Depends(get_current_user_id),
 ) -> TherapySession:
     """Registra nova sessão terapêutica."""
-    patients = _load_patients()
-    patient = _find_patient(patients, patient_id)
-
     session_data = {
         "id": _gen_id("sess"),
         "patient_id": patient_id,
         "created_at": _now_iso(),
         **body.model_dump(),
     }
-    patient.setdefault("sessions", []).append(session_data)
-    _save_patients(patients)
+    with _conditional_write():
+        patient = patient_repo.add_session(patient_id, session_data)
+    therapist_overview.session_created(patient, session_data)
+    session_analytics.session_saved(patient_id, session_data)
     return TherapySession(**session_data)
 
 
@@ -400,16 +340,51 @@ def update_session(
     patient_id: str,
     session_id: str,
     body: CreateSessionRequest,
+    response: Response,
+    if_match: str | None = Header(None),
     user_id: str = Depends(get_current_user_id),
 ) -> TherapySession:
-    """Atualiza uma sessão terapêutica existente."""
-    patients = _load_patients()
-    patient = _find_patient(patients, patient_id)
+    """Atualiza uma sessão terapêutica existente (`If-Match` com a versão da sessão)."""
+    with _conditional_write():
+        _, session = patient_repo.update_session(patient_id, session_id, body.model_dump(), _if_match(if_match))
+    session_analytics.session_saved(patient_id, session)
+    response.headers["ETag"] = _etag(session)
+    return TherapySession(**session)
 
-    for session in patient.get("sessions", []):
-        if session["id"] == session_id:
-            session.update(body.model_dump())
-            _save_patients(patients)
-            return TherapySession(**session)
 
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sessão não encontrada")
+@router.get("/patients/{patient_id}/analytics/mood", response_model=MoodTrendResponse)
+def get_mood_trend(
+    patient_id: str,
+    window: int = Query(3, ge=1, le=50),
+    user_id: str = Depends(get_current_user_id),
+) -> MoodTrendResponse:
+    """Humor por sessão com média móvel de `window` sessões (séries mantidas em memória)."""
+    series = session_analytics.mood(patient_id, window)
+    if series is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Paciente não encontrado")
+    points = [
+        MoodPoint(session_id=session_id, date=day, mood=mood, score=score, rolling_average=round(rolling, 2))
+        for session_id, day, mood, score, rolling in zip(
+            series.session_ids, series.dates, series.moods, series.scores.tolist(), series.rolling.tolist()
+        )
+    ]
+    average = round(series.average, 2) if series.average is not None else None
+    return MoodTrendResponse(patient_id=patient_id, window=window, average=average, points=points)
+
+
+@router.get("/patients/{patient_id}/analytics/topics", response_model=TopicTrendResponse)
+def get_topic_trend(
+    patient_id: str,
+    k: int = Query(5, ge=1, le=50),
+    user_id: str = Depends(get_current_user_id),
+) -> TopicTrendResponse:
+    """Os k temas mais abordados nas sessões do paciente."""
+    result = session_analytics.top_topics(patient_id, k)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Paciente não encontrado")
+    topics, total_sessions = result
+    return TopicTrendResponse(
+        patient_id=patient_id,
+        total_sessions=total_sessions,
+        topics=[TopicCount(topic=topic, count=count) for topic, count in topics],
+    )
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 
 from app.core.dependencies import get_current_user_id
 from app.core.storage import read_json, write_json
+from app.repositories.user_repo import load_settings, save_settings
 from app.domain.users.schemas import (
     UpdateProfileRequest,
     UpdateSettingsRequest,
@@ -11,18 +12,6 @@ from app.domain.users.schemas import (
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-# Configurações padrão (não persistidas ainda — aguarda banco de dados)
-_DEFAULT_SETTINGS = UserSettings(
-    theme="system",
-    ai_insights=True,
-    biblical_reminders=True,
-    rag_memory=False,
-)
-
-# Estado em memória para settings (perdido ao reiniciar — Fase 1)
-_settings_state = _DEFAULT_SETTINGS.model_copy()
-
-
 # ── Helpers de persistência ───────────────────────────────────────────────────
 
 def _load_profile() -> UserProfile:
@@ -67,7 +56,7 @@ def update_me(
 @router.get("/me/settings", response_model=UserSettings)
 def get_settings(user_id: str = Depends(get_current_user_id)) -> UserSettings:
     """Retorna as configurações do usuário."""
-    return _settings_state
+    return load_settings(user_id)
 
 
 @router.patch("/me/settings", response_model=UserSettings)
@@ -76,8 +65,6 @@ def update_settings(
     user_id: str = Depends(get_current_user_id),
 ) -> UserSettings:
     """Atualiza as configurações do usuário (estado em memória)."""
-    global _settings_state
-    _settings_state = _settings_state.model_copy(
-        update=body.model_dump(exclude_none=True)
-    )
-    return _settings_state
+    updated = load_settings(user_id).model_copy(update=body.model_dump(exclude_none=True))
+    save_settings(user_id, updated)
+    return updated
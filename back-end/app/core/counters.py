@@ -0,0 +1,192 @@
+"""Contadores de uso de mensagens dos pacientes, fora da ficha clínica.
+
+Cada mensagem do chat incrementava `messages_used` regravando o
+patients.json inteiro — um contador quente dentro de um documento frio. Aqui
+o contador vive num armazenamento próprio, com incremento atômico, e as
+leituras da ficha (`load_patients`, `iter_patients`) sobrepõem o valor
+corrente ao `messages_used` gravado no documento, que passa a ser só o valor
+inicial.
+
+Implementações:
+- `InMemoryCounterStore` — um processo só (padrão). Grava os contadores
+  alterados em data/message_usage.json a cada `usage_counter_flush_seconds` e
+  no desligamento: uma queda perde no máximo o intervalo.
+- `RedisCounterStore` — compartilhado entre workers em `settings.redis_url`
+  (requer o extra `redis`); a durabilidade é a do próprio Redis. Usa o mesmo
+  espaço de chaves do `RedisRateLimiter`, cujo script Lua incrementa a cota
+  diretamente no contador. O cliente é síncrono (as leituras da ficha são
+  síncronas); no caminho async do chat o `InMemoryRateLimiter` chama o
+  contador fora do event loop (`blocking = True`).
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+from app.core.config import settings
+from app.core.storage import read_json, write_json
+
+USAGE_FILE = "message_usage.json"
+
+
+class CounterStore(ABC):
+    # Operações com I/O de rede: chamadores async as rodam em `asyncio.to_thread`
+    blocking = False
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> dict[str, int]:
+        """Valores dos contadores existentes (chaves sem contador ficam de fora)."""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, initial: int = 0) -> int:
+        """Incrementa atomicamente; um contador novo parte de `initial`."""
+
+    @abstractmethod
+    def incr_below(self, key: str, limit: int, initial: int = 0) -> tuple[bool, int]:
+        """Incrementa só se o valor atual for menor que `limit` — (incrementou, valor)."""
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryCounterStore(CounterStore):
+    def __init__(self, filename: str | None = None) -> None:
+        self._filename = filename
+        data = read_json(filename) if filename else {}
+        self._counts: dict[str, int] = dict(data) if isinstance(data, dict) else {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, int]:
+        with self._lock:
+            return {k: self._counts[k] for k in keys if k in self._counts}
+
+    def incr(self, key: str, amount: int = 1, initial: int = 0) -> int:
+        with self._lock:
+            value = self._counts.get(key, initial) + amount
+            self._counts[key] = value
+            self._dirty = True
+            return value
+
+    def incr_below(self, key: str, limit: int, initial: int = 0) -> tuple[bool, int]:
+        with self._lock:
+            value = self._counts.setdefault(key, initial)
+            if value >= limit:
+                return False, value
+            self._counts[key] = value + 1
+            self._dirty = True
+            return True, value + 1
+
+    # ── Durabilidade ─────────────────────────────────────────────────────────
+
+    def flush(self) -> None:
+        """Grava os contadores se algo mudou desde a última gravação."""
+        if not self._filename:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = dict(self._counts)
+                self._dirty = False
+            try:
+                write_json(self._filename, snapshot)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def start_flusher(self, interval: float) -> None:
+        def run() -> None:
+            while not self._stop.wait(interval):
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name="usage-counter-flush", daemon=True)
+        self._flusher.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+
+# KEYS[1] = contador; ARGV = valor inicial, limite (-1 = sem limite), incremento
+# Retorno: {incrementou (0/1), valor}
+_INCR_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+local value = tonumber(redis.call('GET', KEYS[1]))
+local limit = tonumber(ARGV[2])
+if limit >= 0 and value >= limit then
+  return {0, value}
+end
+return {1, redis.call('INCRBY', KEYS[1], ARGV[3])}
+"""
+
+
+class RedisCounterStore(CounterStore):
+    PREFIX = "vcd:usage"
+    blocking = True
+
+    def __init__(self, client, prefix: str = PREFIX) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._script = client.register_script(_INCR_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCounterStore":
+        import redis  # dependência opcional (extra "redis")
+
+        return cls(redis.Redis.from_url(url))
+
+    def key(self, name: str) -> str:
+        return f"{self._prefix}:{name}"
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, int]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.mget([self.key(k) for k in keys])
+        return {k: int(v) for k, v in zip(keys, values) if v is not None}
+
+    def incr(self, key: str, amount: int = 1, initial: int = 0) -> int:
+        return int(self._script(keys=[self.key(key)], args=[initial, -1, amount])[1])
+
+    def incr_below(self, key: str, limit: int, initial: int = 0) -> tuple[bool, int]:
+        done, value = self._script(keys=[self.key(key)], args=[initial, limit, 1])
+        return bool(int(done)), int(value)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_store: CounterStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_counter_store() -> CounterStore:
+    """Contadores compartilhados: Redis se o limitador do chat usa Redis, senão em memória."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if settings.rate_limit_backend == "redis" or settings.usage_counter_backend == "redis":
+                _store = RedisCounterStore.from_url(settings.redis_url)
+            else:
+                store = InMemoryCounterStore(USAGE_FILE)
+                store.start_flusher(settings.usage_counter_flush_seconds)
+                _store = store
+        return _store
+
+
+def close_counter_store() -> None:
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
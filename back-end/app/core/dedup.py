@@ -0,0 +1,227 @@
+"""Detecção de reflexões quase duplicadas via SimHash + índice LSH em bandas.
+
+A fonte republica reflexões com pequenas edições ou sob novas URLs, e como o id
+do post é derivado do href (uuid5), o mesmo texto acabaria duplicado no feed.
+
+Cada post recebe um fingerprint SimHash de 64 bits calculado sobre as palavras
+do `body_text` (campo `simhash`, gravado em hexadecimal em data/posts.json).
+Dois textos são considerados quase duplicados quando a distância de Hamming
+entre os fingerprints é <= MAX_DISTANCE.
+
+O índice divide o fingerprint em BANDS bandas de 16 bits: pelo princípio da
+casa dos pombos, dois fingerprints a distância <= BANDS - 1 coincidem em pelo
+menos uma banda, então a busca só compara os candidatos que caem no mesmo
+bucket — sublinear no tamanho do arquivo.
+
+Uso em lote (deduplica todo o data/posts.json):
+    python -m app.core.dedup [--dry-run]
+"""
+
+import argparse
+import hashlib
+import re
+from collections import Counter, defaultdict
+
+from app.core.storage import read_json, write_json
+
+POSTS_FILE = "posts.json"
+
+FINGERPRINT_BITS = 64
+BANDS = 4
+MAX_DISTANCE = 3
+
+_BAND_BITS = FINGERPRINT_BITS // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Cada bit do hash vira um campo de _FIELD_BITS bits num inteiro grande, de modo
+# que somar os hashes de todas as features acumula os 64 contadores de uma vez.
+_FIELD_BITS = 32
+_BYTE_SPREAD = [
+    sum(((byte >> bit) & 1) << (bit * _FIELD_BITS) for bit in range(8)) for byte in range(256)
+]
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+
+
+# ── Fingerprint ───────────────────────────────────────────────────────────────
+
+def _features(text: str) -> Counter:
+    """Palavras em minúsculas com sua frequência.
+
+    Palavras soltas (em vez de shingles) mantêm o fingerprint estável frente a
+    pequenas edições, que é justamente o caso das republicações.
+    """
+    return Counter(_WORD_RE.findall(text.lower()))
+
+
+def _hash64(feature: str) -> bytes:
+    return hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+
+
+def _spread(digest: bytes) -> int:
+    spread = 0
+    for i, byte in enumerate(reversed(digest)):
+        spread |= _BYTE_SPREAD[byte] << (i * 8 * _FIELD_BITS)
+    return spread
+
+
+def simhash(text: str) -> int:
+    """Calcula o SimHash de 64 bits de um texto. Texto vazio retorna 0."""
+    ones = 0
+    total = 0
+    for feature, count in _features(text).items():
+        ones += count * _spread(_hash64(feature))
+        total += count
+
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        # peso do bit = (vezes em 1) - (vezes em 0)
+        if 2 * ((ones >> (bit * _FIELD_BITS)) & _FIELD_MASK) > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def format_fingerprint(fingerprint: int) -> str:
+    return f"{fingerprint:016x}"
+
+
+def parse_fingerprint(value: str) -> int:
+    return int(value, 16)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def post_fingerprint(post: dict) -> int:
+    """Retorna o fingerprint gravado no post, calculando (e gravando) se ausente."""
+    stored = post.get("simhash")
+    if isinstance(stored, str) and stored:
+        return parse_fingerprint(stored)
+    fingerprint = simhash(post.get("body_text") or "")
+    post["simhash"] = format_fingerprint(fingerprint)
+    return fingerprint
+
+
+# ── Índice LSH ────────────────────────────────────────────────────────────────
+
+class SimHashIndex:
+    """Índice em bandas para busca de fingerprints próximos.
+
+    `max_distance` precisa ser menor que o número de bandas para que a busca
+    não perca duplicatas (garantia da casa dos pombos).
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE) -> None:
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance deve ser menor que {BANDS}")
+        self.max_distance = max_distance
+        self._buckets: list[dict[int, list[str]]] = [defaultdict(list) for _ in range(BANDS)]
+        self._fingerprints: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    @staticmethod
+    def _bands(fingerprint: int) -> list[int]:
+        return [(fingerprint >> (i * _BAND_BITS)) & _BAND_MASK for i in range(BANDS)]
+
+    def add(self, key: str, fingerprint: int) -> None:
+        if key in self._fingerprints:
+            return
+        self._fingerprints[key] = fingerprint
+        for band, value in enumerate(self._bands(fingerprint)):
+            self._buckets[band][value].append(key)
+
+    def query(self, fingerprint: int) -> list[tuple[str, int]]:
+        """Retorna (chave, distância) dos fingerprints próximos, do mais próximo ao mais distante."""
+        seen: set[str] = set()
+        matches: list[tuple[str, int]] = []
+        for band, value in enumerate(self._bands(fingerprint)):
+            for key in self._buckets[band].get(value, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                distance = hamming_distance(fingerprint, self._fingerprints[key])
+                if distance <= self.max_distance:
+                    matches.append((key, distance))
+        matches.sort(key=lambda m: m[1])
+        return matches
+
+    def find_duplicate(self, fingerprint: int, exclude: str | None = None) -> str | None:
+        """Chave do post mais próximo dentro do limite (ignorando `exclude`), ou None."""
+        for key, _ in self.query(fingerprint):
+            if key != exclude:
+                return key
+        return None
+
+
+def build_index(posts: list[dict]) -> SimHashIndex:
+    """Monta o índice a partir de posts já armazenados (calcula fingerprints ausentes)."""
+    index = SimHashIndex()
+    for post in posts:
+        if isinstance(post, dict) and post.get("body_text"):
+            index.add(post["id"], post_fingerprint(post))
+    return index
+
+
+# ── Deduplicação em lote ──────────────────────────────────────────────────────
+
+def find_duplicates(posts: list[dict]) -> list[tuple[str, str, int]]:
+    """Agrupa os posts quase duplicados.
+
+    Percorre do mais antigo para o mais recente (a listagem é gravada do mais
+    novo para o mais antigo), de modo que a versão original é a mantida.
+    Retorna tuplas (id_duplicado, id_original, distância).
+    """
+    index = SimHashIndex()
+    duplicates: list[tuple[str, str, int]] = []
+    for post in reversed(posts):
+        if not isinstance(post, dict) or not post.get("body_text"):
+            continue
+        fingerprint = post_fingerprint(post)
+        matches = index.query(fingerprint)
+        if matches:
+            original_id, distance = matches[0]
+            duplicates.append((post["id"], original_id, distance))
+            continue
+        index.add(post["id"], fingerprint)
+    return duplicates
+
+
+def dedup_archive(dry_run: bool = False) -> dict:
+    """Remove do data/posts.json os posts quase duplicados e grava os fingerprints."""
+    data = read_json(POSTS_FILE)
+    posts = data if isinstance(data, list) else []
+
+    duplicates = find_duplicates(posts)
+    duplicate_ids = {dup_id for dup_id, _, _ in duplicates}
+
+    if not dry_run and posts:
+        write_json(POSTS_FILE, [p for p in posts if p.get("id") not in duplicate_ids])
+
+    return {
+        "posts_scanned": len(posts),
+        "duplicates_found": len(duplicates),
+        "duplicates": [
+            {"id": dup_id, "duplicate_of": original_id, "distance": distance}
+            for dup_id, original_id, distance in duplicates
+        ],
+        "dry_run": dry_run,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Remove reflexões quase duplicadas de data/posts.json")
+    parser.add_argument("--dry-run", action="store_true", help="apenas lista as duplicatas, sem gravar")
+    args = parser.parse_args()
+
+    result = dedup_archive(dry_run=args.dry_run)
+    for dup in result["duplicates"]:
+        print(f"{dup['id']} ≈ {dup['duplicate_of']} (distância {dup['distance']})")
+    action = "encontradas" if args.dry_run else "removidas"
+    print(f"{result['posts_scanned']} posts analisados, {result['duplicates_found']} duplicatas {action}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Guardrail de temas a evitar (`avoid_topics`) sobre a saída do LLM em streaming.
+
+Os temas do paciente (e sinônimos conhecidos) são compilados num autômato
+Aho-Corasick. A resposta é varrida caractere a caractere conforme os trechos
+chegam, mantendo o estado do autômato entre eles — nenhum trecho é relido.
+
+- O texto é comparado normalizado: minúsculas, sem acentos e com qualquer
+  sequência de pontuação/espaços reduzida a um espaço. Os termos ganham um
+  espaço nas pontas, então só casam palavras inteiras ("luto" não casa
+  "absoluto").
+- `GuardedStream.feed` devolve só o texto que já não pode fazer parte de um
+  termo; o final que ainda pode completar um termo fica retido até o próximo
+  trecho. Assim um tema proibido nunca chega ao cliente, nem pela metade.
+"""
+
+import unicodedata
+from collections import deque
+
+# Sinônimos dos temas mais comuns nas fichas (chaves e valores já normalizados)
+TOPIC_SYNONYMS: dict[str, tuple[str, ...]] = {
+    "morte": ("falecimento", "obito", "morrer", "morreu"),
+    "falecimento": ("morte", "obito", "morreu"),
+    "detalhes do falecimento": (
+        "como ele morreu", "como ela morreu", "causa da morte", "causa do obito",
+        "circunstancias da morte", "ultimos momentos",
+    ),
+    "suicidio": ("tirar a propria vida", "se matar", "acabar com a propria vida"),
+    "divorcio": ("separacao", "separar se"),
+    "aborto": ("interrupcao da gravidez",),
+    "doenca": ("enfermidade",),
+}
+
+
+class GuardrailViolation(Exception):
+    def __init__(self, topic: str) -> None:
+        super().__init__(f"Tema a evitar na resposta: {topic}")
+        self.topic = topic
+        self.safe_text = ""  # texto retido anterior ao termo, ainda seguro para enviar
+
+
+def _fold_char(c: str) -> str:
+    """Normaliza um caractere: "" (acento combinante), " " (separador) ou letra/dígito."""
+    if c.isalnum():
+        decomposed = unicodedata.normalize("NFKD", c.lower())
+        return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    if unicodedata.combining(c):
+        return ""
+    return " "
+
+
+def normalize_topic(text: str) -> str:
+    return " ".join("".join(_fold_char(c) for c in text).split())
+
+
+class AhoCorasick:
+    """Autômato sobre caracteres (transições goto + links de falha calculados em BFS)."""
+
+    def __init__(self, patterns: dict[str, str]) -> None:
+        # patterns: texto normalizado -> tema original
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self.depth: list[int] = [0]
+        self._output: list[str | None] = [None]
+        for pattern, topic in patterns.items():
+            node = 0
+            for c in pattern:
+                nxt = self._goto[node].get(c)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][c] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self.depth.append(self.depth[node] + 1)
+                    self._output.append(None)
+                node = nxt
+            self._output[node] = topic
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(c, 0)
+                self._fail[child] = target if target != child else 0
+                if self._output[child] is None:
+                    self._output[child] = self._output[self._fail[child]]
+
+    def step(self, node: int, c: str) -> int:
+        while node and c not in self._goto[node]:
+            node = self._fail[node]
+        return self._goto[node].get(c, 0)
+
+    def output(self, node: int) -> str | None:
+        return self._output[node]
+
+
+class TopicGuard:
+    """Temas a evitar de um paciente, compilados uma vez e reusados por resposta."""
+
+    def __init__(self, topics: list[str]) -> None:
+        patterns: dict[str, str] = {}
+        for topic in topics:
+            normalized = normalize_topic(topic)
+            if not normalized:
+                continue
+            for term in (normalized, *TOPIC_SYNONYMS.get(normalized, ())):
+                patterns.setdefault(f" {term} ", topic)
+        self.topics = list(topics)
+        self.automaton = AhoCorasick(patterns)
+
+    def __bool__(self) -> bool:
+        return len(self.automaton.depth) > 1
+
+    def stream(self) -> "GuardedStream":
+        return GuardedStream(self.automaton)
+
+    def check(self, text: str) -> str | None:
+        """Tema encontrado no texto completo, ou None."""
+        guarded = self.stream()
+        try:
+            guarded.feed(text)
+            guarded.finish()
+        except GuardrailViolation as exc:
+            return exc.topic
+        return None
+
+
+class GuardedStream:
+    def __init__(self, automaton: AhoCorasick) -> None:
+        self._automaton = automaton
+        self._state = automaton.step(0, " ")  # início do texto conta como separador
+        self._last_space = True
+        self._buffer = ""  # texto bruto ainda retido
+        self._marks: deque[int] = deque()  # posição no buffer de cada caractere do casamento parcial
+        self.released = 0  # caracteres já liberados ao cliente
+
+    def _advance(self, folded: str, offset: int) -> None:
+        automaton = self._automaton
+        for c in folded:
+            if c == " ":
+                if self._last_space:
+                    continue
+                self._last_space = True
+            else:
+                self._last_space = False
+            self._state = automaton.step(self._state, c)
+            topic = automaton.output(self._state)
+            if topic is not None:
+                raise GuardrailViolation(topic)
+            self._marks.append(offset)
+            depth = automaton.depth[self._state]
+            while len(self._marks) > depth:
+                self._marks.popleft()
+
+    def feed(self, chunk: str) -> str:
+        """Processa o trecho e devolve o texto seguro para enviar.
+
+        Levanta `GuardrailViolation` se um tema casar; só o `safe_text` da
+        exceção pode ser enviado — o restante contém o termo.
+        """
+        start = len(self._buffer)
+        self._buffer += chunk
+        try:
+            for i, c in enumerate(chunk, start):
+                self._advance(_fold_char(c), i)
+        except GuardrailViolation as exc:
+            exc.safe_text = self._buffer[:self._marks[0]] if self._marks else ""
+            self.released += len(exc.safe_text)
+            raise
+        cut = self._marks[0] if self._marks else len(self._buffer)
+        safe, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        if cut:
+            self._marks = deque(m - cut for m in self._marks)
+        self.released += len(safe)
+        return safe
+
+    def finish(self) -> str:
+        """Fim da resposta: confirma termos no final do texto e libera o resto."""
+        try:
+            self._advance(" ", len(self._buffer))
+        except GuardrailViolation as exc:
+            exc.safe_text = self._buffer[:self._marks[0]] if self._marks else ""
+            self.released += len(exc.safe_text)
+            raise
+        rest, self._buffer = self._buffer, ""
+        self._marks.clear()
+        self.released += len(rest)
+        return rest
@@ -0,0 +1,220 @@
+"""Métricas de latência do chat em memória (histogramas por série).
+
+Cada mensagem do chat registra, numa série rotulada por modelo e tipo de
+usuário (`patient` ou `user`):
+
+- tempo até o primeiro token e tempo total (segundos);
+- tokens de prompt e de resposta, e tokens por segundo da geração;
+- contadores de requisições, acertos do cache e erros.
+
+Os histogramas têm buckets fixos (como no Prometheus) e estimam quantis por
+interpolação linear dentro do bucket — memória constante, sem guardar
+amostras. Esses histogramas acumulam desde o início do processo e servem a
+/v1/admin/metrics/chat. O alerta "RAG service high latency" de
+/v1/admin/alerts usa outro histograma do tempo total, em janela deslizante
+(`WindowedHistogram`): fatias de tempo rotativas cobrindo os últimos
+`chat_latency_alert_window_seconds`, para refletir a latência de agora e
+não a média de dias de tráfego.
+"""
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+RATE_BUCKETS = (1, 5, 10, 20, 40, 80, 160, 320)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.bounds = buckets
+        self.counts = [0] * (len(buckets) + 1)  # último = acima do maior limite
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                fraction = (rank - cumulative) / bucket_count
+                return min(lower + (upper - lower) * fraction, self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "p50": _round(self.quantile(0.5)),
+            "p95": _round(self.quantile(0.95)),
+            "p99": _round(self.quantile(0.99)),
+            "max": round(self.max, 4),
+            "buckets": [
+                {"le": bound, "count": count}
+                for bound, count in zip([*self.bounds, None], self.counts)
+            ],
+        }
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+
+class WindowedHistogram:
+    """Histograma dos últimos `window` segundos, em `slots` fatias rotativas.
+
+    Cada fatia cobre `window / slots` segundos; ao avançar o relógio, as
+    fatias vencidas são zeradas e reaproveitadas — memória constante, com a
+    janela avançando em degraus de uma fatia.
+    """
+
+    def __init__(self, buckets: tuple[float, ...], window: float, slots: int = 10, clock=time.monotonic) -> None:
+        self.buckets = buckets
+        self.width = window / slots
+        self._clock = clock
+        self._slots = [Histogram(buckets) for _ in range(slots)]
+        self._epochs = [-1] * slots  # fatia de tempo que cada posição guarda
+
+    def _slot(self, epoch: int) -> Histogram:
+        i = epoch % len(self._slots)
+        if self._epochs[i] != epoch:
+            self._slots[i], self._epochs[i] = Histogram(self.buckets), epoch
+        return self._slots[i]
+
+    def observe(self, value: float) -> None:
+        self._slot(int(self._clock() // self.width)).observe(value)
+
+    def merged(self) -> Histogram:
+        current = int(self._clock() // self.width)
+        merged = Histogram(self.buckets)
+        for h, epoch in zip(self._slots, self._epochs):
+            if current - len(self._slots) < epoch <= current:
+                merged.merge(h)
+        return merged
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 4)
+
+
+@dataclass
+class ChatSeries:
+    model: str
+    user_kind: str
+    requests: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    ttft_seconds: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    total_seconds: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    prompt_tokens: Histogram = field(default_factory=lambda: Histogram(TOKEN_BUCKETS))
+    completion_tokens: Histogram = field(default_factory=lambda: Histogram(TOKEN_BUCKETS))
+    tokens_per_second: Histogram = field(default_factory=lambda: Histogram(RATE_BUCKETS))
+
+
+class ChatMetrics:
+    def __init__(self, clock=time.monotonic) -> None:
+        self._series: dict[tuple[str, str], ChatSeries] = {}
+        self._clock = clock
+        self._recent_total = self._new_window()
+        self._lock = threading.Lock()
+
+    def _new_window(self) -> WindowedHistogram:
+        return WindowedHistogram(LATENCY_BUCKETS, settings.chat_latency_alert_window_seconds, clock=self._clock)
+
+    def _get(self, model: str, user_kind: str) -> ChatSeries:
+        key = (model, user_kind)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ChatSeries(model, user_kind)
+        return series
+
+    def record(
+        self,
+        model: str,
+        user_kind: str,
+        ttft: float | None,
+        total: float,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cache_hit: bool = False,
+    ) -> None:
+        """Registra uma resposta concluída."""
+        with self._lock:
+            series = self._get(model, user_kind)
+            series.requests += 1
+            series.total_seconds.observe(total)
+            self._recent_total.observe(total)
+            if ttft is not None:
+                series.ttft_seconds.observe(ttft)
+            if cache_hit:
+                series.cache_hits += 1
+                return  # sem geração: tokens e vazão só contam chamadas ao modelo
+            series.prompt_tokens.observe(prompt_tokens)
+            series.completion_tokens.observe(completion_tokens)
+            generation = total - ttft if ttft is not None and total > ttft else total
+            if generation > 0 and completion_tokens:
+                series.tokens_per_second.observe(completion_tokens / generation)
+
+    def record_error(self, model: str, user_kind: str) -> None:
+        with self._lock:
+            series = self._get(model, user_kind)
+            series.requests += 1
+            series.errors += 1
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "model": s.model,
+                    "user_kind": s.user_kind,
+                    "requests": s.requests,
+                    "cache_hits": s.cache_hits,
+                    "errors": s.errors,
+                    "ttft_seconds": s.ttft_seconds.summary(),
+                    "total_seconds": s.total_seconds.summary(),
+                    "prompt_tokens": s.prompt_tokens.summary(),
+                    "completion_tokens": s.completion_tokens.summary(),
+                    "tokens_per_second": s.tokens_per_second.summary(),
+                }
+                for s in self._series.values()
+            ]
+
+    def total_latency_p95(self) -> tuple[float | None, int]:
+        """p95 do tempo total somando todas as séries, e o número de amostras."""
+        with self._lock:
+            merged = Histogram(LATENCY_BUCKETS)
+            for s in self._series.values():
+                merged.merge(s.total_seconds)
+            return merged.quantile(0.95), merged.count
+
+    def recent_latency_p95(self) -> tuple[float | None, int]:
+        """Como `total_latency_p95`, mas só na janela do alerta de latência."""
+        with self._lock:
+            merged = self._recent_total.merged()
+            return merged.quantile(0.95), merged.count
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._recent_total = self._new_window()
+
+
+chat_metrics = ChatMetrics()
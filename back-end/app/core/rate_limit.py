@@ -0,0 +1,251 @@
+"""Limite de envio de mensagens do chat por usuário.
+
+Duas regras são verificadas e consumidas juntas, numa única operação atômica:
+
+- Token bucket por usuário: até `rate_limit_burst` mensagens em rajada,
+  reabastecido a `rate_limit_per_minute` mensagens por minuto (taxa
+  sustentada). Protege o LLM de um cliente inundando o chat.
+- Cota do paciente: `messages_used` < `messages_limit` definido pelo
+  psicólogo. O contador é incrementado na mesma operação, então dois envios
+  simultâneos nunca ultrapassam o limite. O contador é o do
+  `app.core.counters` (fonte do `messages_used` exibido nas fichas).
+
+Implementações:
+- `InMemoryRateLimiter` — um processo só (padrão na Fase 1);
+- `RedisRateLimiter` — compartilhado entre workers via script Lua em
+  `settings.redis_url` (requer o extra `redis`).
+
+Negações retornam `retry_after` em segundos para o cabeçalho `Retry-After`.
+Se o provedor falhar depois da aquisição, `release()` devolve a ficha do
+bucket e a mensagem da cota — o usuário não paga por resposta que não veio.
+"""
+
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Literal
+
+from app.core.config import settings
+from app.core.counters import CounterStore, InMemoryCounterStore, RedisCounterStore, get_counter_store
+
+
+@dataclass(frozen=True)
+class RateDecision:
+    allowed: bool
+    retry_after: float = 0.0
+    reason: Literal["burst", "quota"] | None = None
+    messages_used: int | None = None  # contador da cota após o envio (pacientes)
+
+
+@dataclass(frozen=True)
+class Quota:
+    key: str  # id do paciente
+    used: int  # valor inicial do contador se ainda não estiver no limitador
+    limit: int
+
+
+class RateLimiter(ABC):
+    def __init__(self, burst: int, per_minute: float, quota_retry_after: float) -> None:
+        self.burst = burst
+        self.rate = per_minute / 60.0  # mensagens por segundo
+        self.quota_retry_after = quota_retry_after
+
+    @abstractmethod
+    async def acquire(self, user_id: str, quota: Quota | None = None) -> RateDecision:
+        ...
+
+    @abstractmethod
+    async def release(self, user_id: str, quota: Quota | None = None) -> int | None:
+        """Desfaz um `acquire()` permitido; retorna o contador da cota após a devolução."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class InMemoryRateLimiter(RateLimiter):
+    def __init__(
+        self,
+        burst: int,
+        per_minute: float,
+        quota_retry_after: float,
+        clock=time.monotonic,
+        counters: CounterStore | None = None,
+    ) -> None:
+        super().__init__(burst, per_minute, quota_retry_after)
+        self._clock = clock
+        self._buckets: dict[str, tuple[float, float]] = {}  # user_id → (tokens, instante)
+        self._counters = counters if counters is not None else InMemoryCounterStore()
+        self._lock = threading.Lock()
+
+    async def acquire(self, user_id: str, quota: Quota | None = None) -> RateDecision:
+        with self._lock:
+            now = self._clock()
+            tokens, last = self._buckets.get(user_id, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            if tokens < 1.0:
+                self._buckets[user_id] = (tokens, now)
+                return RateDecision(False, (1.0 - tokens) / self.rate, "burst")
+            self._buckets[user_id] = (tokens - 1.0, now)
+
+        # A ficha já foi consumida: a cota é verificada fora do lock (o
+        # contador pode estar no Redis) e, se negar, a ficha volta ao bucket
+        used = None
+        if quota is not None:
+            counted, used = await self._count(self._counters.incr_below, quota.key, quota.limit, quota.used)
+            if not counted:
+                self._return_token(user_id)
+                return RateDecision(False, self.quota_retry_after, "quota", used)
+        return RateDecision(True, messages_used=used)
+
+    async def release(self, user_id: str, quota: Quota | None = None) -> int | None:
+        self._return_token(user_id)
+        if quota is None:
+            return None
+        return await self._count(self._counters.incr, quota.key, -1, quota.used + 1)
+
+    def _return_token(self, user_id: str) -> None:
+        with self._lock:
+            if user_id in self._buckets:
+                tokens, last = self._buckets[user_id]
+                self._buckets[user_id] = (min(float(self.burst), tokens + 1.0), last)
+
+    async def _count(self, op, *args):
+        """Executa uma operação do contador sem bloquear o event loop se ela fizer I/O."""
+        if self._counters.blocking:
+            return await asyncio.to_thread(op, *args)
+        return op(*args)
+
+
+# KEYS[1] = bucket do usuário, KEYS[2] = cota do paciente (ignorada sem limite)
+# ARGV = capacidade, taxa por segundo, uso inicial da cota, limite (-1 = sem cota)
+# Retorno: {permitido, retry_after em ms, motivo (0 ok, 1 rajada, 2 cota), uso}
+_ACQUIRE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local limit = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local ttl = math.ceil(capacity / rate) + 1
+
+if tokens < 1 then
+  redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+  redis.call('EXPIRE', KEYS[1], ttl)
+  return {0, math.ceil((1 - tokens) / rate * 1000), 1, -1}
+end
+
+local used = -1
+if limit >= 0 then
+  redis.call('SET', KEYS[2], ARGV[3], 'NX')
+  used = tonumber(redis.call('GET', KEYS[2]))
+  if used >= limit then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], ttl)
+    return {0, 0, 2, used}
+  end
+  used = redis.call('INCR', KEYS[2])
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {1, 0, 0, used}
+"""
+
+
+# KEYS como no _ACQUIRE_SCRIPT; ARGV = capacidade, com cota (0/1)
+# Retorno: uso da cota após a devolução (-1 = sem cota)
+_RELEASE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+  redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(capacity, tokens + 1)))
+end
+if ARGV[2] == '0' then
+  return -1
+end
+local used = tonumber(redis.call('GET', KEYS[2])) or 0
+if used > 0 then
+  used = redis.call('DECR', KEYS[2])
+end
+return used
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    def __init__(
+        self,
+        client,
+        burst: int,
+        per_minute: float,
+        quota_retry_after: float,
+        prefix: str = "vcd:rl",
+        quota_prefix: str = RedisCounterStore.PREFIX,
+    ) -> None:
+        super().__init__(burst, per_minute, quota_retry_after)
+        self._client = client
+        self._prefix = prefix
+        self._quota_prefix = quota_prefix  # mesmo espaço de chaves do RedisCounterStore
+        self._script = client.register_script(_ACQUIRE_SCRIPT)
+        self._release_script = client.register_script(_RELEASE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisRateLimiter":
+        import redis.asyncio as redis  # dependência opcional (extra "redis")
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _keys(self, user_id: str, quota: Quota | None) -> list[str]:
+        return [
+            f"{self._prefix}:bucket:{user_id}",
+            f"{self._quota_prefix}:{quota.key}" if quota else f"{self._prefix}:quota:-",
+        ]
+
+    async def acquire(self, user_id: str, quota: Quota | None = None) -> RateDecision:
+        keys = self._keys(user_id, quota)
+        args = [self.burst, self.rate, quota.used if quota else 0, quota.limit if quota else -1]
+        allowed, retry_ms, reason, used = await self._script(keys=keys, args=args)
+        used = None if int(used) < 0 else int(used)
+        if allowed:
+            return RateDecision(True, messages_used=used)
+        if int(reason) == 2:
+            return RateDecision(False, self.quota_retry_after, "quota", used)
+        return RateDecision(False, int(retry_ms) / 1000, "burst")
+
+    async def release(self, user_id: str, quota: Quota | None = None) -> int | None:
+        used = await self._release_script(keys=self._keys(user_id, quota), args=[self.burst, 1 if quota else 0])
+        return None if int(used) < 0 else int(used)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Limitador compartilhado, conforme `settings.rate_limit_backend`."""
+    global _limiter
+    if _limiter is None:
+        params = {
+            "burst": settings.rate_limit_burst,
+            "per_minute": settings.rate_limit_per_minute,
+            "quota_retry_after": settings.rate_limit_quota_retry_after_seconds,
+        }
+        if settings.rate_limit_backend == "redis":
+            _limiter = RedisRateLimiter.from_url(settings.redis_url, **params)
+        else:
+            _limiter = InMemoryRateLimiter(counters=get_counter_store(), **params)
+    return _limiter
+
+
+async def close_rate_limiter() -> None:
+    global _limiter
+    if _limiter is not None:
+        await _limiter.aclose()
+        _limiter = None
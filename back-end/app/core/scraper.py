@@ -18,7 +18,9 @@ from datetime import datetime, timezone
 import httpx
 from bs4 import BeautifulSoup, Tag
 
+from app.core.dedup import build_index, format_fingerprint, parse_fingerprint, simhash
 from app.core.storage import read_json, write_json
+from app.core.summarizer import apply_summaries
 
 SOURCE_URL = "https://www.wgospel.com/tempoderefletir/"
 
@@ -234,15 +236,8 @@ def scrape_reflexoes() -> dict:
             body_text = detail["body_text"] or ""
             prayer = detail["devotional_prayer"] or ""
 
-            first_paragraph = body_text.split("\n\n")[0] if body_text else ""
-            ai_summary = first_paragraph
             meditation = body_text or "Reflita sobre esta passagem ao longo do dia."
 
-            key_points: list[str] = []
-            if body_text:
-                sentences = re.split(r"(?<=[.!?])\s+", body_text)
-                key_points = [s for s in sentences[:5] if 20 < len(s) < 200][:3]
-
             posts.append({
                 "id": post_id,
                 "title": title,
@@ -256,12 +251,13 @@ def scrape_reflexoes() -> dict:
                 "tags": ["Reflexão", "Devocional"],
                 "verse_content": verse_content,
                 "body_text": body_text,
-                "ai_summary": ai_summary,
-                "key_points": key_points,
+                "ai_summary": "",  # preenchidos por apply_summaries após o lote
+                "key_points": [],
                 "devotional_meditation": meditation,
                 "devotional_prayer": prayer or "Senhor, obrigado pela Tua palavra. Amém.",
                 "audio_url": detail.get("audio_url"),
                 "audio_duration": detail.get("audio_duration"),
+                "simhash": format_fingerprint(simhash(body_text)),
                 "collected_at": _now_iso(),
             })
 
@@ -269,6 +265,21 @@ def scrape_reflexoes() -> dict:
         existing_list = existing if isinstance(existing, list) else []
         existing_ids = {p["id"] for p in existing_list if isinstance(p, dict)}
 
+        # Descarta republicações (mesmo texto com pequenas edições sob nova URL)
+        index = build_index(existing_list)
+        unique_posts: list[dict] = []
+        duplicates = 0
+        for post in posts:
+            if post["id"] not in existing_ids and post["body_text"]:
+                fingerprint = parse_fingerprint(post["simhash"])
+                if index.find_duplicate(fingerprint, exclude=post["id"]):
+                    duplicates += 1
+                    continue
+                index.add(post["id"], fingerprint)
+            unique_posts.append(post)
+        posts = unique_posts
+        apply_summaries(posts)
+
         new_posts = [p for p in posts if p["id"] not in existing_ids]
         merged = posts + [p for p in existing_list if p["id"] not in {pp["id"] for pp in posts}]
 
@@ -281,8 +292,10 @@ def scrape_reflexoes() -> dict:
         "finished_at": _now_iso(),
         "posts_collected": len(posts),
         "new_posts": len(new_posts),
+        "duplicates_skipped": duplicates,
         "message": (
-            f"{len(posts)} reflexões coletadas ({len(new_posts)} novas) de {SOURCE_URL}"
+            f"{len(posts)} reflexões coletadas ({len(new_posts)} novas, "
+            f"{duplicates} duplicatas ignoradas) de {SOURCE_URL}"
             if posts
             else "Nenhuma reflexão encontrada — verifique a estrutura da página."
         ),
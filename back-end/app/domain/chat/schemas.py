@@ -8,6 +8,16 @@ class Citation(BaseModel):
     book: str | None = None
     chapter: int | None = None
     verse: str | None = None
+    post_id: str | None = None  # post do acervo usado como fonte (RAG)
+    title: str | None = None
+
+
+class TokenUsage(BaseModel):
+    """Tokens da geração (contagem local). Respostas do cache não enviam prompt."""
+    prompt_tokens: int
+    completion_tokens: int
+    summarized_messages: int = 0  # mensagens antigas enviadas apenas como resumo
+    cached: bool = False
 
 
 class ChatMessage(BaseModel):
@@ -16,12 +26,14 @@ class ChatMessage(BaseModel):
     content: str
     citations: list[Citation] = []
     created_at: str
+    usage: TokenUsage | None = None  # apenas em mensagens do assistente
 
 
 class Conversation(BaseModel):
     id: str
     user_id: str
     created_at: str
+    updated_at: str | None = None
     message_count: int = 0
     last_message_preview: str | None = None
 
@@ -33,6 +45,8 @@ class ConversationListResponse(BaseModel):
 class MessagesResponse(BaseModel):
     conversation_id: str
     messages: list[ChatMessage]
+    # Posição da primeira mensagem da janela — passar como `before` para a página anterior
+    next_cursor: int | None = None
 
 
 class SendMessageRequest(BaseModel):
@@ -42,3 +56,10 @@ class SendMessageRequest(BaseModel):
 class SendMessageResponse(BaseModel):
     user_message: ChatMessage
     assistant_message: ChatMessage
+
+
+class StreamStats(BaseModel):
+    """Evento final do streaming SSE — tempos medidos no servidor."""
+    assistant_message_id: str
+    ttft_ms: float | None = None
+    total_ms: float
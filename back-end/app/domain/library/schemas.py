@@ -24,5 +24,16 @@ class FavoriteToggleResponse(BaseModel):
     message: str
 
 
+class FavoriteBulkRequest(BaseModel):
+    add: list[str] = []
+    remove: list[str] = []
+
+
+class FavoriteBulkResponse(BaseModel):
+    added: list[str]  # só os posts que mudaram de estado
+    removed: list[str]
+    total: int
+
+
 class HistoryRecordRequest(BaseModel):
     post_id: str
@@ -15,6 +15,7 @@ class TherapySession(BaseModel):
     homework: str | None = None
     next_session_date: str | None = None
     created_at: str
+    version: int = 1  # incrementada a cada edição (ETag / If-Match)
 
 
 # --- Paciente: ficha completa ---
@@ -25,6 +26,7 @@ class PatientConfig(BaseModel):
     email: EmailStr
     status: Literal["active", "paused", "discharged"] = "active"
     created_at: str
+    user_id: str | None = None  # conta do paciente no app (chat)
 
     # Avaliacao clinica
     chief_complaint: str | None = None
@@ -40,12 +42,14 @@ class PatientConfig(BaseModel):
     focus_topics: list[str] = []
     avoid_topics: list[str] = []
     response_depth: Literal["brief", "moderate", "detailed"] = "moderate"
+    shared_answer_cache: bool = False  # permite respostas do cache compartilhado do chat
 
     # Controle de mensagens
     messages_used: int = 0
     messages_limit: int = 100
 
     sessions: list[TherapySession] = []
+    version: int = 1  # incrementada a cada edição da ficha ou de suas sessões (ETag / If-Match)
 
 
 # --- Paciente: versao resumida para listagem ---
@@ -65,6 +69,7 @@ class PatientSummary(BaseModel):
 class PatientIntakeForm(BaseModel):
     name: str
     email: EmailStr
+    user_id: str | None = None
 
     # Avaliacao clinica
     chief_complaint: str | None = None
@@ -88,6 +93,20 @@ class PatientIntakeForm(BaseModel):
     first_session_mood: Literal["very_low", "low", "neutral", "good", "great"] | None = None
 
 
+# --- Response: importacao em lote ---
+
+class ImportRowError(BaseModel):
+    line: int  # linha do arquivo (1 = primeira)
+    errors: list[str]
+
+
+class PatientImportReport(BaseModel):
+    format: Literal["csv", "ndjson"]
+    imported: int
+    failed: int
+    errors: list[ImportRowError]  # limitado a PATIENT_IMPORT_MAX_ERRORS; `failed` conta todos
+
+
 # --- Response: visao geral do dashboard ---
 
 class NearLimitPatient(BaseModel):
@@ -112,6 +131,45 @@ class DashboardOverview(BaseModel):
     recent_activity: list[RecentActivity]
 
 
+class NearLimitResponse(BaseModel):
+    """Pacientes mais perto do limite de mensagens, do mais ao menos próximo."""
+    patients: list[NearLimitPatient]
+
+
+class MoodPoint(BaseModel):
+    session_id: str
+    date: str
+    mood: Literal["very_low", "low", "neutral", "good", "great"]
+    score: int  # 1 (very_low) a 5 (great)
+    rolling_average: float
+
+
+class MoodTrendResponse(BaseModel):
+    """Trajetória de humor por sessão, em ordem de data, com média móvel."""
+    patient_id: str
+    window: int
+    average: float | None
+    points: list[MoodPoint]
+
+
+class TopicCount(BaseModel):
+    topic: str
+    count: int
+
+
+class TopicTrendResponse(BaseModel):
+    """Temas mais frequentes nas sessões do paciente."""
+    patient_id: str
+    total_sessions: int
+    topics: list[TopicCount]
+
+
+class OverviewCheckResponse(BaseModel):
+    """Resultado da conferência dos agregados incrementais contra o recálculo."""
+    consistent: bool
+    differences: list[str]
+
+
 # --- Response: lista de pacientes ---
 
 class PatientListResponse(BaseModel):
@@ -133,6 +191,8 @@ class UpdatePatientConfigRequest(BaseModel):
     focus_topics: list[str] | None = None
     avoid_topics: list[str] | None = None
     response_depth: Literal["brief", "moderate", "detailed"] | None = None
+    shared_answer_cache: bool | None = None
+    user_id: str | None = None
 
 
 # --- Request: atualizar status ---
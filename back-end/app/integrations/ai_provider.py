@@ -0,0 +1,191 @@
+"""Abstração do provedor de IA do chat, com prazo por chamada e requisições hedged.
+
+`AIProvider` é a interface usada pelo chat: `complete()` devolve a resposta
+inteira e `stream()` os deltas de texto. A implementação compatível com a
+API da OpenAI é `LLMClient` (app/integrations/llm_client.py) — serve tanto
+para a OpenAI quanto para o servidor stub local
+(app/integrations/stub_server.py) apontando `OPENAI_BASE_URL` para ele.
+
+`HedgedProvider` envolve qualquer provedor:
+
+- Prazo por chamada (`llm_deadline_seconds`): em `complete()`, para a
+  resposta inteira; em `stream()`, até o primeiro trecho — depois disso o
+  usuário já está vendo a resposta e vale o timeout do cliente HTTP.
+  Estourado o prazo, levanta `DeadlineExceededError` e o chat responde com
+  o texto pronto de fallback.
+- Hedging: se a primeira tentativa não respondeu (ou não mandou o primeiro
+  trecho) até o p95 das latências recentes, dispara uma segunda tentativa
+  idêntica e fica com a que responder primeiro; a outra é cancelada. Só
+  as ~5% mais lentas geram chamada extra, cortando a cauda da latência.
+"""
+
+import asyncio
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import AsyncIterator
+
+from app.core.config import settings
+
+
+class DeadlineExceededError(Exception):
+    """O provedor não respondeu dentro do prazo da chamada."""
+
+
+class AIProvider(ABC):
+    @abstractmethod
+    async def complete(self, messages: list[dict], max_tokens: int = 600, temperature: float = 0.7) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, messages: list[dict], max_tokens: int = 600, temperature: float = 0.7) -> AsyncIterator[str]:
+        ...
+
+    async def aclose(self) -> None:
+        pass
+
+
+class LatencyTracker:
+    """Janela das latências mais recentes (segundos) para estimar o p95."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> float | None:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+async def _discard(task: asyncio.Task) -> None:
+    """Cancela uma tentativa perdedora e consome seu resultado."""
+    task.cancel()
+    try:
+        await task
+    except BaseException:  # noqa: BLE001 — resultado da perdedora é descartado
+        pass
+
+
+class HedgedProvider(AIProvider):
+    def __init__(
+        self,
+        inner: AIProvider,
+        deadline: float,
+        hedge_enabled: bool = True,
+        hedge_initial_delay: float = 2.0,
+        hedge_min_delay: float = 1.0,
+    ) -> None:
+        self.inner = inner
+        self.deadline = deadline
+        self.hedge_enabled = hedge_enabled
+        self.hedge_initial_delay = hedge_initial_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.complete_latency = LatencyTracker()
+        self.first_chunk_latency = LatencyTracker()
+        self.hedges = 0
+        self.deadlines_exceeded = 0
+
+    def _hedge_delay(self, tracker: LatencyTracker) -> float | None:
+        if not self.hedge_enabled:
+            return None
+        p95 = tracker.p95()
+        delay = self.hedge_initial_delay if p95 is None else max(p95, self.hedge_min_delay)
+        return delay if delay < self.deadline else None
+
+    async def _race(self, launch, tracker: LatencyTracker):
+        """Roda `launch()` com prazo e hedging; devolve o resultado da tentativa vencedora."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.deadline
+        hedge_delay = self._hedge_delay(tracker)
+        hedge_at = None if hedge_delay is None else start + hedge_delay
+
+        started: dict[asyncio.Task, float] = {asyncio.ensure_future(launch()): start}
+        failure: BaseException | None = None
+        try:
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    self.deadlines_exceeded += 1
+                    raise DeadlineExceededError("O provedor de IA não respondeu dentro do prazo.")
+                wake = deadline if hedge_at is None else min(deadline, hedge_at)
+                pending = [t for t in started if not t.done()]
+                if pending:
+                    await asyncio.wait(pending, timeout=wake - now, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in [t for t in started if t.done()]:
+                    error = task.exception()
+                    if error is None:
+                        tracker.record(loop.time() - started[task])
+                        return task.result()
+                    failure = failure or error
+                    del started[task]
+                if not started:
+                    raise failure
+
+                if hedge_at is not None and loop.time() >= hedge_at:
+                    hedge_at = None
+                    self.hedges += 1
+                    started[asyncio.ensure_future(launch())] = loop.time()
+        finally:
+            for task in started:
+                if not task.done():
+                    await _discard(task)
+
+    async def complete(self, messages: list[dict], max_tokens: int = 600, temperature: float = 0.7) -> str:
+        return await self._race(
+            lambda: self.inner.complete(messages, max_tokens=max_tokens, temperature=temperature),
+            self.complete_latency,
+        )
+
+    async def stream(
+        self, messages: list[dict], max_tokens: int = 600, temperature: float = 0.7
+    ) -> AsyncIterator[str]:
+        # Cada tentativa abre o stream e espera o primeiro trecho; a vencedora
+        # devolve o iterador já aberto, e as demais são fechadas.
+        opened: list[AsyncIterator[str]] = []
+
+        async def first_chunk() -> tuple[AsyncIterator[str], str | None]:
+            iterator = aiter(self.inner.stream(messages, max_tokens=max_tokens, temperature=temperature))
+            opened.append(iterator)
+            try:
+                return iterator, await anext(iterator)
+            except StopAsyncIteration:
+                return iterator, None
+
+        try:
+            winner, chunk = await self._race(first_chunk, self.first_chunk_latency)
+            if chunk is not None:
+                yield chunk
+                async for chunk in winner:
+                    yield chunk
+        finally:
+            for iterator in opened:
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    try:
+                        await aclose()
+                    except RuntimeError:  # tentativa cancelada no meio do __anext__
+                        pass
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def hedged(inner: AIProvider) -> HedgedProvider:
+    """Envolve o provedor com o prazo e o hedging configurados em settings."""
+    return HedgedProvider(
+        inner,
+        deadline=settings.llm_deadline_seconds,
+        hedge_enabled=settings.llm_hedge_enabled,
+        hedge_initial_delay=settings.llm_hedge_initial_delay_seconds,
+        hedge_min_delay=settings.llm_hedge_min_delay_seconds,
+    )
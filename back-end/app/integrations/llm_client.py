@@ -0,0 +1,112 @@
+"""Cliente LLM assíncrono de longa duração, compartilhado por toda a aplicação.
+
+Criado uma única vez no lifespan do FastAPI (app/main.py), reaproveita as
+conexões TLS com o provedor através de um pool httpx e limita quantas
+gerações podem estar em andamento ao mesmo tempo — acima do limite, as
+requisições aguardam na fila até `llm_queue_timeout_seconds`.
+
+`LLMClient` é a implementação de `AIProvider` para APIs compatíveis com a
+OpenAI; o cliente compartilhado é envolvido por `HedgedProvider` (prazo por
+chamada e hedging — ver app/integrations/ai_provider.py).
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.integrations.ai_provider import AIProvider, HedgedProvider, hedged
+
+
+class LLMBusyError(Exception):
+    """Limite de gerações simultâneas atingido e a fila não andou a tempo."""
+
+
+class LLMClient(AIProvider):
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._http = httpx.AsyncClient(
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(
+                settings.llm_timeout_seconds,
+                connect=settings.llm_connect_timeout_seconds,
+            ),
+        )
+        self._openai = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            max_retries=settings.llm_max_retries,
+            http_client=self._http,
+        )
+        self._slots = asyncio.Semaphore(settings.llm_max_concurrency)
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), settings.llm_queue_timeout_seconds)
+        except TimeoutError:
+            raise LLMBusyError("Muitas gerações simultâneas — tente novamente.") from None
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    async def complete(self, messages: list[dict], max_tokens: int = 600, temperature: float = 0.7) -> str:
+        async with self._slot():
+            response = await self._openai.chat.completions.create(
+                model=settings.openai_model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        return response.choices[0].message.content or ""
+
+    async def stream(
+        self, messages: list[dict], max_tokens: int = 600, temperature: float = 0.7
+    ) -> AsyncIterator[str]:
+        async with self._slot():
+            stream = await self._openai.chat.completions.create(
+                model=settings.openai_model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            async with stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+    async def aclose(self) -> None:
+        await self._openai.close()
+        await self._http.aclose()
+
+
+_client: HedgedProvider | None = None
+
+
+def init_llm_client() -> HedgedProvider | None:
+    """Cria o cliente compartilhado. Sem OPENAI_API_KEY não há cliente (chat em modo mock)."""
+    global _client
+    if _client is None and settings.openai_api_key:
+        _client = hedged(LLMClient())
+    return _client
+
+
+def get_llm_client() -> HedgedProvider | None:
+    """Retorna o cliente compartilhado (criado sob demanda se o lifespan não rodou)."""
+    return _client or init_llm_client()
+
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
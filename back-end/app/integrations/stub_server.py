@@ -0,0 +1,168 @@
+"""Servidor stub compatível com a API de chat da OpenAI, para testes de carga offline.
+
+Responde `POST /v1/chat/completions` (com e sem `stream`) com uma resposta
+bíblica pronta, sorteando a latência de distribuições configuráveis:
+
+- `--ttft`: tempo até o primeiro token (ou até a resposta, sem streaming);
+- `--token-delay`: intervalo entre tokens.
+
+Formato das distribuições (segundos):
+    fixed:value=0.2
+    uniform:low=0.1,high=0.5
+    normal:mean=0.3,std=0.05           (truncada em zero)
+    lognormal:median=0.4,sigma=0.8     (cauda longa — bom para testar hedging)
+
+Uso:
+    python -m app.integrations.stub_server --port 8001 --ttft lognormal:median=0.4,sigma=0.8
+
+e, no back-end, `OPENAI_API_KEY=stub OPENAI_BASE_URL=http://localhost:8001/v1`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_ANSWER = (
+    "A Bíblia nos ensina em Filipenses 4:6-7 a não andar ansiosos por coisa alguma, "
+    "mas apresentar tudo a Deus em oração. Em Mateus 6:34, Jesus lembra que cada dia "
+    "tem o seu próprio cuidado. Confie no Senhor de todo o coração (Provérbios 3:5-6)."
+)
+
+_KINDS = {
+    "fixed": ("value",),
+    "uniform": ("low", "high"),
+    "normal": ("mean", "std"),
+    "lognormal": ("median", "sigma"),
+}
+
+
+@dataclass(frozen=True)
+class LatencyDistribution:
+    kind: str
+    params: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, raw = spec.partition(":")
+        if kind not in _KINDS:
+            raise ValueError(f"Distribuição desconhecida: {kind!r} (use {', '.join(_KINDS)})")
+        params = {}
+        for item in filter(None, raw.split(",")):
+            name, _, value = item.partition("=")
+            params[name.strip()] = float(value)
+        missing = [p for p in _KINDS[kind] if p not in params]
+        if missing:
+            raise ValueError(f"Parâmetros ausentes para {kind}: {', '.join(missing)}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p["value"]
+        elif self.kind == "uniform":
+            value = rng.uniform(p["low"], p["high"])
+        elif self.kind == "normal":
+            value = rng.gauss(p["mean"], p["std"])
+        else:
+            value = rng.lognormvariate(0.0, p["sigma"]) * p["median"]
+        return max(0.0, value)
+
+
+@dataclass
+class StubConfig:
+    ttft: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("fixed", {"value": 0.2}))
+    token_delay: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("fixed", {"value": 0.02}))
+    answer: str = STUB_ANSWER
+    seed: int | None = None
+
+
+def _tokens(answer: str, max_tokens: int | None) -> list[str]:
+    words = answer.split(" ")
+    tokens = [w if i == 0 else f" {w}" for i, w in enumerate(words)]
+    return tokens[:max_tokens] if max_tokens else tokens
+
+
+def create_stub_app(config: StubConfig | None = None) -> FastAPI:
+    config = config or StubConfig()
+    rng = random.Random(config.seed)
+    app = FastAPI(title="Stub LLM (compatível com OpenAI)", docs_url=None, redoc_url=None)
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        model = body.get("model", "stub")
+        tokens = _tokens(config.answer, body.get("max_tokens"))
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        ttft = config.ttft.sample(rng)
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + sum(config.token_delay.sample(rng) for _ in tokens[1:]))
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events():
+            await asyncio.sleep(ttft)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(config.token_delay.sample(rng))
+                yield chunk({"content": token})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servidor LLM stub compatível com a OpenAI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ttft", default="fixed:value=0.2", help="ex.: lognormal:median=0.4,sigma=0.8")
+    parser.add_argument("--token-delay", default="fixed:value=0.02")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        ttft=LatencyDistribution.parse(args.ttft),
+        token_delay=LatencyDistribution.parse(args.token_delay),
+        seed=args.seed,
+    )
+    uvicorn.run(create_stub_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
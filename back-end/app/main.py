@@ -1,8 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import v1_router
 from app.core.config import settings
+from app.core.counters import close_counter_store
+from app.core.rate_limit import close_rate_limiter
+from app.integrations.llm_client import close_llm_client, init_llm_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_llm_client()
+    yield
+    await close_llm_client()
+    await close_rate_limiter()
+    close_counter_store()
+
 
 app = FastAPI(
     title=settings.app_name,
@@ -10,6 +25,7 @@ app = FastAPI(
     description="API do aplicativo Vida com Deus — devocionais, chat bíblico com IA e biblioteca pessoal.",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -0,0 +1,186 @@
+"""Repositório de conversas do chat (Fase 1 — arquivos em data/conversations/).
+
+Cada conversa é um log de mensagens somente-anexação, mais um cabeçalho
+pequeno com `message_count` e `last_message_preview` atualizado a cada anexo:
+
+    data/conversations/<usuário>/
+        _headers.json       → {conversation_id: cabeçalho} — única leitura da listagem
+        <conversa>.jsonl    → uma mensagem por linha, na ordem de envio
+        <conversa>.idx      → offset (8 bytes) de cada linha do .jsonl
+        <conversa>.summary.json → resumo acumulado do histórico antigo (contexto do LLM)
+
+O índice de offsets permite ler uma janela (últimas N mensagens ou N antes
+de um cursor) com dois `seek`, sem carregar o histórico inteiro.
+"""
+
+import hashlib
+import json
+import re
+import struct
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.storage import DATA_DIR
+
+CONVERSATIONS_DIR = DATA_DIR / "conversations"
+
+_HEADERS_FILE = "_headers.json"
+_OFFSET = struct.Struct("<Q")
+_PREVIEW_CHARS = 60
+_VALID_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _preview(content: str) -> str:
+    content = " ".join(content.split())
+    if len(content) <= _PREVIEW_CHARS:
+        return content
+    return content[:_PREVIEW_CHARS].rstrip() + "..."
+
+
+class ConversationStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    # ── Caminhos ──────────────────────────────────────────────────────────────
+
+    def _user_dir(self, user_id: str) -> Path:
+        # sub do JWT não é confiável como nome de diretório
+        return self.root / hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:24]
+
+    def _paths(self, user_id: str, conversation_id: str) -> tuple[Path, Path]:
+        base = self._user_dir(user_id)
+        return base / f"{conversation_id}.jsonl", base / f"{conversation_id}.idx"
+
+    # ── Cabeçalhos ────────────────────────────────────────────────────────────
+
+    def _read_headers(self, user_id: str) -> dict[str, dict]:
+        path = self._user_dir(user_id) / _HEADERS_FILE
+        if not path.exists():
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_headers(self, user_id: str, headers: dict[str, dict]) -> None:
+        directory = self._user_dir(user_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / f"{_HEADERS_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(headers, f, ensure_ascii=False)
+        tmp.replace(directory / _HEADERS_FILE)
+
+    def list_conversations(self, user_id: str) -> list[dict]:
+        """Cabeçalhos das conversas do usuário, da mais recente para a mais antiga."""
+        headers = self._read_headers(user_id)
+        return sorted(headers.values(), key=lambda h: h["updated_at"], reverse=True)
+
+    def get_conversation(self, user_id: str, conversation_id: str) -> dict | None:
+        if not _VALID_ID_RE.match(conversation_id):
+            return None
+        return self._read_headers(user_id).get(conversation_id)
+
+    def create_conversation(self, user_id: str, conversation_id: str, created_at: str | None = None) -> dict:
+        created_at = created_at or _now_iso()
+        header = {
+            "id": conversation_id,
+            "user_id": user_id,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "message_count": 0,
+            "last_message_preview": None,
+        }
+        with self._locks[user_id]:
+            headers = self._read_headers(user_id)
+            headers[conversation_id] = header
+            self._write_headers(user_id, headers)
+        return header
+
+    # ── Log de mensagens ──────────────────────────────────────────────────────
+
+    def append_message(self, user_id: str, conversation_id: str, message: dict) -> dict:
+        """Anexa a mensagem ao log e atualiza o cabeçalho. Retorna o cabeçalho."""
+        log_path, idx_path = self._paths(user_id, conversation_id)
+        line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with self._locks[user_id]:
+            headers = self._read_headers(user_id)
+            header = headers[conversation_id]
+
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(log_path, "ab") as log:
+                offset = log.seek(0, 2)
+                log.write(line)
+            with open(idx_path, "ab") as idx:
+                idx.write(_OFFSET.pack(offset))
+
+            header["message_count"] += 1
+            header["last_message_preview"] = _preview(message["content"])
+            header["updated_at"] = message.get("created_at") or _now_iso()
+            self._write_headers(user_id, headers)
+        return header
+
+    def read_messages(
+        self,
+        user_id: str,
+        conversation_id: str,
+        limit: int,
+        before: int | None = None,
+    ) -> tuple[list[dict], int]:
+        """Lê até `limit` mensagens anteriores à posição `before` (padrão: fim do log).
+
+        Retorna (mensagens em ordem cronológica, posição da primeira mensagem
+        devolvida) — essa posição serve de cursor para a página anterior.
+        """
+        log_path, idx_path = self._paths(user_id, conversation_id)
+        if not idx_path.exists():
+            return [], 0
+
+        with open(idx_path, "rb") as idx:
+            total = idx.seek(0, 2) // _OFFSET.size
+            end = total if before is None else max(0, min(before, total))
+            start = max(0, end - limit)
+            if start >= end:
+                return [], start
+            idx.seek(start * _OFFSET.size)
+            (start_offset,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+            end_offset = None
+            if end < total:
+                idx.seek(end * _OFFSET.size)
+                (end_offset,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+
+        with open(log_path, "rb") as log:
+            log.seek(start_offset)
+            raw = log.read() if end_offset is None else log.read(end_offset - start_offset)
+
+        # Divide os bytes só em "\n": `str.splitlines` também quebraria em
+        # U+2028/U+2029/U+0085, gravados sem escape dentro do conteúdo
+        lines = raw.split(b"\n")[: end - start]
+        return [json.loads(line) for line in lines], start
+
+    # ── Resumo acumulado ──────────────────────────────────────────────────────
+
+    def read_summary(self, user_id: str, conversation_id: str) -> dict | None:
+        """Resumo das mensagens [0, `upto`) da conversa: {"upto": int, "text": str}."""
+        path = self._user_dir(user_id) / f"{conversation_id}.summary.json"
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_summary(self, user_id: str, conversation_id: str, upto: int, text: str) -> None:
+        directory = self._user_dir(user_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{conversation_id}.summary.json"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"upto": upto, "text": text}, f, ensure_ascii=False)
+        tmp.replace(path)
+
+
+chat_repo = ConversationStore(CONVERSATIONS_DIR)
@@ -0,0 +1,347 @@
+"""Repositório da biblioteca do usuário (Fase 1 — data/favorites/ e data/history/).
+
+Favoritos são chaveados por (usuário, post). Cada usuário tem um log
+somente-anexação de operações:
+
+    data/favorites/<usuário>.jsonl → {"op": "add" | "remove", "post_id", "saved_at"} por linha
+
+Na primeira leitura o log é reaplicado num dicionário post_id → entrada,
+mantido em memória: pertença e alternância em O(1), ordem de inserção
+preservada. Cada alteração só anexa as linhas novas; quando o log passa de
+2× o número de favoritos vivos ele é reescrito com uma linha por favorito.
+
+Títulos e tags não são gravados — vêm do catálogo de posts na leitura, em
+lote (`load_favorites`). O data/favorites.json global da versão anterior,
+que ignorava o usuário, é importado como favoritos do usuário mock.
+
+O histórico de leitura é um log somente-anexação por usuário, particionado
+por mês (UTC):
+
+    data/history/<usuário>/<AAAA-MM>.jsonl → {"post_id", "read_at"} por leitura
+
+Registrar uma leitura é um anexo ao arquivo do mês; uma consulta por período
+só abre as partições dos meses do intervalo e devolve a última leitura de
+cada post. `compact` reescreve os meses fechados com uma linha por (post,
+dia) — as consultas, que são por dia, dão o mesmo resultado.
+"""
+
+import hashlib
+import json
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from app.core.dependencies import MOCK_USER_ID
+from app.core.storage import DATA_DIR, read_json
+from app.domain.library.schemas import LibraryItem
+from app.repositories.post_repo import post_catalog
+
+FAVORITES_DIR = DATA_DIR / "favorites"
+HISTORY_DIR = DATA_DIR / "history"
+LEGACY_FAVORITES_FILE = "favorites.json"
+_COMPACT_SLACK = 64
+
+
+def _user_key(user_id: str) -> str:
+    # sub do JWT não é confiável como nome de arquivo
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:24]
+
+
+def _entry(op: dict) -> dict:
+    return {k: v for k, v in op.items() if k != "op"}
+
+
+class FavoriteStore:
+    def __init__(self, root: Path, legacy_file: str | None = LEGACY_FAVORITES_FILE) -> None:
+        self.root = root
+        self.legacy_file = legacy_file
+        self._favorites: dict[str, dict[str, dict]] = {}  # user_id → post_id → entrada
+        self._log_lines: dict[str, int] = {}
+        self._locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def reset(self) -> None:
+        """Descarta os favoritos em memória (relidos dos logs no próximo acesso)."""
+        self._favorites.clear()
+        self._log_lines.clear()
+
+    def _path(self, user_id: str) -> Path:
+        return self.root / f"{_user_key(user_id)}.jsonl"
+
+    # ── Log de operações ──────────────────────────────────────────────────────
+
+    def _load(self, user_id: str) -> dict[str, dict]:
+        """Favoritos do usuário, reaplicando o log na primeira vez (com o lock do usuário)."""
+        favorites = self._favorites.get(user_id)
+        if favorites is not None:
+            return favorites
+        favorites, lines = {}, 0
+        path = self._path(user_id)
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    op = json.loads(line)
+                    lines += 1
+                    if op["op"] == "add":
+                        favorites.setdefault(op["post_id"], _entry(op))
+                    else:
+                        favorites.pop(op["post_id"], None)
+        self._favorites[user_id] = favorites
+        self._log_lines[user_id] = lines
+        if not path.exists() and user_id == MOCK_USER_ID and self.legacy_file:
+            self._import_legacy(user_id, favorites)
+        return favorites
+
+    def _import_legacy(self, user_id: str, favorites: dict[str, dict]) -> None:
+        data = read_json(self.legacy_file)
+        ops = [
+            {"op": "add", "post_id": item["post_id"], "saved_at": item.get("saved_at", ""),
+             "title": item.get("title"), "tags": item.get("tags", [])}
+            for item in data if isinstance(item, dict) and item.get("post_id")
+        ] if isinstance(data, list) else []
+        for op in ops:
+            favorites.setdefault(op["post_id"], _entry(op))
+        self._append(user_id, ops)
+
+    def _append(self, user_id: str, ops: list[dict]) -> None:
+        if not ops:
+            return
+        path = self._path(user_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops))
+        self._log_lines[user_id] += len(ops)
+        live = len(self._favorites[user_id])
+        if self._log_lines[user_id] > 2 * live + _COMPACT_SLACK:
+            self._compact(user_id)
+
+    def _compact(self, user_id: str) -> None:
+        path = self._path(user_id)
+        favorites = self._favorites[user_id]
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in favorites.values():
+                f.write(json.dumps({"op": "add", **entry}, ensure_ascii=False) + "\n")
+        tmp.replace(path)
+        self._log_lines[user_id] = len(favorites)
+
+    # ── Operações ─────────────────────────────────────────────────────────────
+
+    def contains(self, user_id: str, post_id: str) -> bool:
+        with self._locks[user_id]:
+            return post_id in self._load(user_id)
+
+    def post_ids(self, user_id: str) -> set[str]:
+        with self._locks[user_id]:
+            return set(self._load(user_id))
+
+    def entries(self, user_id: str) -> list[dict]:
+        """Favoritos do usuário, do mais recente para o mais antigo."""
+        with self._locks[user_id]:
+            return list(reversed(self._load(user_id).values()))
+
+    def apply(
+        self, user_id: str, add: Iterable[str] = (), remove: Iterable[str] = ()
+    ) -> tuple[list[str], list[str]]:
+        """Favorita `add` e desfavorita `remove` numa única anexação ao log.
+
+        Devolve (adicionados, removidos) — só os posts que mudaram de estado.
+        """
+        saved_at = date.today().isoformat()
+        with self._locks[user_id]:
+            favorites = self._load(user_id)
+            ops = []
+            for post_id in dict.fromkeys(add):
+                if post_id not in favorites:
+                    op = {"op": "add", "post_id": post_id, "saved_at": saved_at}
+                    favorites[post_id] = _entry(op)
+                    ops.append(op)
+            for post_id in dict.fromkeys(remove):
+                if favorites.pop(post_id, None) is not None:
+                    ops.append({"op": "remove", "post_id": post_id})
+            self._append(user_id, ops)
+        added = [op["post_id"] for op in ops if op["op"] == "add"]
+        removed = [op["post_id"] for op in ops if op["op"] == "remove"]
+        return added, removed
+
+    def add(self, user_id: str, post_ids: Iterable[str]) -> list[str]:
+        return self.apply(user_id, add=post_ids)[0]
+
+    def remove(self, user_id: str, post_ids: Iterable[str]) -> list[str]:
+        return self.apply(user_id, remove=post_ids)[1]
+
+
+favorite_store = FavoriteStore(FAVORITES_DIR)
+
+
+def _saved_label(saved_at: str) -> str:
+    try:
+        return f"Salvo em {date.fromisoformat(saved_at).strftime('%d/%m/%Y')}"
+    except ValueError:
+        return "Salvo"
+
+
+def load_favorites(user_id: str) -> list[LibraryItem]:
+    """Favoritos do usuário com título e tags do catálogo de posts, buscados em lote."""
+    entries = favorite_store.entries(user_id)
+    posts = post_catalog.get_many(e["post_id"] for e in entries)
+    items = []
+    for entry in entries:
+        post_id = entry["post_id"]
+        post = posts.get(post_id, {})
+        items.append(LibraryItem(
+            id=f"fav-{post_id}",
+            post_id=post_id,
+            title=post.get("title") or entry.get("title") or f"Post {post_id}",
+            subtitle=_saved_label(entry.get("saved_at", "")),
+            type="post",
+            saved_at=entry.get("saved_at", ""),
+            tags=post.get("tags") or entry.get("tags") or [],
+        ))
+    return items
+
+
+# ── Histórico de leitura ──────────────────────────────────────────────────────
+
+def _iso(moment: datetime) -> str:
+    """Instante UTC com largura fixa — a ordem das strings é a ordem no tempo."""
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _month(day: date | str) -> str:
+    return day.isoformat()[:7] if isinstance(day, date) else day[:7]
+
+
+@dataclass(frozen=True)
+class CompactionStats:
+    partitions: int = 0
+    lines_before: int = 0
+    lines_after: int = 0
+
+    def __add__(self, other: "CompactionStats") -> "CompactionStats":
+        return CompactionStats(
+            self.partitions + other.partitions,
+            self.lines_before + other.lines_before,
+            self.lines_after + other.lines_after,
+        )
+
+
+def _read_log(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class HistoryStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def _partitions(self, directory: Path, start: date | None, end: date | None) -> list[Path]:
+        """Partições do usuário que cobrem o intervalo, do mês mais antigo ao mais recente."""
+        if not directory.is_dir():
+            return []
+        first = _month(start) if start else ""
+        last = _month(end) if end else "9999-99"
+        return sorted(p for p in directory.glob("*.jsonl") if first <= p.stem <= last)
+
+    def record(self, user_id: str, post_id: str, read_at: datetime | None = None) -> dict:
+        """Anexa a leitura à partição do mês."""
+        entry = {"post_id": post_id, "read_at": _iso(read_at or datetime.now(timezone.utc))}
+        directory = self.root / _user_key(user_id)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._locks[directory.name]:
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(directory / f"{_month(entry['read_at'])}.jsonl", "a", encoding="utf-8") as f:
+                f.write(line)
+        return entry
+
+    def last_reads(self, user_id: str, start: date | None = None, end: date | None = None) -> list[dict]:
+        """Última leitura de cada post entre `start` e `end` (dias UTC, inclusivos), mais recentes primeiro."""
+        directory = self.root / _user_key(user_id)
+        first = start.isoformat() if start else ""
+        last = end.isoformat() if end else "9999-99-99"
+        latest: dict[str, str] = {}
+        with self._locks[directory.name]:
+            for path in self._partitions(directory, start, end):
+                for entry in _read_log(path):
+                    read_at = entry["read_at"]
+                    if first <= read_at[:10] <= last and read_at > latest.get(entry["post_id"], ""):
+                        latest[entry["post_id"]] = read_at
+        return [
+            {"post_id": post_id, "read_at": read_at}
+            for post_id, read_at in sorted(latest.items(), key=lambda item: item[1], reverse=True)
+        ]
+
+    # ── Compactação ───────────────────────────────────────────────────────────
+
+    def _compact_dir(self, directory: Path, before_month: str) -> CompactionStats:
+        stats = CompactionStats()
+        with self._locks[directory.name]:
+            for path in self._partitions(directory, None, None):
+                if path.stem >= before_month:
+                    continue
+                entries = _read_log(path)
+                kept: dict[tuple[str, str], str] = {}
+                for entry in entries:
+                    key = (entry["post_id"], entry["read_at"][:10])
+                    if entry["read_at"] > kept.get(key, ""):
+                        kept[key] = entry["read_at"]
+                stats += CompactionStats(1, len(entries), len(kept))
+                if len(kept) == len(entries):
+                    continue
+                tmp = path.with_suffix(".jsonl.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for (post_id, _), read_at in sorted(kept.items(), key=lambda item: item[1]):
+                        f.write(json.dumps({"post_id": post_id, "read_at": read_at}, ensure_ascii=False) + "\n")
+                tmp.replace(path)
+        return stats
+
+    def compact(self, user_id: str | None = None, today: date | None = None) -> CompactionStats:
+        """Compacta os meses fechados (anteriores ao mês de `today`) de um usuário ou de todos."""
+        before_month = _month(today or datetime.now(timezone.utc).date())
+        if user_id is not None:
+            return self._compact_dir(self.root / _user_key(user_id), before_month)
+        stats = CompactionStats()
+        if self.root.is_dir():
+            for directory in sorted(p for p in self.root.iterdir() if p.is_dir()):
+                stats += self._compact_dir(directory, before_month)
+        return stats
+
+
+history_store = HistoryStore(HISTORY_DIR)
+
+
+def _read_label(read_at: str, today: date) -> str:
+    day = date.fromisoformat(read_at[:10])
+    if day == today:
+        return "Acessado hoje"
+    if (today - day).days == 1:
+        return "Acessado ontem"
+    return f"Acessado em {day.strftime('%d/%m/%Y')}"
+
+
+def load_history(user_id: str, start: date | None = None, end: date | None = None) -> list[LibraryItem]:
+    """Posts lidos no intervalo (última leitura de cada um), com título e tags do catálogo."""
+    entries = history_store.last_reads(user_id, start, end)
+    posts = post_catalog.get_many(e["post_id"] for e in entries)
+    today = datetime.now(timezone.utc).date()
+    items = []
+    for entry in entries:
+        post_id = entry["post_id"]
+        post = posts.get(post_id, {})
+        tags = post.get("tags") or []
+        label = _read_label(entry["read_at"], today)
+        items.append(LibraryItem(
+            id=f"hist-{post_id}",
+            post_id=post_id,
+            title=post.get("title") or f"Post {post_id}",
+            subtitle=f"{label} • #{tags[0]}" if tags else label,
+            type="post",
+            saved_at=entry["read_at"][:10],
+            tags=tags,
+        ))
+    return items
@@ -0,0 +1,332 @@
+"""Repositório de pacientes (Fase 1 — persistido em data/patients.json).
+
+Escritas usam concorrência otimista em dois níveis:
+
+- arquivo: `mutate_patients` lê a lista, aplica a alteração e grava com
+  compare-and-swap; se outro escritor trocou o arquivo no meio tempo, relê e
+  reaplica. Edições de pacientes diferentes não se sobrescrevem e nenhuma
+  trava é mantida durante leitura/alteração/serialização;
+- registro: pacientes e sessões têm `version`, incrementada a cada edição.
+  Quem passa `if_match` só grava se a versão atual estiver entre as
+  esperadas (senão `VersionConflict`) — base do `If-Match`/412 das rotas.
+"""
+
+import json
+from collections.abc import Callable, Iterator
+from typing import TypeVar
+
+from app.core.counters import get_counter_store
+from app.core.storage import DATA_DIR, compare_and_swap, read_json, read_json_versioned, write_json
+
+PATIENTS_FILE = "patients.json"
+CAS_MAX_ATTEMPTS = 50
+_READ_CHUNK = 64 * 1024
+
+T = TypeVar("T")
+
+
+class PatientNotFound(LookupError):
+    pass
+
+
+class SessionNotFound(LookupError):
+    pass
+
+
+class VersionConflict(Exception):
+    """A versão atual do registro não é a esperada pelo `If-Match`."""
+
+    def __init__(self, current: int) -> None:
+        super().__init__(f"versão atual: {current}")
+        self.current = current
+
+
+# ── Dados mock iniciais ─────────────────────────────────────────────────────
+
+MOCK_PATIENTS: list[dict] = [
+    {
+        "id": "pat-001",
+        "name": "Ana Beatriz Souza",
+        "email": "ana.beatriz@email.com",
+        "status": "active",
+        "created_at": "2025-09-10T08:00:00Z",
+        "chief_complaint": "Ansiedade frequente e dificuldade para dormir",
+        "anxiety_level": "moderate",
+        "depression_level": "mild",
+        "sleep_quality": "poor",
+        "suicidal_ideation": False,
+        "current_medication": "Sertralina 50mg",
+        "therapy_goal": "Desenvolver estratégias de enfrentamento para ansiedade",
+        "therapeutic_approach": "Terapia Cognitivo-Comportamental",
+        "focus_topics": ["ansiedade", "sono", "autoestima"],
+        "avoid_topics": [],
+        "response_depth": "moderate",
+        "messages_used": 87,
+        "messages_limit": 100,
+        "sessions": [
+            {
+                "id": "sess-001",
+                "patient_id": "pat-001",
+                "date": "2025-11-01",
+                "summary": "Paciente relata melhora na qualidade do sono após exercícios de respiração.",
+                "mood": "good",
+                "topics_covered": ["sono", "respiração", "rotina"],
+                "homework": "Praticar respiração diafragmática antes de dormir",
+                "next_session_date": "2025-11-15",
+                "created_at": "2025-11-01T14:00:00Z",
+            },
+            {
+                "id": "sess-002",
+                "patient_id": "pat-001",
+                "date": "2025-11-15",
+                "summary": "Discutimos gatilhos de ansiedade no trabalho. Reestruturação cognitiva aplicada.",
+                "mood": "neutral",
+                "topics_covered": ["ansiedade", "trabalho", "pensamentos automáticos"],
+                "homework": "Diário de pensamentos automáticos",
+                "next_session_date": "2025-11-29",
+                "created_at": "2025-11-15T14:00:00Z",
+            },
+        ],
+    },
+    {
+        "id": "pat-002",
+        "name": "Pedro Henrique Lima",
+        "email": "pedro.lima@email.com",
+        "status": "paused",
+        "created_at": "2025-08-20T10:00:00Z",
+        "chief_complaint": "Luto pela perda de familiar",
+        "anxiety_level": "mild",
+        "depression_level": "moderate",
+        "sleep_quality": "fair",
+        "suicidal_ideation": False,
+        "current_medication": None,
+        "therapy_goal": "Elaboração do luto e fortalecimento emocional",
+        "therapeutic_approach": "Abordagem Humanista",
+        "focus_topics": ["luto", "família", "espiritualidade"],
+        "avoid_topics": ["detalhes do falecimento"],
+        "response_depth": "detailed",
+        "messages_used": 42,
+        "messages_limit": 200,
+        "sessions": [
+            {
+                "id": "sess-003",
+                "patient_id": "pat-002",
+                "date": "2025-10-05",
+                "summary": "Sessão focada em memórias positivas do familiar. Paciente chorou mas sentiu alívio.",
+                "mood": "low",
+                "topics_covered": ["luto", "memórias", "aceitação"],
+                "homework": "Escrever carta para o familiar",
+                "next_session_date": "2025-10-19",
+                "created_at": "2025-10-05T10:00:00Z",
+            },
+        ],
+    },
+    {
+        "id": "pat-003",
+        "name": "Maria Clara Santos",
+        "email": "maria.clara@email.com",
+        "status": "active",
+        "created_at": "2025-10-01T09:00:00Z",
+        "chief_complaint": "Baixa autoestima e dificuldade em relacionamentos",
+        "anxiety_level": "mild",
+        "depression_level": "none",
+        "sleep_quality": "good",
+        "suicidal_ideation": False,
+        "current_medication": None,
+        "therapy_goal": "Fortalecer autoestima e melhorar comunicação interpessoal",
+        "therapeutic_approach": "Terapia Cognitivo-Comportamental",
+        "focus_topics": ["autoestima", "relacionamentos", "comunicação"],
+        "avoid_topics": [],
+        "response_depth": "brief",
+        "messages_used": 15,
+        "messages_limit": 50,
+        "sessions": [
+            {
+                "id": "sess-004",
+                "patient_id": "pat-003",
+                "date": "2025-10-15",
+                "summary": "Primeira sessão. Anamnese inicial e estabelecimento de vínculo terapêutico.",
+                "mood": "neutral",
+                "topics_covered": ["anamnese", "expectativas", "vínculo"],
+                "homework": None,
+                "next_session_date": "2025-10-29",
+                "created_at": "2025-10-15T09:00:00Z",
+            },
+            {
+                "id": "sess-005",
+                "patient_id": "pat-003",
+                "date": "2025-10-29",
+                "summary": "Trabalhamos crenças centrais sobre autoestima. Paciente engajada.",
+                "mood": "good",
+                "topics_covered": ["autoestima", "crenças centrais", "autoconhecimento"],
+                "homework": "Listar 3 qualidades pessoais diariamente",
+                "next_session_date": "2025-11-12",
+                "created_at": "2025-10-29T09:00:00Z",
+            },
+            {
+                "id": "sess-006",
+                "patient_id": "pat-003",
+                "date": "2025-11-12",
+                "summary": "Revisão do exercício de qualidades. Paciente relatou melhora significativa.",
+                "mood": "great",
+                "topics_covered": ["autoestima", "progresso", "assertividade"],
+                "homework": "Praticar comunicação assertiva em uma situação social",
+                "next_session_date": "2025-11-26",
+                "created_at": "2025-11-12T09:00:00Z",
+            },
+        ],
+    },
+]
+
+
+# ── Persistência ─────────────────────────────────────────────────────────────
+
+def merge_usage(patients: list[dict]) -> list[dict]:
+    """Sobrepõe o contador de mensagens corrente ao `messages_used` gravado na ficha."""
+    counts = get_counter_store().get_many(p["id"] for p in patients)
+    for p in patients:
+        if p["id"] in counts:
+            p["messages_used"] = counts[p["id"]]
+    return patients
+
+
+def load_patients() -> list[dict]:
+    data = read_json(PATIENTS_FILE)
+    if not data:
+        write_json(PATIENTS_FILE, MOCK_PATIENTS)
+        return merge_usage(list(MOCK_PATIENTS))
+    if isinstance(data, list):
+        return merge_usage(data)
+    return MOCK_PATIENTS
+
+
+def save_patients(patients: list[dict]) -> None:
+    write_json(PATIENTS_FILE, patients)
+
+
+def iter_patients() -> Iterator[dict]:
+    """Percorre o patients.json um paciente por vez, sem carregar o arquivo inteiro.
+
+    Lê em blocos e decodifica cada objeto do array assim que ele termina; a
+    memória fica no tamanho de um paciente, não da lista.
+    """
+    path = DATA_DIR / PATIENTS_FILE
+    if not path.exists():
+        yield from load_patients()
+        return
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer = f.read(_READ_CHUNK).lstrip()
+        if not buffer.startswith("["):
+            yield from load_patients()  # vazio ou fora do formato: mesmo tratamento da leitura inteira
+            return
+        buffer, eof = buffer[1:], False
+        while True:
+            buffer = buffer.lstrip().removeprefix(",").lstrip()
+            if buffer.startswith("]") or (eof and not buffer):
+                return
+            try:
+                patient, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(_READ_CHUNK)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield merge_usage([patient])[0]
+            buffer = buffer[end:]
+
+
+# ── Escrita com compare-and-swap ────────────────────────────────────────────
+
+def record_version(record: dict) -> int:
+    return record.get("version", 1)
+
+
+def mutate_patients(change: Callable[[list[dict]], T]) -> T:
+    """Lê a lista, aplica `change` e grava só se ninguém gravou no meio tempo.
+
+    Em conflito relê e reaplica, então `change` deve depender apenas da lista
+    recebida. Exceção em `change` aborta sem gravar.
+    """
+    for _ in range(CAS_MAX_ATTEMPTS):
+        data, token = read_json_versioned(PATIENTS_FILE)
+        if not data or not isinstance(data, list):
+            load_patients()  # semeia os dados mock
+            continue
+        result = change(data)
+        if compare_and_swap(PATIENTS_FILE, token, data):
+            return result
+    raise RuntimeError("patients.json alterado por outros escritores em todas as tentativas")
+
+
+def _find(patients: list[dict], patient_id: str) -> dict:
+    for p in patients:
+        if p["id"] == patient_id:
+            return p
+    raise PatientNotFound(patient_id)
+
+
+def _check_version(record: dict, if_match: set[int] | None) -> None:
+    if if_match is not None and record_version(record) not in if_match:
+        raise VersionConflict(record_version(record))
+
+
+def _bump(record: dict) -> None:
+    record["version"] = record_version(record) + 1
+
+
+def add_patients(new_patients: list[dict]) -> None:
+    mutate_patients(lambda patients: patients.extend(new_patients))
+
+
+def update_patient(patient_id: str, changes: dict, if_match: set[int] | None = None) -> dict:
+    """Aplica `changes` à ficha e incrementa a versão; devolve a ficha gravada."""
+    def apply(patients: list[dict]) -> dict:
+        patient = _find(patients, patient_id)
+        _check_version(patient, if_match)
+        patient.update(changes)
+        _bump(patient)
+        return patient
+
+    return merge_usage([mutate_patients(apply)])[0]
+
+
+def add_session(patient_id: str, session: dict) -> dict:
+    """Acrescenta a sessão à ficha; devolve a ficha gravada."""
+    def apply(patients: list[dict]) -> dict:
+        patient = _find(patients, patient_id)
+        patient.setdefault("sessions", []).append(session)
+        _bump(patient)
+        return patient
+
+    return merge_usage([mutate_patients(apply)])[0]
+
+
+def update_session(
+    patient_id: str, session_id: str, changes: dict, if_match: set[int] | None = None
+) -> tuple[dict, dict]:
+    """Edita a sessão (a versão de sessão e da ficha sobem); devolve (ficha, sessão)."""
+    def apply(patients: list[dict]) -> tuple[dict, dict]:
+        patient = _find(patients, patient_id)
+        for session in patient.get("sessions", []):
+            if session["id"] == session_id:
+                _check_version(session, if_match)
+                session.update(changes)
+                _bump(session)
+                _bump(patient)
+                return patient, session
+        raise SessionNotFound(session_id)
+
+    patient, session = mutate_patients(apply)
+    merge_usage([patient])
+    return patient, session
+
+
+def find_patient_by_user(user_id: str) -> dict | None:
+    """Paciente vinculado à conta do usuário no app, se houver."""
+    for p in load_patients():
+        if p.get("user_id") == user_id:
+            return p
+    return None
@@ -0,0 +1,49 @@
+"""Catálogo de posts para leituras em lote (Fase 1 — data/posts.json).
+
+A biblioteca guarda só ids de posts; títulos e tags são buscados aqui na
+hora da leitura, para a lista inteira de uma vez. O catálogo é um dicionário
+id → post carregado uma vez por processo e recarregado quando o posts.json
+muda (mtime/tamanho), como o índice do `ArchiveRetriever`.
+"""
+
+import threading
+from collections.abc import Iterable
+
+from app.core.storage import DATA_DIR, read_json
+
+POSTS_FILE = "posts.json"
+
+
+class PostCatalog:
+    def __init__(self, posts_file: str = POSTS_FILE) -> None:
+        self.posts_file = posts_file
+        self._posts: dict[str, dict] = {}
+        self._signature: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Recarrega o catálogo se o arquivo de posts mudou desde a última leitura."""
+        try:
+            stat = (DATA_DIR / self.posts_file).stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = (0, 0)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            data = read_json(self.posts_file) if signature != (0, 0) else []
+            self._posts = (
+                {p["id"]: p for p in data if isinstance(p, dict) and p.get("id")} if isinstance(data, list) else {}
+            )
+            self._signature = signature
+
+    def get_many(self, post_ids: Iterable[str]) -> dict[str, dict]:
+        """Posts conhecidos entre `post_ids` (ids ausentes do catálogo ficam de fora)."""
+        self.refresh()
+        posts = self._posts
+        return {post_id: posts[post_id] for post_id in post_ids if post_id in posts}
+
+
+post_catalog = PostCatalog()
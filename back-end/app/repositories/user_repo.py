@@ -0,0 +1,24 @@
+"""Repositório de configurações do usuário (Fase 1 — estado em memória).
+
+As configurações não são persistidas ainda (aguarda banco de dados) e se
+perdem ao reiniciar o processo.
+"""
+
+from app.domain.users.schemas import UserSettings
+
+DEFAULT_SETTINGS = UserSettings(
+    theme="system",
+    ai_insights=True,
+    biblical_reminders=True,
+    rag_memory=False,
+)
+
+_settings_state: dict[str, UserSettings] = {}
+
+
+def load_settings(user_id: str) -> UserSettings:
+    return _settings_state.get(user_id) or DEFAULT_SETTINGS.model_copy()
+
+
+def save_settings(user_id: str, settings: UserSettings) -> None:
+    _settings_state[user_id] = settings
@@ -0,0 +1,234 @@
+"""Cache de respostas do chat para perguntas bíblicas repetidas.
+
+Muitos usuários fazem praticamente a mesma pergunta ("o que a Bíblia diz
+sobre ansiedade"), e cada uma pagaria a latência e o custo completos do LLM.
+
+- Chave exata: versão do prompt de sistema + pergunta normalizada (minúsculas,
+  sem acentos, sem pontuação, espaços colapsados).
+- Quase iguais: MinHash sobre trigramas de caracteres da pergunta, indexado
+  em bandas LSH; o candidato só é aceito se a similaridade de Jaccard real
+  entre os trigramas for >= `similarity`.
+- Expiração por TTL e despejo LRU limitado por um orçamento de memória
+  estimado em bytes.
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.domain.chat.schemas import Citation
+
+_NUM_PERM = 64
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_PRIME = (1 << 61) - 1
+_SHINGLE = 3
+_ENTRY_OVERHEAD_BYTES = 512
+
+_rng = random.Random(20240601)  # permutações fixas: assinaturas estáveis entre reinícios
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)]
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    folded = _NON_WORD_RE.sub(" ", folded)
+    return _SPACES_RE.sub(" ", folded).strip()
+
+
+def _shingles(normalized: str) -> frozenset[str]:
+    if len(normalized) <= _SHINGLE:
+        return frozenset([normalized])
+    return frozenset(normalized[i:i + _SHINGLE] for i in range(len(normalized) - _SHINGLE + 1))
+
+
+def _minhash(shingles: frozenset[str]) -> tuple[int, ...]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in shingles
+    ]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def _band_keys(signature: tuple[int, ...]) -> list[tuple[int, tuple[int, ...]]]:
+    return [(band, signature[band * _ROWS:(band + 1) * _ROWS]) for band in range(_BANDS)]
+
+
+def _jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(slots=True)
+class _Entry:
+    key: str
+    content: str
+    citations: list[Citation]
+    shingles: frozenset[str]
+    band_keys: list[tuple[int, tuple[int, ...]]]
+    expires_at: float
+    size: int
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    near_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return (self.exact_hits + self.near_hits) / lookups if lookups else 0.0
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_bytes: int,
+        similarity: float,
+        clock=time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.similarity = similarity
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._buckets: dict[tuple[int, tuple[int, ...]], set[str]] = defaultdict(set)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @staticmethod
+    def _key(prompt_version: str, normalized: str) -> str:
+        return f"{prompt_version}:{normalized}"
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for band_key in entry.band_keys:
+            bucket = self._buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def _live(self, key: str, now: float) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            self.stats.expirations += 1
+            return None
+        return entry
+
+    def get(self, question: str, prompt_version: str) -> tuple[str, list[Citation]] | None:
+        """Resposta em cache para a pergunta (exata ou quase igual), ou None."""
+        normalized = normalize_question(question)
+        key = self._key(prompt_version, normalized)
+        now = self._clock()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.exact_hits += 1
+                return entry.content, list(entry.citations)
+
+            shingles = _shingles(normalized)
+            best: tuple[float, str] | None = None
+            candidates: set[str] = set()
+            for band_key in _band_keys(_minhash(shingles)):
+                candidates |= self._buckets.get(band_key, set())
+            for candidate in candidates:
+                if not candidate.startswith(f"{prompt_version}:"):
+                    continue
+                cached = self._live(candidate, now)
+                if cached is None:
+                    continue
+                score = _jaccard(shingles, cached.shingles)
+                if score >= self.similarity and (best is None or score > best[0]):
+                    best = (score, candidate)
+
+            if best is None:
+                self.stats.misses += 1
+                return None
+            entry = self._entries[best[1]]
+            self._entries.move_to_end(best[1])
+            self.stats.near_hits += 1
+            return entry.content, list(entry.citations)
+
+    def put(self, question: str, prompt_version: str, content: str, citations: list[Citation]) -> None:
+        normalized = normalize_question(question)
+        if not normalized or not content:
+            return
+        key = self._key(prompt_version, normalized)
+        shingles = _shingles(normalized)
+        band_keys = _band_keys(_minhash(shingles))
+        size = (
+            _ENTRY_OVERHEAD_BYTES
+            + len(key.encode("utf-8"))
+            + len(content.encode("utf-8"))
+            + sum(len(c.reference) + 64 for c in citations)
+            + 56 * len(shingles)
+        )
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                key=key,
+                content=content,
+                citations=list(citations),
+                shingles=shingles,
+                band_keys=band_keys,
+                expires_at=self._clock() + self.ttl_seconds,
+                size=size,
+            )
+            self._bytes += size
+            for band_key in band_keys:
+                self._buckets[band_key].add(key)
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def record_bypass(self) -> None:
+        self.stats.bypassed += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._bytes = 0
+            self.stats = CacheStats()
+
+
+answer_cache = AnswerCache(
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+    max_bytes=settings.answer_cache_max_bytes,
+    similarity=settings.answer_cache_similarity,
+)
@@ -0,0 +1,141 @@
+"""Montagem do contexto enviado ao LLM dentro de um orçamento de tokens.
+
+Conversas longas não cabem inteiras na janela do modelo e, mesmo quando
+cabem, cada turno fica mais lento e caro. O contexto de cada pergunta é:
+
+  1. o prompt de sistema compilado (app.services.prompt_compiler: para
+     pacientes, já com as diretrizes do psicólogo) — sempre;
+  2. trechos do acervo devocional recuperados para a pergunta (RAG, ver
+     app.services.retrieval), truncados ao que couber;
+  3. um resumo acumulado dos turnos antigos (mensagem de sistema);
+  4. os últimos `chat_context_recent_turns` turnos, literalmente;
+  5. a pergunta atual — sempre.
+
+O resumo é extrativo (TextRank de app.core.summarizer) e fica gravado ao lado
+do log da conversa com a posição até onde cobre. A cada pergunta, só os
+turnos que saíram da janela recente desde a última vez são incorporados
+(resumo anterior + turnos novos), sem reprocessar o histórico inteiro.
+
+Se o orçamento apertar, os turnos recentes mais antigos que não couberem
+passam para o resumo (em vez de sumirem do contexto) e, por último, o
+resumo é truncado.
+"""
+
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.summarizer import summarize_batch
+from app.core.tokens import TOKENS_PER_MESSAGE, count_message_tokens, count_tokens, truncate_to_tokens
+from app.repositories.chat_repo import chat_repo
+
+SUMMARY_SENTENCES = 6
+
+_ROLE_LABELS = {"user": "Usuário", "assistant": "Assistente"}
+
+
+@dataclass
+class ChatContext:
+    messages: list[dict]
+    prompt_tokens: int
+    history_messages: int  # mensagens anteriores da conversa incluídas literalmente
+    summarized_messages: int  # mensagens antigas cobertas pelo resumo
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.history_messages or self.summarized_messages)
+
+
+def _transcript(messages: list[dict]) -> str:
+    return "\n\n".join(f"{_ROLE_LABELS[m['role']]}: {m['content']}" for m in messages)
+
+
+def _fold(summary: str, messages: list[dict]) -> str:
+    """Incorpora turnos novos ao resumo anterior."""
+    text = "\n\n".join(t for t in (summary, _transcript(messages)) if t)
+    folded, _ = summarize_batch([text], summary_sentences=SUMMARY_SENTENCES, max_key_points=0)[0]
+    return truncate_to_tokens(folded, settings.chat_summary_max_tokens)
+
+
+def rolling_summary(user_id: str, conversation_id: str, upto: int) -> tuple[str, int]:
+    """Resumo que cobre ao menos as mensagens [0, upto), atualizado incrementalmente.
+
+    Retorna (resumo, até onde ele cobre). Um resumo gravado que já vai além de
+    `upto` (turnos que antes não couberam no orçamento) é reaproveitado como
+    está — quem chama não repete literalmente o que ele cobre.
+    """
+    cached = chat_repo.read_summary(user_id, conversation_id)
+    if cached is not None and cached["upto"] >= upto:
+        return cached["text"], cached["upto"]
+    if upto <= 0:
+        return "", 0
+
+    previous, start = (cached["text"], cached["upto"]) if cached is not None else ("", 0)
+    new_messages, _ = chat_repo.read_messages(user_id, conversation_id, upto - start, before=upto)
+    summary = _fold(previous, new_messages)
+    chat_repo.write_summary(user_id, conversation_id, upto, summary)
+    return summary, upto
+
+
+def build_context(
+    user_id: str,
+    conversation_id: str,
+    question: str,
+    system_prompt: str,
+    knowledge: str | None = None,
+) -> ChatContext:
+    """Mensagens para a API de chat respeitando `chat_context_token_budget`.
+
+    Deve ser chamado antes de gravar a pergunta atual na conversa.
+    """
+    head = [{"role": "system", "content": system_prompt}]
+    tail = [{"role": "user", "content": question}]
+
+    recent_limit = settings.chat_context_recent_turns * 2
+    recent, recent_start = chat_repo.read_messages(user_id, conversation_id, recent_limit)
+    remaining = settings.chat_context_token_budget - count_message_tokens(head + tail)
+
+    if knowledge and remaining > TOKENS_PER_MESSAGE:
+        prefix = "Trechos do acervo devocional relacionados à pergunta:\n"
+        text = truncate_to_tokens(knowledge, remaining - TOKENS_PER_MESSAGE - count_tokens(prefix))
+        if text:
+            head.append({"role": "system", "content": prefix + text})
+            remaining -= TOKENS_PER_MESSAGE + count_tokens(prefix + text)
+
+    # Turnos recentes, do mais novo para o mais antigo, enquanto couberem;
+    # os mais antigos que sobrarem entram no resumo, que tem espaço reservado
+    summary_prefix = "Resumo da conversa até aqui: "
+    costs = [TOKENS_PER_MESSAGE + count_tokens(m["content"]) for m in recent]
+    reserve = 0
+    if recent_start > 0 or sum(costs) > remaining:
+        reserve = min(
+            remaining // 3,
+            TOKENS_PER_MESSAGE + count_tokens(summary_prefix) + settings.chat_summary_max_tokens,
+        )
+    remaining -= reserve
+    overflow = len(recent)
+    for cost in reversed(costs):
+        if cost > remaining:
+            break
+        overflow -= 1
+        remaining -= cost
+    remaining += reserve
+
+    summary, covered = rolling_summary(user_id, conversation_id, recent_start + overflow)
+    first = max(overflow, covered - recent_start)  # o que o resumo cobre não se repete
+    remaining += sum(costs[overflow:first])
+    kept = [{"role": m["role"], "content": m["content"]} for m in recent[first:]]
+
+    summary_messages: list[dict] = []
+    if summary and remaining > TOKENS_PER_MESSAGE:
+        text = truncate_to_tokens(summary, remaining - TOKENS_PER_MESSAGE - count_tokens(summary_prefix))
+        if text:
+            summary_messages.append({"role": "system", "content": summary_prefix + text})
+
+    messages = head + summary_messages + kept + tail
+    return ChatContext(
+        messages=messages,
+        prompt_tokens=count_message_tokens(messages),
+        history_messages=len(kept),
+        summarized_messages=covered if summary_messages else 0,
+    )
+
@@ -0,0 +1,121 @@
+"""Exportação em fluxo das fichas de pacientes com o histórico de sessões.
+
+Montar um único JSON com todos os pacientes seguraria o arquivo inteiro em
+memória antes do primeiro byte. Aqui a exportação é um gerador sobre
+`iter_patients()` (que lê o patients.json um paciente por vez):
+
+- NDJSON: um `PatientConfig` completo (com `sessions`) por linha;
+- CSV: uma linha por sessão com as colunas da ficha repetidas (pacientes sem
+  sessão saem numa linha com as colunas de sessão vazias); listas separadas
+  por `;`.
+
+A saída é agrupada em blocos de ~`patient_export_chunk_bytes` e, com gzip,
+comprimida na hora (`Z_SYNC_FLUSH` a cada bloco, para os bytes não ficarem
+presos no compressor). O `StreamingResponse` envia cada bloco assim que sai
+do gerador, em transferência chunked.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from datetime import date
+
+from app.core.config import settings
+from app.domain.therapist.schemas import PatientConfig, TherapySession
+from app.repositories.patient_repo import iter_patients
+
+PATIENT_COLUMNS = [name for name in PatientConfig.model_fields if name != "sessions"]
+_SESSION_FIELDS = [name for name in TherapySession.model_fields if name != "patient_id"]
+SESSION_COLUMNS = [f"session_{name}" for name in _SESSION_FIELDS]
+LIST_SEPARATOR = ";"
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def matches(patient: dict, statuses: set[str] | None, created_from: date | None, created_to: date | None) -> bool:
+    if statuses and patient.get("status") not in statuses:
+        return False
+    created = patient.get("created_at", "")[:10]
+    if created_from and created < created_from.isoformat():
+        return False
+    if created_to and created > created_to.isoformat():
+        return False
+    return True
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(v) for v in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _ndjson_lines(patients: Iterable[dict]) -> Iterator[str]:
+    for patient in patients:
+        record = PatientConfig(**patient).model_dump(mode="json")
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(patients: Iterable[dict]) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+
+    def take() -> str:
+        line = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return line
+
+    writer.writerow(PATIENT_COLUMNS + SESSION_COLUMNS)
+    yield take()
+    for patient in patients:
+        record = PatientConfig(**patient).model_dump(mode="json")
+        base = [_cell(record[c]) for c in PATIENT_COLUMNS]
+        for session in record["sessions"] or [None]:
+            cells = [_cell(session[f]) for f in _SESSION_FIELDS] if session else [""] * len(_SESSION_FIELDS)
+            writer.writerow(base + cells)
+        yield take()
+
+
+def _chunked(lines: Iterable[str], chunk_bytes: int) -> Iterator[bytes]:
+    """Agrupa as linhas em blocos; o primeiro sai logo, sem esperar encher."""
+    parts: list[bytes] = []
+    size = 0
+    first = True
+    for line in lines:
+        data = line.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if first or size >= chunk_bytes:
+            yield b"".join(parts)
+            parts, size, first = [], 0, False
+    if parts:
+        yield b"".join(parts)
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_patients(
+    fmt: str,
+    statuses: set[str] | None = None,
+    created_from: date | None = None,
+    created_to: date | None = None,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    """Bytes da exportação, gerados sob demanda enquanto o cliente lê."""
+    patients = (p for p in iter_patients() if matches(p, statuses, created_from, created_to))
+    lines = _ndjson_lines(patients) if fmt == "ndjson" else _csv_lines(patients)
+    chunks = _chunked(lines, settings.patient_export_chunk_bytes)
+    return _gzipped(chunks) if gzip else chunks
@@ -0,0 +1,229 @@
+"""Importação em lote de pacientes a partir de CSV ou NDJSON.
+
+Cadastrar uma clínica inteira com `POST /v1/therapist/patients` relia e
+regravava o patients.json a cada paciente — custo quadrático no total. Aqui o
+corpo da requisição é lido em fluxo, linha a linha:
+
+- NDJSON: um objeto `PatientIntakeForm` por linha;
+- CSV: cabeçalho com os campos do formulário; listas (`focus_topics`,
+  `avoid_topics`) separadas por `;` e células vazias tratadas como ausentes.
+
+Cada linha passa pelo mesmo `PatientIntakeForm` do cadastro individual
+(`INTAKE_ADAPTER`). As válidas são gravadas em lotes de
+`patient_import_batch_size` — cada lote numa troca compare-and-swap do
+repositório, assim que fecha, e entregue ao `on_batch` de quem chamou
+(índices em memória, prompts). Nenhum paciente fica retido depois do seu
+lote: do arquivo enviado sobram só os e-mails, para recusar duplicados. As
+inválidas viram erros por linha no relatório, limitados a
+`patient_import_max_errors`.
+
+A gravação e o `on_batch` rodam numa thread (`asyncio.to_thread`), sem
+bloquear o laço de eventos enquanto o arquivo é regravado.
+"""
+
+import asyncio
+import codecs
+import csv
+import json
+import uuid
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timezone
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.config import settings
+from app.domain.therapist.schemas import ImportRowError, PatientImportReport, PatientIntakeForm
+from app.repositories.patient_repo import add_patients, iter_patients
+
+INTAKE_ADAPTER = TypeAdapter(PatientIntakeForm)
+LIST_FIELDS = ("focus_topics", "avoid_topics")
+LIST_SEPARATOR = ";"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _gen_id(prefix: str = "pat") -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+def new_patient_record(form: PatientIntakeForm) -> dict:
+    """Registro gravado no patients.json para um formulário de intake."""
+    patient_id = _gen_id()
+    now = _now_iso()
+    patient: dict = {
+        "id": patient_id,
+        "name": form.name,
+        "email": form.email,
+        "status": "active",
+        "created_at": now,
+        "user_id": form.user_id,
+        "chief_complaint": form.chief_complaint,
+        "anxiety_level": form.anxiety_level,
+        "depression_level": form.depression_level,
+        "sleep_quality": form.sleep_quality,
+        "suicidal_ideation": form.suicidal_ideation,
+        "current_medication": form.current_medication,
+        "therapy_goal": form.therapy_goal,
+        "therapeutic_approach": form.therapeutic_approach,
+        "focus_topics": form.focus_topics,
+        "avoid_topics": form.avoid_topics,
+        "response_depth": form.response_depth,
+        "shared_answer_cache": False,
+        "messages_used": 0,
+        "messages_limit": form.messages_limit,
+        "sessions": [],
+    }
+    if form.first_session_date:
+        patient["sessions"].append({
+            "id": _gen_id("sess"),
+            "patient_id": patient_id,
+            "date": form.first_session_date,
+            "summary": form.first_session_summary or "",
+            "mood": form.first_session_mood or "neutral",
+            "topics_covered": [],
+            "homework": None,
+            "next_session_date": None,
+            "created_at": now,
+        })
+    return patient
+
+
+# ── Leitura em fluxo ─────────────────────────────────────────────────────────
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Linhas de texto UTF-8 de um fluxo de bytes (sem acumular o corpo)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, list[str]]]:
+    """Registros CSV com o número da linha inicial; campos entre aspas podem ter quebras."""
+    record, start, line_no = "", 0, 0
+    async for line in lines:
+        line_no += 1
+        if not record:
+            start = line_no
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue  # aspas abertas: o campo continua na próxima linha
+        if record.strip():
+            yield start, next(csv.reader([record]))
+        record = ""
+    if record.strip():
+        yield start, next(csv.reader([record]))
+
+
+def _csv_row(header: list[str], values: list[str]) -> dict:
+    if len(values) != len(header):
+        raise ValueError(f"esperadas {len(header)} colunas, recebidas {len(values)}")
+    row = {}
+    for key, value in zip(header, values):
+        value = value.strip()
+        if not value:
+            continue
+        if key in LIST_FIELDS:
+            row[key] = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+        else:
+            row[key] = value
+    return row
+
+
+async def iter_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """(número da linha, dados ou o erro de leitura) para cada registro do arquivo."""
+    if fmt == "ndjson":
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("a linha deve ser um objeto JSON")
+                yield line_no, data
+            except ValueError as exc:
+                yield line_no, exc
+        return
+
+    header: list[str] | None = None
+    async for line_no, values in iter_csv_records(lines):
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        try:
+            yield line_no, _csv_row(header, values)
+        except ValueError as exc:
+            yield line_no, exc
+
+
+def _messages(exc: Exception) -> list[str]:
+    if isinstance(exc, ValidationError):
+        return [f"{'.'.join(str(p) for p in e['loc']) or 'linha'}: {e['msg']}" for e in exc.errors()]
+    return [str(exc)]
+
+
+# ── Importação ───────────────────────────────────────────────────────────────
+
+def _known_emails() -> set[str]:
+    return {p["email"].lower() for p in iter_patients() if p.get("email")}
+
+
+async def import_patients(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    on_batch: Callable[[list[dict]], None] | None = None,
+) -> PatientImportReport:
+    """Valida e grava os pacientes do arquivo, lote a lote; devolve o relatório.
+
+    `on_batch` recebe os pacientes de cada lote logo depois de gravados.
+    """
+    report = PatientImportReport(format=fmt, imported=0, failed=0, errors=[])
+    batch: list[dict] = []
+
+    def fail(line_no: int, messages: list[str]) -> None:
+        report.failed += 1
+        if len(report.errors) < settings.patient_import_max_errors:
+            report.errors.append(ImportRowError(line=line_no, errors=messages))
+
+    def write(records: list[dict]) -> None:
+        add_patients(records)
+        if on_batch is not None:
+            on_batch(records)
+
+    async def flush() -> None:
+        if not batch:
+            return
+        records = batch.copy()
+        batch.clear()
+        await asyncio.to_thread(write, records)
+        report.imported += len(records)
+
+    emails = await asyncio.to_thread(_known_emails)
+    async for line_no, row in iter_rows(iter_lines(chunks), fmt):
+        if isinstance(row, Exception):
+            fail(line_no, _messages(row))
+            continue
+        try:
+            form = INTAKE_ADAPTER.validate_python(row)
+        except ValidationError as exc:
+            fail(line_no, _messages(exc))
+            continue
+        if form.email.lower() in emails:
+            fail(line_no, [f"email: {form.email} já cadastrado"])
+            continue
+        emails.add(form.email.lower())
+        batch.append(new_patient_record(form))
+        if len(batch) >= settings.patient_import_batch_size:
+            await flush()
+    await flush()
+    return report
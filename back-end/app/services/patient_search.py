@@ -0,0 +1,148 @@
+"""Busca de pacientes por nome e e-mail com índice de trigramas.
+
+`GET /v1/therapist/patients` devolvia todos os pacientes e o dashboard
+filtrava no cliente. Aqui o servidor mantém, em memória:
+
+- o resumo de cada paciente (`PatientSummary`, sem as sessões);
+- para os campos `name` e `email`, os trigramas de cada palavra já sem
+  acentos e em minúsculas (`"  jo", " jo", "joa", "oao", "ao "`, no estilo
+  do pg_trgm) e o índice invertido trigrama -> pacientes.
+
+Uma busca só toca as listas dos trigramas da consulta. A pontuação de cada
+campo é a fração dos trigramas da consulta presentes no campo (tolera erros
+de digitação e nomes parciais); o desempate é o Jaccard entre os conjuntos,
+que favorece o campo mais parecido por inteiro. Resultados abaixo de
+`patient_search_min_similarity` são descartados.
+
+O índice é construído do arquivo no primeiro acesso e mantido pelas rotas de
+cadastro/edição e pelo uso de mensagens do chat.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from app.core.config import settings
+from app.repositories.patient_repo import load_patients
+
+SEARCH_FIELDS = ("name", "email")
+SUMMARY_FIELDS = ("id", "name", "email", "status", "messages_used", "messages_limit", "created_at")
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text: str) -> str:
+    """Minúsculas, sem acentos, com qualquer separador (`@`, `.`, `-`) virando espaço."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM_RE.sub(" ", stripped).strip()
+
+
+def trigrams(text: str) -> frozenset[str]:
+    grams = set()
+    for word in fold(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class PatientSearchIndex:
+    def __init__(self) -> None:
+        self._summaries: dict[str, dict] = {}
+        self._grams: dict[str, dict[str, frozenset[str]]] = {f: {} for f in SEARCH_FIELDS}
+        self._postings: dict[str, dict[str, set[str]]] = {f: {} for f in SEARCH_FIELDS}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # ── Construção ───────────────────────────────────────────────────────────
+
+    def rebuild(self, patients: list[dict] | None = None) -> None:
+        with self._lock:
+            self._summaries.clear()
+            for field in SEARCH_FIELDS:
+                self._grams[field].clear()
+                self._postings[field].clear()
+            for p in load_patients() if patients is None else patients:
+                self._upsert(p)
+            self._loaded = True
+
+    def reset(self) -> None:
+        """Descarta o índice; o próximo acesso reconstrói do arquivo."""
+        with self._lock:
+            self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.rebuild()
+
+    def _upsert(self, patient: dict) -> None:
+        patient_id = patient["id"]
+        self._summaries[patient_id] = {f: patient[f] for f in SUMMARY_FIELDS}
+        for field in SEARCH_FIELDS:
+            grams = trigrams(patient[field])
+            previous = self._grams[field].get(patient_id, frozenset())
+            if grams == previous:
+                continue
+            postings = self._postings[field]
+            for gram in previous - grams:
+                postings[gram].discard(patient_id)
+                if not postings[gram]:
+                    del postings[gram]
+            for gram in grams - previous:
+                postings.setdefault(gram, set()).add(patient_id)
+            self._grams[field][patient_id] = grams
+
+    # ── Ganchos das rotas de escrita ─────────────────────────────────────────
+
+    def patient_saved(self, patient: dict) -> None:
+        """Cadastro ou edição (nome, e-mail, status, limite)."""
+        with self._lock:
+            if self._loaded:
+                self._upsert(patient)
+
+    def messages_used_changed(self, patient_id: str, messages_used: int) -> None:
+        with self._lock:
+            summary = self._summaries.get(patient_id) if self._loaded else None
+            if summary is not None:
+                summary["messages_used"] = messages_used
+
+    # ── Consulta ─────────────────────────────────────────────────────────────
+
+    def _score(self, query: frozenset[str]) -> dict[str, tuple[float, float]]:
+        """(fração dos trigramas da consulta no campo, Jaccard) do melhor campo de cada paciente."""
+        scores: dict[str, tuple[float, float]] = {}
+        for field in SEARCH_FIELDS:
+            postings, grams = self._postings[field], self._grams[field]
+            shared = Counter()
+            for gram in query:
+                shared.update(postings.get(gram, ()))
+            for patient_id, count in shared.items():
+                score = (count / len(query), count / (len(query) + len(grams[patient_id]) - count))
+                if score > scores.get(patient_id, (0.0, 0.0)):
+                    scores[patient_id] = score
+        return scores
+
+    def search(self, query: str | None, offset: int = 0, limit: int | None = None) -> tuple[list[dict], int]:
+        """Resumos da página pedida e o total de resultados.
+
+        Sem consulta, lista todos na ordem do cadastro; com consulta, do mais ao
+        menos parecido.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            grams = trigrams(query or "")
+            if not grams:
+                matches = list(self._summaries)
+            else:
+                scores = self._score(grams)
+                threshold = settings.patient_search_min_similarity
+                matches = sorted(
+                    (pid for pid, (coverage, _) in scores.items() if coverage >= threshold),
+                    key=lambda pid: (-scores[pid][0], -scores[pid][1], fold(self._summaries[pid]["name"])),
+                )
+            end = None if limit is None else offset + limit
+            return [dict(self._summaries[pid]) for pid in matches[offset:end]], len(matches)
+
+
+patient_search = PatientSearchIndex()
@@ -0,0 +1,139 @@
+"""Prompt de sistema compilado por paciente, com cache em memória.
+
+A ficha do paciente (`therapy_goal`, `therapeutic_approach`, `focus_topics`,
+`avoid_topics`, `response_depth`) orienta a IA. Em vez de ler o
+patients.json e remontar as diretrizes a cada mensagem, o prompt de cada
+usuário é compilado uma vez e reaproveitado até o psicólogo alterar a ficha
+(`invalidate`, chamado pelas rotas PATCH de /v1/therapist/patients; a
+importação em lote usa `invalidate_users`, só para os usuários vinculados às
+fichas novas). O limite de mensagens não entra no prompt: o chat lê o limite
+atual do `QuotaWatcher`, e a rota de limite não invalida nada.
+
+O texto compilado é sempre o `SYSTEM_PROMPT` seguido das diretrizes, numa
+única mensagem de sistema e com a mesma string a cada requisição: o prefixo
+comum a todos os usuários e o prompt inteiro de cada paciente ficam
+byte a byte idênticos, o que permite o cache de prefixo do provedor. Os
+temas a evitar são compilados junto (app.core.guardrail) e invalidados com
+o prompt.
+"""
+
+import hashlib
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from app.core.guardrail import TopicGuard
+from app.repositories.patient_repo import find_patient_by_user
+
+SYSTEM_PROMPT = """Você é um especialista em Bíblia Sagrada com profundo conhecimento das escrituras cristãs.
+Responda sempre em Português do Brasil de forma pastoral, respeitosa e edificante.
+Ao citar versículos, indique o livro, capítulo e versículo (ex.: "João 3:16").
+Baseie suas respostas exclusivamente nas escrituras bíblicas.
+Seja conciso, claro e espiritualmente enriquecedor."""
+
+_DEPTH_LABELS = {
+    "brief": "respostas breves",
+    "moderate": "respostas de tamanho moderado",
+    "detailed": "respostas detalhadas",
+}
+
+
+def prompt_version(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+# Entra na chave do cache de respostas: alterar o prompt invalida as respostas antigas
+SYSTEM_PROMPT_VERSION = prompt_version(SYSTEM_PROMPT)
+
+
+def patient_guidelines(patient: dict | None) -> str | None:
+    """Diretrizes para a IA definidas pelo psicólogo na ficha do paciente."""
+    if not patient:
+        return None
+    lines: list[str] = []
+    if patient.get("therapy_goal"):
+        lines.append(f"Objetivo terapêutico: {patient['therapy_goal']}.")
+    if patient.get("therapeutic_approach"):
+        lines.append(f"Abordagem terapêutica: {patient['therapeutic_approach']}.")
+    if patient.get("focus_topics"):
+        lines.append(f"Temas a enfatizar: {', '.join(patient['focus_topics'])}.")
+    if patient.get("avoid_topics"):
+        lines.append(f"Temas a evitar: {', '.join(patient['avoid_topics'])}.")
+    depth = _DEPTH_LABELS.get(patient.get("response_depth", "moderate"))
+    if depth:
+        lines.append(f"Prefira {depth}.")
+    return "Diretrizes do psicólogo para este usuário:\n" + "\n".join(lines)
+
+
+def compile_system_prompt(base_prompt: str, patient: dict | None) -> str:
+    """Prompt base + diretrizes do paciente, numa única mensagem de sistema."""
+    guidelines = patient_guidelines(patient)
+    return f"{base_prompt}\n\n{guidelines}" if guidelines else base_prompt
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    patient: dict | None  # ficha no momento da compilação — somente leitura
+    system_prompt: str
+    version: str  # hash do prompt; separa o cache de respostas por diretrizes
+    guard: TopicGuard | None = None  # `avoid_topics` compilados para varrer a resposta
+
+
+class PromptCompiler:
+    def __init__(self, base_prompt: str = SYSTEM_PROMPT) -> None:
+        self.base_prompt = base_prompt
+        self._base = CompiledPrompt(None, base_prompt, prompt_version(base_prompt))
+        self._by_user: dict[str, CompiledPrompt] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.compilations = 0
+
+    def for_user(self, user_id: str) -> CompiledPrompt:
+        """Prompt do usuário (com as diretrizes, se ele for paciente)."""
+        cached = self._by_user.get(user_id)
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        patient = find_patient_by_user(user_id)
+        if patient is None:
+            compiled = self._base
+        else:
+            prompt = compile_system_prompt(self.base_prompt, patient)
+            guard = TopicGuard(patient.get("avoid_topics") or [])
+            compiled = CompiledPrompt(patient, prompt, prompt_version(prompt), guard or None)
+        with self._lock:
+            self.compilations += 1
+            # Uma invalidação durante a leitura torna esta compilação obsoleta
+            if generation == self._generation:
+                self._by_user[user_id] = compiled
+        return compiled
+
+    def invalidate(self, patient_id: str | None = None) -> None:
+        """Descarta o prompt compilado do paciente; sem `patient_id`, todos.
+
+        Usuários sem paciente também são descartados, pois a alteração pode
+        ter vinculado a ficha a um deles (`user_id`).
+        """
+        with self._lock:
+            self._generation += 1
+            if patient_id is None:
+                self._by_user.clear()
+                return
+            stale = [
+                user_id
+                for user_id, compiled in self._by_user.items()
+                if compiled.patient is None or compiled.patient["id"] == patient_id
+            ]
+            for user_id in stale:
+                del self._by_user[user_id]
+
+    def invalidate_users(self, user_ids: Iterable[str]) -> None:
+        """Descarta só os prompts desses usuários (ex.: vinculados a fichas recém-criadas)."""
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._by_user.pop(user_id, None)
+
+
+prompt_compiler = PromptCompiler()
@@ -0,0 +1,186 @@
+"""Vigia das cotas de mensagens dos pacientes (uso / limite).
+
+Os pacientes ficam num heap ordenado pela fração da cota já usada
+(`messages_used / messages_limit`), atualizado a cada mensagem do chat e a
+cada mudança de limite — sem varrer o patients.json.
+
+- `top(k)` devolve os k pacientes mais perto do limite em O((k + s) log n),
+  com s as entradas obsoletas encontradas no caminho: percorre o heap pela
+  fronteira de filhos, sem desmontá-lo.
+- Atualizações empurram uma entrada nova e invalidam a anterior (remoção
+  preguiçosa); o heap é compactado quando as entradas obsoletas passam de
+  `_MAX_STALE_FRACTION` das válidas, o que mantém s limitado e custa O(1)
+  amortizado por atualização.
+- Quando um paciente cruza um dos `quota_alert_thresholds` (padrão 80%, 95%
+  e 100%), um `SystemAlert` passa a aparecer em /v1/admin/alerts; se o uso
+  volta para baixo do limiar (limite aumentado), o alerta sai. Um `rebuild`
+  mantém o `triggered_at` dos alertas que continuam ativos no mesmo nível.
+"""
+
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.domain.admin.schemas import SystemAlert
+from app.repositories.patient_repo import load_patients
+
+# Nível do alerta por limiar cruzado (do menor para o maior)
+_ALERT_LEVELS = ("warning", "error", "critical")
+
+# Entradas obsoletas toleradas no heap, como fração das válidas (mais uma folga fixa)
+_MAX_STALE_FRACTION = 0.25
+_STALE_SLACK = 16
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass(frozen=True, slots=True)
+class QuotaEntry:
+    patient_id: str
+    name: str
+    messages_used: int
+    messages_limit: int
+
+    @property
+    def ratio(self) -> float:
+        return self.messages_used / self.messages_limit if self.messages_limit > 0 else 0.0
+
+
+class QuotaWatcher:
+    def __init__(self, thresholds: list[float] | None = None) -> None:
+        self._thresholds = sorted(thresholds) if thresholds is not None else None
+        self._heap: list[tuple[float, int, str]] = []  # (-fração, seq, paciente)
+        self._live: dict[str, tuple[int, QuotaEntry]] = {}
+        self._alerts: dict[str, SystemAlert] = {}
+        self._seq = itertools.count()
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @property
+    def thresholds(self) -> list[float]:
+        return self._thresholds if self._thresholds is not None else sorted(settings.quota_alert_thresholds)
+
+    # ── Construção ───────────────────────────────────────────────────────────
+
+    def rebuild(self, patients: list[dict] | None = None) -> None:
+        with self._lock:
+            previous = {patient_id: entry.ratio for patient_id, (_, entry) in self._live.items()}
+            self._heap.clear()
+            self._live.clear()
+            self._loaded = True
+            for p in load_patients() if patients is None else patients:
+                entry = QuotaEntry(p["id"], p["name"], p["messages_used"], p["messages_limit"])
+                self._record(entry, previous.get(entry.patient_id, 0.0))
+            for patient_id in self._alerts.keys() - self._live.keys():
+                del self._alerts[patient_id]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.rebuild()
+
+    # ── Atualização ──────────────────────────────────────────────────────────
+
+    def update(self, patient_id: str, name: str, messages_used: int, messages_limit: int) -> None:
+        """Registra o uso atual do paciente (mensagem enviada, limite alterado, cadastro)."""
+        with self._lock:
+            if not self._loaded:
+                return  # o rebuild do primeiro acesso lerá o valor do arquivo
+            entry = QuotaEntry(patient_id, name, messages_used, messages_limit)
+            previous = self._live.get(patient_id)
+            self._record(entry, previous[1].ratio if previous else 0.0)
+
+    def update_usage(self, patient_id: str, messages_used: int) -> None:
+        with self._lock:
+            current = self._live.get(patient_id) if self._loaded else None
+            if current is not None:
+                entry = current[1]
+                self.update(patient_id, entry.name, messages_used, entry.messages_limit)
+
+    def _record(self, entry: QuotaEntry, previous_ratio: float) -> None:
+        seq = next(self._seq)
+        self._live[entry.patient_id] = (seq, entry)
+        heapq.heappush(self._heap, (-entry.ratio, seq, entry.patient_id))
+        stale = len(self._heap) - len(self._live)
+        if stale > _MAX_STALE_FRACTION * len(self._live) + _STALE_SLACK:
+            self._compact()
+        self._update_alert(entry, previous_ratio)
+
+    def _compact(self) -> None:
+        self._heap = [(-entry.ratio, seq, pid) for pid, (seq, entry) in self._live.items()]
+        heapq.heapify(self._heap)
+
+    def _level(self, ratio: float) -> int:
+        """Índice do maior limiar atingido, ou -1."""
+        level = -1
+        for i, threshold in enumerate(self.thresholds):
+            if ratio >= threshold:
+                level = i
+        return level
+
+    def _update_alert(self, entry: QuotaEntry, previous_ratio: float) -> None:
+        level, previous = self._level(entry.ratio), self._level(previous_ratio)
+        if level < 0:
+            self._alerts.pop(entry.patient_id, None)
+            return
+        current = self._alerts.get(entry.patient_id)
+        threshold = self.thresholds[level]
+        triggered_at = _now_iso() if level > previous or current is None else current.triggered_at
+        self._alerts[entry.patient_id] = SystemAlert(
+            id=f"alert-quota-{entry.patient_id}",
+            title=f"{entry.name}: {entry.messages_used}/{entry.messages_limit} messages",
+            subtitle="Message quota reached" if threshold >= 1 else f"Message quota above {threshold:.0%}",
+            level=_ALERT_LEVELS[min(level, len(_ALERT_LEVELS) - 1)],
+            triggered_at=triggered_at,
+        )
+
+    # ── Consulta ─────────────────────────────────────────────────────────────
+
+    def top(self, k: int, min_ratio: float = 0.0) -> list[QuotaEntry]:
+        """Os k pacientes mais perto do limite (fração >= `min_ratio`), em ordem.
+
+        Visita k entradas válidas mais as obsoletas acima delas — no máximo
+        `_MAX_STALE_FRACTION` das válidas (+ folga), pela compactação.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            heap, result = self._heap, []
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier and len(result) < k:
+                (neg_ratio, seq, patient_id), i = heapq.heappop(frontier)
+                if -neg_ratio < min_ratio:
+                    break
+                if self._live[patient_id][0] == seq:
+                    result.append(self._live[patient_id][1])
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+            return result
+
+    def limit(self, patient_id: str) -> int | None:
+        """Limite de mensagens atual do paciente (None se desconhecido)."""
+        with self._lock:
+            self._ensure_loaded()
+            current = self._live.get(patient_id)
+            return current[1].messages_limit if current is not None else None
+
+    def near_limit(self) -> list[QuotaEntry]:
+        """Pacientes acima do menor limiar, limitados a `quota_near_limit_max`."""
+        thresholds = self.thresholds
+        return self.top(settings.quota_near_limit_max, min_ratio=thresholds[0] if thresholds else 1.0)
+
+    def alerts(self) -> list[SystemAlert]:
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._alerts.values(), key=lambda a: a.triggered_at, reverse=True)
+
+
+quota_watcher = QuotaWatcher()
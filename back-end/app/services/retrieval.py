@@ -0,0 +1,211 @@
+"""Recuperação local (BM25) sobre o acervo devocional para fundamentar o chat.
+
+O prompt de sistema pede respostas baseadas nas escrituras; este estágio busca
+no data/posts.json as reflexões mais relevantes para a pergunta e injeta os
+trechos no prompt, devolvendo os posts usados como citações.
+
+- Índice invertido BM25 (k1=1.2, b=0.75) sobre `reference`, `title`,
+  `verse_content` e `body_text`, com pesos por campo (a referência e o
+  versículo contam mais do que o corpo do texto).
+- Construído uma vez por processo; quando o posts.json muda (mtime/tamanho),
+  só os posts novos, alterados ou removidos são reindexados.
+- Com `rag_memory` ligado nas configurações do usuário, os posts favoritos
+  dele ganham peso extra ("memória" pessoal da IA).
+"""
+
+import math
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.storage import DATA_DIR, read_json
+from app.core.tokens import count_tokens, truncate_to_tokens
+from app.domain.chat.schemas import Citation
+from app.services.answer_cache import normalize_question
+
+POSTS_FILE = "posts.json"
+
+FIELD_WEIGHTS = {"reference": 3, "title": 2, "verse_content": 2, "body_text": 1}
+FAVORITE_BOOST = 1.5
+MIN_RELATIVE_SCORE = 0.3  # descarta resultados com menos de 30% da nota do melhor
+
+_K1 = 1.2
+_B = 0.75
+_STOPWORDS = frozenset(
+    "de do da dos das em no na nos nas um os as ao se eu me te ou ja lhe "
+    "que nao uma com para por mais como mas foi ele ela seu sua seus suas "
+    "aos isso esse essa este esta pelo pela sao ser tem quando muito tambem eles elas "
+    "voce voces nosso nossa entre sobre ate sem mesmo onde quem depois ainda assim qual "
+    "diz fala biblia".split()
+)
+
+
+def _terms(text: str) -> list[str]:
+    return [t for t in normalize_question(text).split() if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _doc_terms(post: dict) -> Counter:
+    terms: Counter = Counter()
+    for name, weight in FIELD_WEIGHTS.items():
+        value = post.get(name)
+        if isinstance(value, str) and value:
+            for term in _terms(value):
+                terms[term] += weight
+    return terms
+
+
+def _fingerprint(post: dict) -> int:
+    return hash(tuple(post.get(name) or "" for name in FIELD_WEIGHTS))
+
+
+@dataclass(slots=True)
+class _Doc:
+    terms: Counter
+    length: int
+    fingerprint: int
+
+
+class BM25Index:
+    def __init__(self) -> None:
+        self._docs: dict[str, _Doc] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self._docs
+
+    def upsert(self, post_id: str, post: dict) -> bool:
+        """Indexa (ou reindexa) o post. Retorna False se nada mudou."""
+        fingerprint = _fingerprint(post)
+        current = self._docs.get(post_id)
+        if current is not None and current.fingerprint == fingerprint:
+            return False
+        if current is not None:
+            self.remove(post_id)
+        terms = _doc_terms(post)
+        doc = _Doc(terms=terms, length=sum(terms.values()), fingerprint=fingerprint)
+        self._docs[post_id] = doc
+        self._total_length += doc.length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[post_id] = tf
+        return True
+
+    def remove(self, post_id: str) -> None:
+        doc = self._docs.pop(post_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings[term]
+            del postings[post_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int, boost: dict[str, float] | None = None) -> list[tuple[str, float]]:
+        n = len(self._docs)
+        if not n:
+            return []
+        avgdl = self._total_length / n or 1.0
+        scores: dict[str, float] = {}
+        for term in set(_terms(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for post_id, tf in postings.items():
+                norm = tf + _K1 * (1 - _B + _B * self._docs[post_id].length / avgdl)
+                scores[post_id] = scores.get(post_id, 0.0) + idf * tf * (_K1 + 1) / norm
+        if boost:
+            for post_id, factor in boost.items():
+                if post_id in scores:
+                    scores[post_id] *= factor
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        if not ranked:
+            return []
+        floor = ranked[0][1] * MIN_RELATIVE_SCORE
+        return [(post_id, score) for post_id, score in ranked if score >= floor]
+
+
+@dataclass
+class Retrieval:
+    context: str | None = None  # trechos para o prompt (mensagem de sistema)
+    citations: list[Citation] = field(default_factory=list)
+    personalized: bool = False  # algum favorito do usuário entrou no resultado
+
+
+def _passage(post: dict) -> str:
+    """Referência primeiro: se o trecho for truncado, a fonte continua no prompt."""
+    header = " — ".join(p for p in (post.get("reference"), post.get("title")) if p)
+    body = post.get("ai_summary") or post.get("body_text") or ""
+    return f"- {header}: {post.get('verse_content', '')} {body}".strip()
+
+
+class ArchiveRetriever:
+    def __init__(self, posts_file: str = POSTS_FILE) -> None:
+        self.posts_file = posts_file
+        self.index = BM25Index()
+        self._posts: dict[str, dict] = {}
+        self._signature: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Sincroniza o índice com o arquivo de posts, se ele mudou desde a última vez."""
+        path = DATA_DIR / self.posts_file
+        try:
+            stat = path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = (0, 0)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            data = read_json(self.posts_file) if signature != (0, 0) else []
+            posts = {p["id"]: p for p in data if isinstance(p, dict) and p.get("id")} if isinstance(data, list) else {}
+            for post_id in set(self._posts) - set(posts):
+                self.index.remove(post_id)
+            for post_id, post in posts.items():
+                self.index.upsert(post_id, post)
+            self._posts = posts
+            self._signature = signature
+
+    def retrieve(self, question: str, favorite_ids: set[str] | None = None) -> Retrieval:
+        """Top-k posts para a pergunta, formatados dentro de `rag_context_tokens`."""
+        self.refresh()
+        boost = {post_id: FAVORITE_BOOST for post_id in favorite_ids or ()}
+        results = self.index.search(question, settings.rag_top_k, boost)
+        if not results:
+            return Retrieval()
+
+        budget = settings.rag_context_tokens
+        per_passage = max(1, budget // len(results))
+        passages: list[str] = []
+        citations: list[Citation] = []
+        for post_id, _ in results:
+            post = self._posts[post_id]
+            passage = truncate_to_tokens(_passage(post), per_passage)
+            cost = count_tokens(passage)
+            if not passage or cost > budget:
+                break
+            budget -= cost
+            passages.append(passage)
+            citations.append(Citation(
+                reference=post.get("reference") or post.get("title", post_id),
+                post_id=post_id,
+                title=post.get("title"),
+            ))
+        if not passages:
+            return Retrieval()
+        return Retrieval(
+            context="\n".join(passages),
+            citations=citations,
+            personalized=any(c.post_id in boost for c in citations),
+        )
+
+
+archive_retriever = ArchiveRetriever()
@@ -0,0 +1,181 @@
+"""Tendências de humor e temas das sessões terapêuticas, por paciente.
+
+Calcular a trajetória de humor e a frequência de temas a cada requisição
+exigiria percorrer todas as sessões de todos os pacientes do patients.json.
+Aqui cada paciente tem séries colunares (arrays numpy que crescem por
+duplicação) mantidas pelas rotas de sessão:
+
+- `dates` / `scores`: data e humor (1 = very_low … 5 = great) de cada sessão;
+- `topic_counts`: contagem por tema, indexada pelo vocabulário do paciente.
+
+A leitura é toda vetorizada: ordenação por data, média móvel por soma
+acumulada e top temas por `argpartition` — poucos microssegundos por
+centena de sessões. O estado é construído do arquivo no primeiro acesso.
+"""
+
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.repositories.patient_repo import load_patients
+
+MOOD_SCORES = {"very_low": 1, "low": 2, "neutral": 3, "good": 4, "great": 5}
+_MOOD_NAMES = {score: mood for mood, score in MOOD_SCORES.items()}
+_INITIAL_CAPACITY = 16
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.casefold().split())
+
+
+@dataclass(slots=True)
+class MoodSeries:
+    session_ids: list[str]
+    dates: list[str]
+    moods: list[str]
+    scores: np.ndarray
+    rolling: np.ndarray
+    average: float | None
+
+
+@dataclass(slots=True)
+class _PatientSeries:
+    dates: np.ndarray = field(default_factory=lambda: np.empty(_INITIAL_CAPACITY, dtype="U32"))
+    scores: np.ndarray = field(default_factory=lambda: np.empty(_INITIAL_CAPACITY, dtype=np.int8))
+    size: int = 0
+    rows: dict[str, int] = field(default_factory=dict)  # sessão -> linha
+    session_ids: list[str] = field(default_factory=list)
+    session_topics: list[np.ndarray] = field(default_factory=list)  # ids de tema por linha
+    vocabulary: dict[str, int] = field(default_factory=dict)  # tema normalizado -> coluna
+    labels: list[str] = field(default_factory=list)  # rótulo exibido por coluna
+    topic_counts: np.ndarray = field(default_factory=lambda: np.zeros(_INITIAL_CAPACITY, dtype=np.int32))
+
+    def _grow(self) -> None:
+        capacity = len(self.scores) * 2
+        self.dates = np.resize(self.dates, capacity)
+        self.scores = np.resize(self.scores, capacity)
+
+    def _topic_ids(self, topics: list[str]) -> np.ndarray:
+        ids = set()
+        for topic in topics:
+            key = normalize_topic(topic)
+            if not key:
+                continue
+            if key not in self.vocabulary:
+                self.vocabulary[key] = len(self.labels)
+                self.labels.append(topic.strip())
+                if len(self.labels) > len(self.topic_counts):
+                    self.topic_counts = np.concatenate([self.topic_counts, np.zeros_like(self.topic_counts)])
+            ids.add(self.vocabulary[key])
+        return np.fromiter(sorted(ids), dtype=np.int64, count=len(ids))
+
+    def put(self, session: dict) -> None:
+        """Insere a sessão ou substitui a linha existente (edição)."""
+        row = self.rows.get(session["id"])
+        topic_ids = self._topic_ids(session.get("topics_covered", []))
+        if row is None:
+            if self.size == len(self.scores):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.rows[session["id"]] = row
+            self.session_ids.append(session["id"])
+            self.session_topics.append(topic_ids)
+        else:
+            self.topic_counts[self.session_topics[row]] -= 1
+            self.session_topics[row] = topic_ids
+        self.dates[row] = session["date"]
+        self.scores[row] = MOOD_SCORES[session["mood"]]
+        self.topic_counts[topic_ids] += 1
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Média móvel com janelas parciais no início da série."""
+    sums = np.cumsum(values, dtype=np.float64)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+
+class SessionAnalytics:
+    def __init__(self) -> None:
+        self._series: dict[str, _PatientSeries] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # ── Construção ───────────────────────────────────────────────────────────
+
+    def rebuild(self, patients: list[dict] | None = None) -> None:
+        with self._lock:
+            self._series.clear()
+            for p in load_patients() if patients is None else patients:
+                self._add_patient(p)
+            self._loaded = True
+
+    def reset(self) -> None:
+        """Descarta o estado; o próximo acesso reconstrói do arquivo."""
+        with self._lock:
+            self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.rebuild()
+
+    def _add_patient(self, patient: dict) -> None:
+        series = self._series[patient["id"]] = _PatientSeries()
+        for session in patient.get("sessions", []):
+            # Linhas gravadas fora da API podem ter humor fora do enum: ficam de fora das séries
+            if session.get("mood") in MOOD_SCORES:
+                series.put(session)
+
+    # ── Ganchos das rotas de escrita ─────────────────────────────────────────
+
+    def patient_created(self, patient: dict) -> None:
+        """Cadastro (com a sessão de triagem, se houver)."""
+        with self._lock:
+            if self._loaded:
+                self._add_patient(patient)
+
+    def session_saved(self, patient_id: str, session: dict) -> None:
+        """Sessão registrada ou editada."""
+        with self._lock:
+            if self._loaded:
+                self._series.setdefault(patient_id, _PatientSeries()).put(session)
+
+    # ── Leitura ──────────────────────────────────────────────────────────────
+
+    def mood(self, patient_id: str, window: int) -> MoodSeries | None:
+        """Humor por sessão em ordem de data, com média móvel de `window` sessões."""
+        with self._lock:
+            self._ensure_loaded()
+            series = self._series.get(patient_id)
+            if series is None:
+                return None
+            order = np.argsort(series.dates[:series.size], kind="stable")
+            scores = series.scores[:series.size][order]
+            return MoodSeries(
+                session_ids=[series.session_ids[i] for i in order],
+                dates=series.dates[:series.size][order].tolist(),
+                moods=[_MOOD_NAMES[s] for s in scores.tolist()],
+                scores=scores,
+                rolling=rolling_mean(scores, window),
+                average=float(scores.mean()) if series.size else None,
+            )
+
+    def top_topics(self, patient_id: str, k: int) -> tuple[list[tuple[str, int]], int] | None:
+        """Os k temas mais frequentes e o total de sessões do paciente."""
+        with self._lock:
+            self._ensure_loaded()
+            series = self._series.get(patient_id)
+            if series is None:
+                return None
+            counts = series.topic_counts[:len(series.labels)]
+            k = min(k, int(np.count_nonzero(counts)))
+            if k == 0:
+                return [], series.size
+            top = np.argpartition(-counts, k - 1)[:k]
+            top = top[np.lexsort((top, -counts[top]))]
+            return [(series.labels[i], int(counts[i])) for i in top], series.size
+
+
+session_analytics = SessionAnalytics()
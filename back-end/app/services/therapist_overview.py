@@ -0,0 +1,220 @@
+"""Agregados do dashboard do psicólogo mantidos incrementalmente.
+
+`GET /v1/therapist/overview` servia contagens por status, pacientes perto do
+limite e atividade recente varrendo e ordenando todo o patients.json a cada
+atualização do dashboard. Aqui esses números são mantidos pelas próprias
+rotas de escrita (cadastro, status, limite, sessões, uso de mensagens do chat)
+e a visão geral sai em O(1):
+
+- contagem por status e total;
+- pacientes perto do limite, pelo heap do `QuotaWatcher` (que também emite
+  os alertas de cota em /v1/admin/alerts);
+- anel com as `RECENT_ACTIVITY_SIZE` atividades mais recentes (cadastros e
+  sessões registradas).
+
+O estado é construído do arquivo no primeiro acesso. `check()` recalcula tudo
+do zero e compara com o estado incremental (corrigindo-o se divergir) —
+exposto em `GET /v1/therapist/overview/check`. Para conferir a lógica
+incremental contra o arquivo fora do servidor:
+    python -m app.services.therapist_overview
+"""
+
+import argparse
+import heapq
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass
+
+from app.domain.therapist.schemas import DashboardOverview, NearLimitPatient, RecentActivity
+from app.repositories.patient_repo import load_patients
+from app.services.quota_watcher import QuotaWatcher, quota_watcher
+
+RECENT_ACTIVITY_SIZE = 5
+
+
+@dataclass(slots=True)
+class _PatientState:
+    name: str
+    status: str
+
+
+def _activities(patients: list[dict]) -> list[RecentActivity]:
+    """Atividades registráveis a partir do arquivo, da mais recente para a mais antiga."""
+    events = []
+    for p in patients:
+        events.append((p["created_at"], p["name"], "Paciente cadastrado"))
+        for s in p.get("sessions", []):
+            events.append((s.get("created_at", ""), p["name"], "Sessão registrada"))
+    newest = heapq.nlargest(RECENT_ACTIVITY_SIZE, events)
+    return [RecentActivity(patient_name=name, action=action, timestamp=ts) for ts, name, action in newest]
+
+
+class OverviewAggregates:
+    def __init__(self, quota: QuotaWatcher | None = None) -> None:
+        self._patients: dict[str, _PatientState] = {}
+        self._counts: Counter = Counter()
+        self._quota = quota if quota is not None else QuotaWatcher()
+        self._recent: deque[RecentActivity] = deque(maxlen=RECENT_ACTIVITY_SIZE)
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # ── Construção ───────────────────────────────────────────────────────────
+
+    def rebuild(self, patients: list[dict] | None = None) -> None:
+        with self._lock:
+            self._patients.clear()
+            self._counts.clear()
+            self._recent.clear()
+            patients = load_patients() if patients is None else patients
+            self._quota.rebuild(patients)  # mantém o início dos alertas ainda ativos
+            for p in patients:
+                self._set_state(p["id"], p)
+            self._recent.extend(_activities(patients))
+            self._loaded = True
+
+    def reset(self) -> None:
+        """Descarta o estado; o próximo acesso reconstrói do arquivo."""
+        with self._lock:
+            self._loaded = False
+            self._quota.reset()
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.rebuild()
+
+    def _apply(self, patient_id: str, patient: dict) -> None:
+        self._set_state(patient_id, patient)
+        self._track_quota(patient)
+
+    def _set_state(self, patient_id: str, patient: dict) -> None:
+        previous = self._patients.get(patient_id)
+        if previous is not None:
+            self._counts[previous.status] -= 1
+        state = _PatientState(name=patient["name"], status=patient["status"])
+        self._patients[patient_id] = state
+        self._counts[state.status] += 1
+
+    def _track_quota(self, patient: dict) -> None:
+        self._quota.update(patient["id"], patient["name"], patient["messages_used"], patient["messages_limit"])
+
+    # ── Ganchos das rotas de escrita ─────────────────────────────────────────
+
+    def patient_created(self, patient: dict) -> None:
+        with self._lock:
+            if not self._loaded:
+                self._track_quota(patient)  # o vigia de cotas pode já estar carregado
+                return  # o rebuild do primeiro acesso já verá o paciente no arquivo
+            self._apply(patient["id"], patient)
+            self._recent.appendleft(RecentActivity(
+                patient_name=patient["name"], action="Paciente cadastrado", timestamp=patient["created_at"],
+            ))
+
+    def patient_updated(self, patient: dict) -> None:
+        """Status, limite, nome ou uso mudaram."""
+        with self._lock:
+            if self._loaded:
+                self._apply(patient["id"], patient)
+            else:
+                self._track_quota(patient)
+
+    def messages_used_changed(self, patient_id: str, messages_used: int) -> None:
+        self._quota.update_usage(patient_id, messages_used)
+
+    def session_created(self, patient: dict, session: dict) -> None:
+        with self._lock:
+            if self._loaded:
+                self._recent.appendleft(RecentActivity(
+                    patient_name=patient["name"], action="Sessão registrada", timestamp=session["created_at"],
+                ))
+
+    # ── Leitura ──────────────────────────────────────────────────────────────
+
+    def overview(self) -> DashboardOverview:
+        with self._lock:
+            self._ensure_loaded()
+            near_limit = [
+                NearLimitPatient(
+                    id=entry.patient_id,
+                    name=entry.name,
+                    messages_used=entry.messages_used,
+                    messages_limit=entry.messages_limit,
+                )
+                for entry in self._quota.near_limit()
+            ]
+            return DashboardOverview(
+                total_patients=len(self._patients),
+                active_patients=self._counts["active"],
+                paused_patients=self._counts["paused"],
+                discharged_patients=self._counts["discharged"],
+                near_limit_patients=near_limit,
+                recent_activity=list(self._recent),
+            )
+
+    def check(self, patients: list[dict] | None = None, repair: bool = True) -> list[str]:
+        """Compara o estado incremental com um recálculo do zero.
+
+        Retorna as divergências encontradas (vazio = consistente) e, com
+        `repair`, substitui o estado pelo recalculado.
+        """
+        with self._lock:
+            patients = load_patients() if patients is None else patients
+            self._ensure_loaded()
+            expected = OverviewAggregates()
+            expected.rebuild(patients)
+            return self._diff(expected, patients, repair)
+
+    def _diff(self, expected: "OverviewAggregates", patients: list[dict], repair: bool) -> list[str]:
+        current, fresh = self.overview(), expected.overview()
+        differences = []
+        for field in ("total_patients", "active_patients", "paused_patients", "discharged_patients"):
+            if getattr(current, field) != getattr(fresh, field):
+                differences.append(f"{field}: {getattr(current, field)} != {getattr(fresh, field)}")
+
+        def by_id(items: list[NearLimitPatient]) -> list[dict]:
+            return sorted((p.model_dump() for p in items), key=lambda p: p["id"])
+
+        if by_id(current.near_limit_patients) != by_id(fresh.near_limit_patients):
+            differences.append("near_limit_patients")
+        if current.recent_activity != fresh.recent_activity:
+            differences.append("recent_activity")
+        if differences and repair:
+            self.rebuild(patients)
+        return differences
+
+
+therapist_overview = OverviewAggregates(quota_watcher)
+
+
+def replay(patients: list[dict]) -> OverviewAggregates:
+    """Reconstrói os agregados só pelos ganchos de escrita, em ordem cronológica."""
+    aggregates = OverviewAggregates()
+    aggregates.rebuild([])
+    events = []
+    for p in patients:
+        events.append((p["created_at"], 0, p, None))
+        for s in p.get("sessions", []):
+            events.append((s.get("created_at", ""), 1, p, s))
+    for _, _, patient, session in sorted(events, key=lambda e: (e[0], e[1])):
+        if session is None:
+            aggregates.patient_created(patient)
+        else:
+            aggregates.session_created(patient, session)
+    return aggregates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Confere os agregados incrementais do dashboard contra um recálculo de data/patients.json"
+    )
+    parser.parse_args()
+
+    patients = load_patients()
+    differences = replay(patients).check(patients, repair=False)
+    for difference in differences:
+        print(f"divergência: {difference}")
+    print(f"{len(patients)} pacientes verificados, {len(differences)} divergências.")
+    raise SystemExit(1 if differences else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Fixtures compartilhadas — servidor LLM falso compatível com a API da OpenAI.
+
+O servidor responde `POST /v1/chat/completions` (com e sem `stream`) enviando
+os tokens configurados com um intervalo fixo entre eles, para emular o ritmo
+de geração de um modelo real sem acesso à rede.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import counters, rate_limit
+from app.core.config import settings
+from app.main import app
+from app.repositories.chat_repo import chat_repo
+from app.repositories.library_repo import favorite_store, history_store
+from app.services.answer_cache import answer_cache
+from app.services.prompt_compiler import prompt_compiler
+from app.services.patient_search import patient_search
+from app.services.session_analytics import session_analytics
+from app.services.therapist_overview import therapist_overview
+
+FAKE_TOKENS = [
+    "A", " Bíblia", " nos", " ensina", " em", " Filipenses", " 4:6-7",
+    " a", " entregar", " a", " ansiedade", " a", " Deus", ".",
+]
+
+
+class FakeLLM:
+    def __init__(self, tokens: list[str], token_delay: float, first_token_delay: float) -> None:
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.requests: list[dict] = []
+        self.disconnects = 0  # respostas interrompidas pelo cliente
+        self.base_url = ""
+
+
+def _make_handler(llm: FakeLLM) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:  # silencia o log do http.server
+            pass
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            llm.requests.append(body)
+            try:
+                if body.get("stream"):
+                    self._stream(body)
+                else:
+                    self._complete(body)
+            except (BrokenPipeError, ConnectionResetError):  # cliente desistiu (prazo/cancelamento)
+                llm.disconnects += 1
+
+        def _chunk(self, delta: dict, finish_reason: str | None = None) -> bytes:
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": "fake-llm",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode()
+
+        def _write_chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _stream(self, body: dict) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(llm.first_token_delay)
+            self._write_chunk(self._chunk({"role": "assistant", "content": ""}))
+            for i, token in enumerate(llm.tokens):
+                if i:
+                    time.sleep(llm.token_delay)
+                self._write_chunk(self._chunk({"content": token}))
+            self._write_chunk(self._chunk({}, "stop"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _complete(self, body: dict) -> None:
+            time.sleep(llm.first_token_delay + llm.token_delay * (len(llm.tokens) - 1))
+            payload = json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "fake-llm",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(llm.tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(llm.tokens), "total_tokens": 10 + len(llm.tokens)},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+@pytest.fixture(autouse=True)
+def isolated_chat_repo(tmp_path, monkeypatch):
+    """Cada teste grava as conversas num diretório temporário próprio."""
+    monkeypatch.setattr(chat_repo, "root", tmp_path / "conversations")
+    return chat_repo
+
+
+@pytest.fixture(autouse=True)
+def isolated_favorites(tmp_path, monkeypatch):
+    """Cada teste grava os logs de favoritos num diretório temporário próprio."""
+    monkeypatch.setattr(favorite_store, "root", tmp_path / "favorites")
+    favorite_store.reset()
+    yield favorite_store
+    favorite_store.reset()
+
+
+@pytest.fixture(autouse=True)
+def isolated_history(tmp_path, monkeypatch):
+    """Cada teste grava o histórico de leitura num diretório temporário próprio."""
+    monkeypatch.setattr(history_store, "root", tmp_path / "history")
+    return history_store
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter(monkeypatch):
+    """Buckets e cotas do limitador do chat zerados a cada teste."""
+    monkeypatch.setattr(rate_limit, "_limiter", None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_usage_counters(monkeypatch):
+    """Contadores de mensagens só em memória (sem message_usage.json) a cada teste."""
+    monkeypatch.setattr(counters, "_store", counters.InMemoryCounterStore())
+
+
+@pytest.fixture(autouse=True)
+def fresh_prompt_compiler():
+    """Prompts compilados descartados — testes podem alterar o patients.json direto."""
+    prompt_compiler.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def fresh_therapist_overview():
+    """Agregados do dashboard (e o vigia de cotas) reconstruídos do patients.json no primeiro acesso."""
+    therapist_overview.reset()
+
+
+@pytest.fixture(autouse=True)
+def fresh_session_analytics():
+    """Séries de humor/temas reconstruídas do patients.json no primeiro acesso."""
+    session_analytics.reset()
+
+
+@pytest.fixture(autouse=True)
+def fresh_patient_search():
+    """Índice de busca de pacientes reconstruído do patients.json no primeiro acesso."""
+    patient_search.reset()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Sobe o servidor LLM falso e aponta o cliente OpenAI do chat para ele."""
+    llm = FakeLLM(FAKE_TOKENS, token_delay=0.02, first_token_delay=0.05)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(llm))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    llm.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    monkeypatch.setattr(settings, "openai_api_key", "sk-fake")
+    monkeypatch.setattr(settings, "openai_base_url", llm.base_url)
+    answer_cache.clear()
+    yield llm
+
+    answer_cache.clear()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def chat_client(fake_llm):
+    """TestClient com lifespan ativo — o cliente LLM compartilhado aponta para o servidor falso."""
+    with TestClient(app) as client:
+        yield client
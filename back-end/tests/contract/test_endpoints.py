@@ -3,10 +3,16 @@ Testes de contrato (Fase 1) — validam que todos os endpoints retornam
 status HTTP correto e schemas aderentes ao OpenAPI.
 """
 
+import gzip
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core import storage
+from app.core.security import create_access_token
 from app.main import app
+from app.repositories import patient_repo
 
 client = TestClient(app)
 
@@ -184,12 +190,51 @@ def test_remove_favorite():
     assert body["is_favorited"] is False
 
 
+def test_favorites_are_per_user_with_post_titles():
+    other = {"Authorization": f"Bearer {create_access_token('user-fav-outro')}"}
+    r = client.post(
+        "/v1/library/favorites",
+        json={"add": ["post-39018ed1", "post-8e37317a"], "remove": ["post-inexistente"]},
+        headers=other,
+    )
+    assert r.status_code == 200
+    assert r.json() == {"added": ["post-39018ed1", "post-8e37317a"], "removed": [], "total": 2}
+
+    items = client.get("/v1/library?tab=favorites", headers=other).json()["items"]
+    assert [i["title"] for i in items] == ["A batalha que não é sua!", "Uma fé provada constantemente!"]
+    mock_items = client.get("/v1/library?tab=favorites", headers=AUTH_HEADER).json()["items"]
+    assert "post-8e37317a" not in {i["post_id"] for i in mock_items}
+
+    client.delete("/v1/library/favorites/post-8e37317a", headers=other)
+    items = client.get("/v1/library?tab=favorites&tag=Devocional", headers=other).json()["items"]
+    assert [i["post_id"] for i in items] == ["post-39018ed1"]
+
+
 def test_record_history():
     r = client.post("/v1/library/history", json={"post_id": "post-001"}, headers=AUTH_HEADER)
     assert r.status_code == 201
     assert "message" in r.json()
 
 
+def test_history_lists_last_read_per_post_by_period():
+    reader = {"Authorization": f"Bearer {create_access_token('user-historico')}"}
+    for post_id in ("post-39018ed1", "post-8e37317a", "post-39018ed1"):
+        client.post("/v1/library/history", json={"post_id": post_id}, headers=reader)
+
+    items = client.get("/v1/library?tab=history&period=today", headers=reader).json()["items"]
+    assert [i["post_id"] for i in items] == ["post-39018ed1", "post-8e37317a"]
+    assert items[0]["title"] == "Uma fé provada constantemente!"
+    assert items[0]["subtitle"].startswith("Acessado hoje")
+
+    r = client.get("/v1/library?tab=history&start=2020-01-01&end=2020-12-31", headers=reader)
+    assert r.json()["items"] == []
+    assert client.get("/v1/library?tab=history&period=ano", headers=reader).status_code == 422
+
+    r = client.post("/v1/admin/library/history/compact", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    assert {"partitions", "lines_before", "lines_after"} <= r.json().keys()
+
+
 # ─── Chat ─────────────────────────────────────────────────────────────────────
 
 def test_create_conversation():
@@ -217,6 +262,39 @@ def test_get_messages():
     assert msgs[0]["role"] in ("user", "assistant")
 
 
+def test_get_messages_window():
+    conv_id = client.post("/v1/chat/conversations", headers=AUTH_HEADER).json()["id"]
+    for i in range(3):
+        client.post(
+            f"/v1/chat/conversations/{conv_id}/messages",
+            json={"content": f"Pergunta {i}"},
+            headers=AUTH_HEADER,
+        )
+
+    r = client.get(f"/v1/chat/conversations/{conv_id}/messages?limit=2", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    body = r.json()
+    assert [m["role"] for m in body["messages"]] == ["user", "assistant"]
+    assert body["messages"][0]["content"] == "Pergunta 2"
+    assert body["next_cursor"] == 4
+
+    older = client.get(
+        f"/v1/chat/conversations/{conv_id}/messages?limit=10&before={body['next_cursor']}",
+        headers=AUTH_HEADER,
+    ).json()
+    assert len(older["messages"]) == 4
+    assert older["next_cursor"] is None
+
+    listed = client.get("/v1/chat/conversations", headers=AUTH_HEADER).json()["conversations"]
+    header = next(c for c in listed if c["id"] == conv_id)
+    assert header["message_count"] == 6
+
+
+def test_get_messages_unknown_conversation():
+    r = client.get("/v1/chat/conversations/conv-inexistente/messages", headers=AUTH_HEADER)
+    assert r.status_code == 404
+
+
 def test_send_message():
     r = client.post(
         "/v1/chat/conversations/conv-001/messages",
@@ -232,6 +310,20 @@ def test_send_message():
     assert isinstance(ai["citations"], list)
 
 
+
+def test_send_message_stream():
+    r = client.post(
+        "/v1/chat/conversations/conv-001/messages/stream",
+        json={"content": "O que a Bíblia diz sobre esperança?"},
+        headers=AUTH_HEADER,
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = [line.split(": ", 1)[1] for line in r.text.splitlines() if line.startswith("event: ")]
+    assert events[0] == "user_message"
+    assert "delta" in events
+    assert events[-3:] == ["citations", "assistant_message", "done"]
+
 # ─── Therapist ────────────────────────────────────────────────────────────────
 
 def test_therapist_overview():
@@ -246,6 +338,57 @@ def test_therapist_overview():
     assert isinstance(body["recent_activity"], list)
 
 
+def test_therapist_overview_check():
+    client.post("/v1/therapist/patients/pat-001/sessions", json={
+        "date": "2025-12-01", "summary": "Revisão", "mood": "good",
+    }, headers=AUTH_HEADER)
+    overview = client.get("/v1/therapist/overview", headers=AUTH_HEADER).json()
+    assert overview["recent_activity"][0]["action"] == "Sessão registrada"
+
+    r = client.get("/v1/therapist/overview/check", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    assert r.json() == {"consistent": True, "differences": []}
+
+
+def test_therapist_near_limit_patients_and_quota_alerts():
+    r = client.get("/v1/therapist/patients/near-limit?k=2", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    patients = r.json()["patients"]
+    assert len(patients) <= 2
+    ratios = [p["messages_used"] / p["messages_limit"] for p in patients if p["messages_limit"]]
+    assert ratios == sorted(ratios, reverse=True)
+
+    top = patients[0]
+    r = client.patch(f"/v1/therapist/patients/{top['id']}/limit", json={
+        "messages_limit": max(top["messages_used"], 1),
+    }, headers=AUTH_HEADER)
+    assert r.status_code == 200
+    alerts = client.get("/v1/admin/alerts", headers=AUTH_HEADER).json()["alerts"]
+    quota_alert = next(a for a in alerts if a["id"] == f"alert-quota-{top['id']}")
+    assert quota_alert["level"] == "critical"
+
+
+def test_therapist_session_analytics():
+    for mood, topics in (("low", ["Ansiedade"]), ("good", ["ansiedade", "Gratidão"])):
+        r = client.post("/v1/therapist/patients/pat-002/sessions", json={
+            "date": "2099-01-01", "summary": "Acompanhamento", "mood": mood, "topics_covered": topics,
+        }, headers=AUTH_HEADER)
+        assert r.status_code == 201
+
+    r = client.get("/v1/therapist/patients/pat-002/analytics/mood?window=2", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    points = r.json()["points"]
+    assert [p["mood"] for p in points[-2:]] == ["low", "good"]
+    assert points[-1]["rolling_average"] == 3.0
+
+    r = client.get("/v1/therapist/patients/pat-002/analytics/topics?k=1", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    assert r.json()["topics"][0]["count"] >= 2
+
+    r = client.get("/v1/therapist/patients/pat-inexistente/analytics/mood", headers=AUTH_HEADER)
+    assert r.status_code == 404
+
+
 def test_therapist_list_patients():
     r = client.get("/v1/therapist/patients", headers=AUTH_HEADER)
     assert r.status_code == 200
@@ -262,6 +405,82 @@ def test_therapist_list_patients():
     assert "sessions" not in p  # PatientSummary nao inclui sessions
 
 
+@pytest.fixture
+def isolated_patients(monkeypatch, tmp_path):
+    """patients.json temporário (semeado com os mocks), para não sujar data/."""
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(patient_repo, "DATA_DIR", tmp_path)
+
+
+def test_therapist_import_patients(isolated_patients):
+    body = "name,email,messages_limit\nImportada Um,importada.um@email.com,80\nSem email,,\n"
+    r = client.post(
+        "/v1/therapist/patients/import",
+        content=body.encode(),
+        headers={**AUTH_HEADER, "Content-Type": "text/csv"},
+    )
+    assert r.status_code == 200
+    report = r.json()
+    assert (report["format"], report["imported"], report["failed"]) == ("csv", 1, 1)
+    assert report["errors"][0]["line"] == 3
+
+    found = client.get("/v1/therapist/patients?q=importada um", headers=AUTH_HEADER).json()
+    assert found["patients"][0]["messages_limit"] == 80
+
+    r = client.post("/v1/therapist/patients/import", content=b"{}", headers={
+        **AUTH_HEADER, "Content-Type": "application/json",
+    })
+    assert r.status_code == 415
+
+
+def test_therapist_export_patients():
+    r = client.get("/v1/therapist/patients/export?status=paused", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert records and all(p["status"] == "paused" for p in records)
+    assert "sessions" in records[0]
+
+    r = client.get("/v1/therapist/patients/export?format=csv&gzip=true", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    assert r.headers["content-disposition"] == 'attachment; filename="patients.csv.gz"'
+    header = gzip.decompress(r.content).decode().splitlines()[0]
+    assert header.startswith("id,name,email,status")
+
+
+def test_therapist_patch_with_if_match():
+    r = client.get("/v1/therapist/patients/pat-003", headers=AUTH_HEADER)
+    etag = r.headers["etag"]
+    assert etag == f'"{r.json()["version"]}"'
+
+    r = client.patch("/v1/therapist/patients/pat-003/limit", json={"messages_limit": 60},
+                     headers={**AUTH_HEADER, "If-Match": etag})
+    assert r.status_code == 200
+    new_etag = r.headers["etag"]
+    assert new_etag != etag
+
+    r = client.patch("/v1/therapist/patients/pat-003/status", json={"status": "paused"},
+                     headers={**AUTH_HEADER, "If-Match": etag})
+    assert r.status_code == 412
+    assert r.headers["etag"] == new_etag
+
+    r = client.patch("/v1/therapist/patients/pat-003/status", json={"status": "active"},
+                     headers={**AUTH_HEADER, "If-Match": "*"})
+    assert r.status_code == 200
+
+
+def test_therapist_search_patients():
+    r = client.get("/v1/therapist/patients?q=pedro lma", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["patients"][0]["name"] == "Pedro Henrique Lima"
+    assert "sessions" not in body["patients"][0]
+
+    r = client.get("/v1/therapist/patients?offset=1&limit=1", headers=AUTH_HEADER)
+    body = r.json()
+    assert len(body["patients"]) == 1 and body["total"] >= 2
+
+
 def test_therapist_create_patient():
     r = client.post("/v1/therapist/patients", json={
         "name": "Teste Criação",
@@ -453,6 +672,15 @@ def test_get_growth_metrics():
     assert len(body["history"]) == 7
 
 
+def test_get_answer_cache_metrics():
+    r = client.get("/v1/admin/metrics/answer-cache", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    body = r.json()
+    assert "entries" in body
+    assert "hit_rate" in body
+    assert 0 <= body["hit_rate"] <= 1
+
+
 def test_get_etl_runs():
     r = client.get("/v1/admin/etl/runs", headers=AUTH_HEADER)
     assert r.status_code == 200
@@ -471,6 +699,22 @@ def test_execute_etl():
     assert body["status"] == "running"
 
 
+def test_get_chat_metrics():
+    client.post(
+        "/v1/chat/conversations/conv-001/messages",
+        json={"content": "O que a Bíblia diz sobre perdão?"},
+        headers=AUTH_HEADER,
+    )
+    r = client.get("/v1/admin/metrics/chat", headers=AUTH_HEADER)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["samples"] >= 1
+    series = body["series"][0]
+    assert series["user_kind"] in ("patient", "user")
+    assert series["total_seconds"]["count"] >= 1
+    assert "p95" in series["ttft_seconds"]
+
+
 def test_get_alerts():
     r = client.get("/v1/admin/alerts", headers=AUTH_HEADER)
     assert r.status_code == 200
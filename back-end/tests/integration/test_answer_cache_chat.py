@@ -0,0 +1,87 @@
+"""
+Testes de integração — cache de respostas no envio de mensagens do chat.
+"""
+
+import uuid
+
+from app.core.security import create_access_token
+from app.repositories.chat_repo import chat_repo
+
+PERGUNTA = {"content": "O que a Bíblia diz sobre ansiedade?"}
+
+
+def _auth(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+def _new_conversation(user_id: str) -> str:
+    """Conversa nova a cada envio — com histórico, o cache não é consultado."""
+    conversation_id = f"conv-{uuid.uuid4().hex[:8]}"
+    chat_repo.create_conversation(user_id, conversation_id)
+    return f"/v1/chat/conversations/{conversation_id}/messages"
+
+
+def test_repeated_question_is_answered_from_cache(fake_llm, chat_client):
+    first = chat_client.post(_new_conversation("user-cache-001"), json=PERGUNTA, headers=_auth("user-cache-001"))
+    second = chat_client.post(
+        _new_conversation("user-cache-002"),
+        json={"content": "o que a biblia diz sobre a ansiedade"},
+        headers=_auth("user-cache-002"),
+    )
+
+    assert first.status_code == second.status_code == 201
+    assert second.json()["assistant_message"]["content"] == first.json()["assistant_message"]["content"]
+    assert len(fake_llm.requests) == 1
+
+    metrics = chat_client.get("/v1/admin/metrics/answer-cache", headers=_auth("admin")).json()
+    assert metrics["near_hits"] == 1
+    assert metrics["hit_rate"] == 0.5
+
+
+def test_patient_with_guidelines_bypasses_cache(fake_llm, chat_client):
+    patient_user = "user-paciente-cache"
+    headers = _auth(patient_user)
+    chat_client.patch("/v1/therapist/patients/pat-002", json={"user_id": patient_user}, headers=headers)
+    try:
+        chat_client.post(_new_conversation(patient_user), json=PERGUNTA, headers=headers)
+        chat_client.post(_new_conversation(patient_user), json=PERGUNTA, headers=headers)
+        assert len(fake_llm.requests) == 2
+
+        chat_client.patch("/v1/therapist/patients/pat-002", json={"shared_answer_cache": True}, headers=headers)
+        chat_client.post(_new_conversation(patient_user), json=PERGUNTA, headers=headers)
+        chat_client.post(_new_conversation(patient_user), json=PERGUNTA, headers=headers)
+        assert len(fake_llm.requests) == 3
+    finally:
+        chat_client.patch(
+            "/v1/therapist/patients/pat-002",
+            json={"user_id": None, "shared_answer_cache": False},
+            headers=headers,
+        )
+
+
+def test_follow_up_question_skips_cache(fake_llm, chat_client):
+    headers = _auth("user-cache-003")
+    url = _new_conversation("user-cache-003")
+    chat_client.post(url, json=PERGUNTA, headers=headers)
+    r = chat_client.post(url, json=PERGUNTA, headers=headers)
+
+    assert len(fake_llm.requests) == 2
+    assert r.json()["assistant_message"]["usage"]["cached"] is False
+    # O segundo envio leva a primeira troca como histórico
+    assert [m["role"] for m in fake_llm.requests[1]["messages"]] == ["system", "user", "assistant", "user"]
+
+
+def test_patient_prompt_is_recompiled_after_patch(fake_llm, chat_client):
+    patient_user = "user-paciente-prompt"
+    headers = _auth(patient_user)
+    chat_client.post(_new_conversation(patient_user), json=PERGUNTA, headers=headers)
+    chat_client.patch("/v1/therapist/patients/pat-003", json={"user_id": patient_user}, headers=headers)
+    try:
+        chat_client.post(_new_conversation(patient_user), json=PERGUNTA, headers=headers)
+        chat_client.post(_new_conversation(patient_user), json=PERGUNTA, headers=headers)
+        prompts = [r["messages"][0]["content"] for r in fake_llm.requests]
+        assert "Diretrizes do psicólogo" not in prompts[0]
+        assert "Temas a enfatizar: autoestima" in prompts[1]
+        assert prompts[2] == prompts[1]  # mesmo texto a cada requisição (cache de prefixo)
+    finally:
+        chat_client.patch("/v1/therapist/patients/pat-003", json={"user_id": None}, headers=headers)
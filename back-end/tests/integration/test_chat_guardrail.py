@@ -0,0 +1,74 @@
+"""
+Testes de integração — guardrail de `avoid_topics` nas respostas do chat.
+"""
+
+import json
+import time
+import uuid
+
+import pytest
+
+from app.core.security import create_access_token
+from app.repositories.chat_repo import chat_repo
+
+PATIENT_USER = "user-paciente-guardrail"
+HEADERS = {"Authorization": f"Bearer {create_access_token(PATIENT_USER)}"}
+
+
+@pytest.fixture
+def patient_avoiding_anxiety(chat_client):
+    """pat-001 vinculado ao usuário, evitando o tema que a resposta falsa menciona."""
+    chat_client.patch(
+        "/v1/therapist/patients/pat-001",
+        json={"user_id": PATIENT_USER, "avoid_topics": ["ansiedade"]},
+        headers=HEADERS,
+    )
+    yield
+    chat_client.patch(
+        "/v1/therapist/patients/pat-001",
+        json={"user_id": None, "avoid_topics": []},
+        headers=HEADERS,
+    )
+
+
+def _conversation_url() -> str:
+    conversation_id = f"conv-{uuid.uuid4().hex[:8]}"
+    chat_repo.create_conversation(PATIENT_USER, conversation_id)
+    return f"/v1/chat/conversations/{conversation_id}/messages"
+
+
+def test_stream_is_cut_before_avoided_topic(fake_llm, chat_client, patient_avoiding_anxiety):
+    r = chat_client.post(_conversation_url() + "/stream", json={"content": "Como ter paz?"}, headers=HEADERS)
+
+    deltas = [
+        json.loads(line.removeprefix("data: "))["content"]
+        for event in r.text.split("\n\n") if event.startswith("event: delta")
+        for line in event.split("\n") if line.startswith("data: ")
+    ]
+    streamed = "".join(deltas)
+    assert "ansiedade" not in streamed
+    assert streamed.startswith("A Bíblia nos ensina em Filipenses 4:6-7 a entregar a")
+    assert "seu psicólogo" in streamed
+    assert "event: done" in r.text
+
+
+def test_stream_cut_drops_the_provider_connection(fake_llm, chat_client, patient_avoiding_anxiety):
+    fake_llm.tokens = fake_llm.tokens + [" amém"] * 50  # ainda gerando quando o corte acontece
+    r = chat_client.post(_conversation_url() + "/stream", json={"content": "Como ter paz?"}, headers=HEADERS)
+    assert "event: done" in r.text
+    assert "amém" not in r.text
+
+    deadline = time.monotonic() + 2
+    while fake_llm.disconnects == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert fake_llm.disconnects == 1
+
+
+def test_complete_answer_is_regenerated_then_cut(fake_llm, chat_client, patient_avoiding_anxiety):
+    r = chat_client.post(_conversation_url(), json={"content": "Como ter paz?"}, headers=HEADERS)
+
+    content = r.json()["assistant_message"]["content"]
+    assert len(fake_llm.requests) == 2  # uma nova geração antes de cortar
+    assert "Não mencione nem aluda a: ansiedade." in fake_llm.requests[1]["messages"][-2]["content"]
+    assert "ansiedade" not in content
+    assert content.endswith("(Filipenses 4:7).")
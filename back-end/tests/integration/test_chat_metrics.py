@@ -0,0 +1,46 @@
+"""
+Testes de integração — métricas de latência do chat e alerta de alta latência.
+"""
+
+from app.core.config import settings
+from app.core.observability import chat_metrics
+
+AUTH_HEADER = {"Authorization": "Bearer mock-token"}
+
+
+def test_stream_records_ttft_and_tokens(fake_llm, chat_client):
+    chat_metrics.reset()
+    chat_client.post(
+        "/v1/chat/conversations/conv-001/messages/stream",
+        json={"content": "Como lidar com a ansiedade?"},
+        headers=AUTH_HEADER,
+    )
+
+    series = chat_client.get("/v1/admin/metrics/chat", headers=AUTH_HEADER).json()["series"]
+    assert len(series) == 1
+    assert series[0]["model"] == settings.openai_model
+    assert series[0]["user_kind"] == "user"
+    assert series[0]["ttft_seconds"]["p50"] >= 0.05  # o servidor falso espera 50ms
+    assert series[0]["completion_tokens"]["count"] == 1
+    assert series[0]["tokens_per_second"]["count"] == 1
+
+
+def test_high_latency_alert_is_driven_by_p95(fake_llm, chat_client, monkeypatch):
+    chat_metrics.reset()
+    monkeypatch.setattr(settings, "chat_latency_alert_min_samples", 2)
+    monkeypatch.setattr(settings, "chat_latency_alert_p95_seconds", 0.01)
+    monkeypatch.setattr(settings, "answer_cache_enabled", False)
+
+    alerts = chat_client.get("/v1/admin/alerts", headers=AUTH_HEADER).json()["alerts"]
+    assert all(a["subtitle"] != "RAG service high latency" for a in alerts)
+
+    conversation_id = chat_client.post("/v1/chat/conversations", headers=AUTH_HEADER).json()["id"]
+    for i in range(2):
+        chat_client.post(
+            f"/v1/chat/conversations/{conversation_id}/messages",
+            json={"content": f"Pergunta {i}"},
+            headers=AUTH_HEADER,
+        )
+    alerts = chat_client.get("/v1/admin/alerts", headers=AUTH_HEADER).json()["alerts"]
+    assert alerts[0]["subtitle"] == "RAG service high latency"
+    assert alerts[0]["level"] == "error"
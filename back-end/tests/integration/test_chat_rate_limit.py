@@ -0,0 +1,120 @@
+"""
+Testes de integração — limite de envio do chat (rajada e cota do paciente).
+"""
+
+from fastapi.testclient import TestClient
+
+from app.api.v1 import chat
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.integrations.llm_client import LLMBusyError
+from app.main import app
+from app.repositories.chat_repo import chat_repo
+from app.repositories.patient_repo import load_patients
+from app.services.prompt_compiler import prompt_compiler
+
+client = TestClient(app)
+PERGUNTA = {"content": "Como ter paz?"}
+
+
+def _setup(user_id: str) -> tuple[str, dict]:
+    chat_repo.create_conversation(user_id, "conv-rl")
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    return "/v1/chat/conversations/conv-rl/messages", headers
+
+
+def test_burst_is_denied_with_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_burst", 2)
+    url, headers = _setup("user-rajada")
+
+    codes = [client.post(url, json=PERGUNTA, headers=headers).status_code for _ in range(3)]
+    assert codes == [201, 201, 429]
+
+    r = client.post(url, json=PERGUNTA, headers=headers)
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+def test_patient_quota_is_counted_and_enforced():
+    user_id = "user-paciente-cota"
+    url, headers = _setup(user_id)
+    used = next(p for p in load_patients() if p["id"] == "pat-003")["messages_used"]
+    client.patch("/v1/therapist/patients/pat-003", json={"user_id": user_id}, headers=headers)
+    client.patch("/v1/therapist/patients/pat-003/limit", json={"messages_limit": used + 1}, headers=headers)
+    try:
+        assert client.post(url, json=PERGUNTA, headers=headers).status_code == 201
+        patient = client.get("/v1/therapist/patients/pat-003", headers=headers).json()
+        assert patient["messages_used"] == used + 1
+
+        r = client.post(url, json=PERGUNTA, headers=headers)
+        assert r.status_code == 429
+        assert "psicólogo" in r.json()["detail"]
+        assert "Retry-After" in r.headers
+    finally:
+        client.patch("/v1/therapist/patients/pat-003", json={"user_id": None}, headers=headers)
+        client.patch("/v1/therapist/patients/pat-003/limit", json={"messages_limit": 50}, headers=headers)
+
+
+def test_limit_change_reaches_the_chat_without_recompiling_the_prompt():
+    user_id = "user-paciente-limite"
+    url, headers = _setup(user_id)
+    client.patch("/v1/therapist/patients/pat-003", json={"user_id": user_id}, headers=headers)
+    try:
+        assert client.post(url, json=PERGUNTA, headers=headers).status_code == 201
+        compilations = prompt_compiler.compilations
+        used = client.get("/v1/therapist/patients/pat-003", headers=headers).json()["messages_used"]
+
+        client.patch("/v1/therapist/patients/pat-003/limit", json={"messages_limit": used}, headers=headers)
+        assert client.post(url, json=PERGUNTA, headers=headers).status_code == 429
+        client.patch("/v1/therapist/patients/pat-003/limit", json={"messages_limit": used + 1}, headers=headers)
+        assert client.post(url, json=PERGUNTA, headers=headers).status_code == 201
+        assert prompt_compiler.compilations == compilations
+    finally:
+        client.patch("/v1/therapist/patients/pat-003", json={"user_id": None}, headers=headers)
+        client.patch("/v1/therapist/patients/pat-003/limit", json={"messages_limit": 50}, headers=headers)
+
+
+def test_provider_failure_refunds_burst_and_quota(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_burst", 1)
+    user_id = "user-paciente-reembolso"
+    url, headers = _setup(user_id)
+    used = next(p for p in load_patients() if p["id"] == "pat-003")["messages_used"]
+    client.patch("/v1/therapist/patients/pat-003", json={"user_id": user_id}, headers=headers)
+
+    async def busy(messages):
+        raise LLMBusyError("Muitas conversas simultâneas.")
+
+    try:
+        with monkeypatch.context() as m:
+            m.setattr(chat, "_call_openai", busy)
+            assert client.post(url, json=PERGUNTA, headers=headers).status_code == 503
+        patient = client.get("/v1/therapist/patients/pat-003", headers=headers).json()
+        assert patient["messages_used"] == used
+
+        assert client.post(url, json=PERGUNTA, headers=headers).status_code == 201
+    finally:
+        client.patch("/v1/therapist/patients/pat-003", json={"user_id": None}, headers=headers)
+
+
+def test_unexpected_provider_error_refunds_and_returns_502(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_burst", 1)
+    user_id = "user-paciente-falha"
+    url, headers = _setup(user_id)
+    pergunta = {"content": "Como perdoar quem me feriu?"}
+    used = next(p for p in load_patients() if p["id"] == "pat-003")["messages_used"]
+    client.patch("/v1/therapist/patients/pat-003", json={"user_id": user_id}, headers=headers)
+
+    async def broken(messages):
+        raise RuntimeError("resposta inválida do provedor")
+
+    try:
+        with monkeypatch.context() as m:
+            m.setattr(chat, "_call_openai", broken)
+            response = client.post(url, json=pergunta, headers=headers)
+            assert response.status_code == 502
+            assert response.json()["detail"] == "Falha ao gerar a resposta."
+        patient = client.get("/v1/therapist/patients/pat-003", headers=headers).json()
+        assert patient["messages_used"] == used
+
+        assert client.post(url, json=pergunta, headers=headers).status_code == 201
+    finally:
+        client.patch("/v1/therapist/patients/pat-003", json={"user_id": None}, headers=headers)
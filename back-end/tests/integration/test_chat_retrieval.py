@@ -0,0 +1,54 @@
+"""
+Testes de integração — trechos do acervo (RAG local) no prompt e nas citações do chat.
+"""
+
+import uuid
+
+import pytest
+
+from app.core.security import create_access_token
+from app.repositories import user_repo
+from app.repositories.chat_repo import chat_repo
+from app.repositories.library_repo import favorite_store
+
+PERGUNTA = {"content": "Como ser forte e corajoso?"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_user_settings(monkeypatch):
+    monkeypatch.setattr(user_repo, "_settings_state", {})
+
+
+def _auth(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+def _new_conversation(user_id: str) -> str:
+    conversation_id = f"conv-{uuid.uuid4().hex[:8]}"
+    chat_repo.create_conversation(user_id, conversation_id)
+    return f"/v1/chat/conversations/{conversation_id}/messages"
+
+
+def test_answer_is_grounded_on_archive_posts(fake_llm, chat_client):
+    r = chat_client.post(_new_conversation("user-rag-001"), json=PERGUNTA, headers=_auth("user-rag-001"))
+
+    assert r.status_code == 201
+    prompt = fake_llm.requests[0]["messages"]
+    knowledge = [m["content"] for m in prompt if m["content"].startswith("Trechos do acervo")]
+    assert knowledge and "Josué 1:29" in knowledge[0]
+
+    citations = r.json()["assistant_message"]["citations"]
+    assert {"reference": "Josué 1:29", "post_id": "post-8e37317a"}.items() <= citations[-1].items()
+
+
+def test_rag_memory_boosts_favorites_and_skips_cache(fake_llm, chat_client):
+    user = "user-rag-002"
+    favorite_store.add(user, ["post-39018ed1"])
+    chat_client.patch("/v1/users/me/settings", json={"rag_memory": True}, headers=_auth(user))
+    question = {"content": "Uma fé provada em meio às batalhas"}
+
+    chat_client.post(_new_conversation(user), json=question, headers=_auth(user))
+    chat_client.post(_new_conversation(user), json=question, headers=_auth(user))
+
+    assert "Gênesis 17:4" in fake_llm.requests[0]["messages"][1]["content"].split("\n")[1]
+    assert len(fake_llm.requests) == 2
@@ -0,0 +1,61 @@
+"""
+Testes de integração — streaming SSE do chat contra o servidor LLM falso.
+"""
+
+import json
+
+AUTH_HEADER = {"Authorization": "Bearer mock-token"}
+
+
+def _parse_sse(text: str) -> list[tuple[str, object]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_emits_events_in_order(fake_llm, chat_client):
+    r = chat_client.post(
+        "/v1/chat/conversations/conv-001/messages/stream",
+        json={"content": "Como lidar com a ansiedade?"},
+        headers=AUTH_HEADER,
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(r.text)
+    names = [name for name, _ in events]
+    assert names[0] == "user_message"
+    assert names[-3:] == ["citations", "assistant_message", "done"]
+    assert set(names[1:-3]) == {"delta"}
+
+    deltas = "".join(data["content"] for name, data in events if name == "delta")
+    assistant = events[-2][1]
+    assert assistant["content"] == deltas == "".join(fake_llm.tokens)
+    assert [c["reference"] for c in events[-3][1]] == ["Filipenses 4:6-7"]
+    assert fake_llm.requests[0]["stream"] is True
+
+
+def test_stream_reports_time_to_first_token(fake_llm, chat_client):
+    r = chat_client.post(
+        "/v1/chat/conversations/conv-001/messages/stream",
+        json={"content": "O que é fé?"},
+        headers=AUTH_HEADER,
+    )
+    done = _parse_sse(r.text)[-1][1]
+    # o servidor falso espera 50ms antes do primeiro token e 20ms entre tokens
+    assert done["ttft_ms"] >= 50
+    assert done["total_ms"] >= done["ttft_ms"] + 20 * (len(fake_llm.tokens) - 2)
+
+
+def test_non_streaming_send_message_uses_same_backend(fake_llm, chat_client):
+    r = chat_client.post(
+        "/v1/chat/conversations/conv-001/messages",
+        json={"content": "O que é fé?"},
+        headers=AUTH_HEADER,
+    )
+    assert r.status_code == 201
+    ai = r.json()["assistant_message"]
+    assert ai["content"] == "".join(fake_llm.tokens)
+    assert ai["citations"][0]["reference"] == "Filipenses 4:6-7"
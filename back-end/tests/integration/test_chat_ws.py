@@ -0,0 +1,164 @@
+"""
+Testes de integração — chat por WebSocket com conversas multiplexadas.
+"""
+
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1 import chat_ws
+from app.api.v1.chat_ws import WS_UNAUTHORIZED, ChatConnection
+from app.core.config import settings
+from app.core.security import create_access_token, create_refresh_token
+from app.repositories.chat_repo import chat_repo
+
+USER = "user-ws-001"
+WS_URL = f"/v1/chat/ws?token={create_access_token(USER)}"
+ANSWER = "A Bíblia nos ensina em Filipenses 4:6-7 a entregar a ansiedade a Deus."
+
+
+def _collect(ws, conversations: set[str]) -> dict[str, list[dict]]:
+    """Lê quadros até todas as conversas receberem `typing` inativo."""
+    frames: dict[str, list[dict]] = {c: [] for c in conversations}
+    pending = set(conversations)
+    while pending:
+        frame = ws.receive_json()
+        frames[frame["conversation_id"]].append(frame)
+        if frame["type"] == "typing" and not frame["data"]["active"]:
+            pending.discard(frame["conversation_id"])
+    return frames
+
+
+def test_rejects_connection_without_valid_token(chat_client):
+    refresh = create_refresh_token(USER)
+    for url in ("/v1/chat/ws", "/v1/chat/ws?token=mock-token", f"/v1/chat/ws?token={refresh}"):
+        accepted = False
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with chat_client.websocket_connect(url) as ws:
+                accepted = True
+                ws.receive_json()
+        assert accepted
+        assert exc.value.code == WS_UNAUTHORIZED
+
+
+def test_multiplexes_conversations_on_one_connection(fake_llm, chat_client, monkeypatch):
+    monkeypatch.setattr(settings, "answer_cache_enabled", False)
+    for conversation_id in ("conv-a", "conv-b"):
+        chat_repo.create_conversation(USER, conversation_id)
+
+    with chat_client.websocket_connect(WS_URL) as ws:
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+        ws.send_json({"type": "send", "conversation_id": "conv-a", "content": "Oi?", "client_id": "c1"})
+        ws.send_json({"type": "send", "conversation_id": "conv-b", "content": "Paz?", "client_id": "c2"})
+        frames = _collect(ws, {"conv-a", "conv-b"})
+
+    for conversation_id, client_id in (("conv-a", "c1"), ("conv-b", "c2")):
+        types = [f["type"] for f in frames[conversation_id]]
+        assert types[:3] == ["ack", "typing", "user_message"]
+        assert types[-3:] == ["assistant_message", "done", "typing"]
+        assert frames[conversation_id][0]["client_id"] == client_id
+        streamed = "".join(f["data"]["content"] for f in frames[conversation_id] if f["type"] == "delta")
+        assert streamed == ANSWER
+        messages, _ = chat_repo.read_messages(USER, conversation_id, 10)
+        assert [m["role"] for m in messages] == ["user", "assistant"]
+
+
+def test_rejects_busy_and_unknown_conversations(fake_llm, chat_client):
+    fake_llm.first_token_delay = 0.3
+    chat_repo.create_conversation(USER, "conv-a")
+
+    with chat_client.websocket_connect(WS_URL) as ws:
+        ws.send_json({"type": "send", "conversation_id": "conv-x", "content": "Oi"})
+        assert ws.receive_json()["data"]["status"] == 404
+
+        ws.send_json({"type": "send", "conversation_id": "conv-a", "content": "Oi"})
+        ws.send_json({"type": "send", "conversation_id": "conv-a", "content": "De novo"})
+        frames = _collect(ws, {"conv-a"})["conv-a"]
+        errors = [f for f in frames if f["type"] == "error"]
+        assert errors[0]["data"]["status"] == 409
+
+        ws.send_text("não é json")
+        assert ws.receive_json()["data"]["status"] == 422
+
+
+def test_unexpected_failure_before_answering_sends_error(chat_client, monkeypatch):
+    async def prepare_turn(user_id, conversation_id, content):
+        raise RuntimeError("índice indisponível")
+
+    monkeypatch.setattr(chat_ws, "prepare_turn", prepare_turn)
+    with chat_client.websocket_connect(WS_URL) as ws:
+        ws.send_json({"type": "send", "conversation_id": "conv-a", "content": "Oi", "client_id": "c1"})
+        frame = ws.receive_json()
+        assert (frame["type"], frame["client_id"], frame["data"]["status"]) == ("error", "c1", 500)
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+
+class StalledSocket:
+    async def send_json(self, frame):
+        await asyncio.Event().wait()  # cliente não lê
+
+
+async def test_slow_reader_holds_back_the_generator(monkeypatch):
+    monkeypatch.setattr(settings, "chat_ws_queue_size", 4)
+    produced = 0
+
+    async def prepare_turn(user_id, conversation_id, content):
+        class Turn:
+            user_msg = type("Msg", (), {"id": "msg-1"})
+        return Turn()
+
+    async def stream_turn(user_id, turn):
+        nonlocal produced
+        for i in range(1000):
+            produced += 1
+            yield "delta", {"content": f" {i}"}
+
+    monkeypatch.setattr(chat_ws, "prepare_turn", prepare_turn)
+    monkeypatch.setattr(chat_ws, "stream_turn", stream_turn)
+    connection = ChatConnection(StalledSocket(), USER)
+    writer = asyncio.create_task(connection._writer())
+    answer = asyncio.create_task(connection._answer("conv-a", "Oi", None))
+    await asyncio.sleep(0.05)
+
+    # ack + typing + deltas até acabarem os créditos (o quadro preso no escritor ainda conta)
+    assert produced <= settings.chat_ws_queue_size + 1
+    assert not answer.done()
+    answer.cancel()
+    writer.cancel()
+    await asyncio.gather(answer, writer, return_exceptions=True)
+
+
+async def test_cancel_and_typing_end_are_not_lost_under_backpressure(monkeypatch):
+    monkeypatch.setattr(settings, "chat_ws_queue_size", 2)
+
+    async def prepare_turn(user_id, conversation_id, content):
+        class Turn:
+            user_msg = type("Msg", (), {"id": "msg-1"})
+        return Turn()
+
+    async def stream_turn(user_id, turn):
+        while True:
+            yield "delta", {"content": " amém"}
+
+    monkeypatch.setattr(chat_ws, "prepare_turn", prepare_turn)
+    monkeypatch.setattr(chat_ws, "stream_turn", stream_turn)
+    connection = ChatConnection(StalledSocket(), USER)
+    writer = asyncio.create_task(connection._writer())
+    connection._handle({"type": "send", "conversation_id": "conv-a", "content": "Oi"})
+    await asyncio.sleep(0.05)
+    answer = connection.active["conv-a"]
+    assert not answer.done()  # sem crédito, parado no envio
+
+    # o leitor não espera crédito: o erro vai para a fila e o cancel é atendido
+    connection._handle({"type": "desconhecido"})
+    connection._handle({"type": "cancel", "conversation_id": "conv-a"})
+    await asyncio.gather(answer, return_exceptions=True)
+
+    queued = [connection.outbox.get_nowait()[0] for _ in range(connection.outbox.qsize())]
+    assert queued[-2]["data"]["status"] == 422
+    assert queued[-1] == {"type": "typing", "conversation_id": "conv-a", "data": {"active": False}}
+    writer.cancel()
+    await asyncio.gather(writer, return_exceptions=True)
@@ -0,0 +1,46 @@
+"""
+Testes de integração — cliente LLM assíncrono compartilhado (pool + limite de concorrência).
+"""
+
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.integrations.llm_client import close_llm_client, get_llm_client
+from app.main import app
+
+AUTH_HEADER = {"Authorization": "Bearer mock-token"}
+URL = "/v1/chat/conversations/conv-001/messages"
+
+
+async def _send_concurrently(n: int) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        return await asyncio.gather(*[
+            ac.post(URL, json={"content": f"Pergunta {i}"}, headers=AUTH_HEADER) for i in range(n)
+        ])
+
+
+async def test_concurrent_messages_share_one_client(fake_llm, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)  # mesmo usuário enviando 20 de uma vez
+    await close_llm_client()
+    try:
+        responses = await _send_concurrently(20)
+        assert [r.status_code for r in responses] == [201] * 20
+        assert len(fake_llm.requests) == 20
+        client = get_llm_client()
+        assert client is get_llm_client()
+    finally:
+        await close_llm_client()
+
+
+async def test_concurrency_limit_rejects_after_queue_timeout(fake_llm, monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_concurrency", 1)
+    monkeypatch.setattr(settings, "llm_queue_timeout_seconds", 0.05)
+    await close_llm_client()
+    try:
+        responses = await _send_concurrently(2)
+        assert sorted(r.status_code for r in responses) == [201, 503]
+    finally:
+        await close_llm_client()
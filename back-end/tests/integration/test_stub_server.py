@@ -0,0 +1,87 @@
+"""
+Testes de integração — servidor stub compatível com a OpenAI e fallback do chat por prazo.
+"""
+
+import random
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.integrations import llm_client
+from app.integrations.ai_provider import HedgedProvider
+from app.integrations.llm_client import LLMClient
+from app.integrations.stub_server import STUB_ANSWER, LatencyDistribution, StubConfig, create_stub_app
+
+AUTH_HEADER = {"Authorization": "Bearer mock-token"}
+FAST = LatencyDistribution("fixed", {"value": 0.0})
+
+
+def test_latency_distributions_parse_and_sample():
+    rng = random.Random(7)
+    assert LatencyDistribution.parse("fixed:value=0.2").sample(rng) == 0.2
+    uniform = LatencyDistribution.parse("uniform:low=0.1,high=0.3")
+    assert all(0.1 <= uniform.sample(rng) <= 0.3 for _ in range(100))
+    lognormal = LatencyDistribution.parse("lognormal:median=0.4,sigma=0.8")
+    samples = sorted(lognormal.sample(rng) for _ in range(2001))
+    assert samples[1000] == pytest.approx(0.4, rel=0.15)
+    assert min(LatencyDistribution.parse("normal:mean=0,std=1").sample(rng) for _ in range(50)) >= 0
+
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("pareto:alpha=2")
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("uniform:low=0.1")
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", "stub")
+    monkeypatch.setattr(settings, "openai_base_url", "http://stub/v1")
+    app = create_stub_app(StubConfig(ttft=FAST, token_delay=FAST, seed=1))
+    return LLMClient(transport=httpx.ASGITransport(app=app)), app
+
+
+async def test_openai_client_talks_to_stub(stub_client):
+    client, app = stub_client
+    try:
+        assert await client.complete([{"role": "user", "content": "Oi"}]) == STUB_ANSWER
+        streamed = "".join([d async for d in client.stream([{"role": "user", "content": "Oi"}])])
+        assert streamed == STUB_ANSWER
+        assert app.state.requests == 2
+    finally:
+        await client.aclose()
+
+
+async def test_hedged_stub_cuts_slow_first_attempt(stub_client, monkeypatch):
+    client, app = stub_client
+    slow_then_fast = iter([0.5, 0.0])
+    monkeypatch.setattr(LatencyDistribution, "sample", lambda self, rng: next(slow_then_fast, 0.0))
+    provider = HedgedProvider(client, deadline=2.0, hedge_initial_delay=0.05)
+    try:
+        assert await provider.complete([{"role": "user", "content": "Oi"}]) == STUB_ANSWER
+        assert provider.hedges == 1
+    finally:
+        await provider.aclose()
+
+
+def test_chat_falls_back_to_canned_answer_on_deadline(fake_llm, chat_client, monkeypatch):
+    fake_llm.first_token_delay = 0.5
+    monkeypatch.setattr(settings, "llm_deadline_seconds", 0.1)
+    monkeypatch.setattr(settings, "llm_hedge_enabled", False)
+    monkeypatch.setattr(llm_client, "_client", None)  # recria o cliente com o novo prazo
+
+    r = chat_client.post(
+        "/v1/chat/conversations/conv-001/messages",
+        json={"content": "Uma pergunta demorada"},
+        headers=AUTH_HEADER,
+    )
+    assert r.status_code == 201
+    assert r.json()["assistant_message"]["content"].startswith("Com base na sua pergunta")
+
+    stream = chat_client.post(
+        "/v1/chat/conversations/conv-001/messages/stream",
+        json={"content": "Outra pergunta demorada"},
+        headers=AUTH_HEADER,
+    )
+    assert "event: done" in stream.text
+    assert "Provérbios 3:5-6" in stream.text
@@ -0,0 +1,50 @@
+"""
+Teste de carga — custo do guardrail de `avoid_topics` por trecho do streaming.
+
+Uma resposta longa (~50 mil caracteres) chega em trechos do tamanho típico de
+um delta do modelo. O autômato guarda o estado entre os trechos, então o
+custo por trecho depende só do tamanho do trecho, não do texto já recebido.
+"""
+
+import random
+import time
+
+from app.core.guardrail import TOPIC_SYNONYMS, TopicGuard
+
+WORDS = (
+    "o Senhor é meu pastor e nada me faltará em verdes pastos me faz repousar "
+    "guia me mansamente a águas tranquilas refrigera a minha alma a fé a graça "
+    "a esperança o amor a oração a palavra o caminho a vida a luz o perdão"
+).split()
+TOPICS = [*TOPIC_SYNONYMS, "detalhes da doença", "conflitos familiares", "finanças"]
+
+
+def _chunks(n_chars: int, rng: random.Random) -> list[str]:
+    text = " ".join(rng.choice(WORDS) for _ in range(n_chars // 5))[:n_chars]
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(2, 12)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def test_guardrail_costs_under_a_millisecond_per_chunk():
+    guard = TopicGuard(TOPICS)
+    chunks = _chunks(50_000, random.Random(11))
+
+    guarded = guard.stream()
+    timings: list[float] = []
+    released = 0
+    for chunk in chunks:
+        t0 = time.perf_counter()
+        released += len(guarded.feed(chunk))
+        timings.append(time.perf_counter() - t0)
+    released += len(guarded.finish())
+
+    assert released == sum(len(c) for c in chunks)
+    assert sum(timings) / len(timings) < 0.001
+    assert sorted(timings)[len(timings) // 2] < 0.001
+    # Sem releitura: o fim da resposta custa o mesmo que o começo
+    tenth = len(timings) // 10
+    assert sum(timings[-tenth:]) < 3 * sum(timings[:tenth]) + 0.005
@@ -0,0 +1,44 @@
+"""
+Teste de carga — leitura das tendências de humor e temas de um paciente com
+centenas de sessões. As séries ficam em arrays; a leitura só ordena e agrega
+vetorialmente, sem percorrer o patients.json.
+"""
+
+import random
+import time
+
+from app.services.session_analytics import MOOD_SCORES, SessionAnalytics
+
+TOPICS = [f"tema {i}" for i in range(40)]
+
+
+def test_trends_for_hundreds_of_sessions_take_a_few_milliseconds():
+    rng = random.Random(5)
+    patients = [
+        {
+            "id": f"p{p}",
+            "sessions": [
+                {
+                    "id": f"p{p}-s{i}",
+                    "date": f"20{rng.randint(20, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    "mood": rng.choice(list(MOOD_SCORES)),
+                    "topics_covered": rng.sample(TOPICS, 3),
+                }
+                for i in range(500)
+            ],
+        }
+        for p in range(20)
+    ]
+    analytics = SessionAnalytics()
+    analytics.rebuild(patients)
+
+    timings = []
+    for _ in range(200):
+        patient_id = f"p{rng.randrange(20)}"
+        t0 = time.perf_counter()
+        analytics.mood(patient_id, window=5)
+        analytics.top_topics(patient_id, k=5)
+        timings.append(time.perf_counter() - t0)
+
+    timings.sort()
+    assert timings[int(len(timings) * 0.95)] < 0.005
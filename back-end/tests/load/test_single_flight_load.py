@@ -0,0 +1,61 @@
+"""
+Teste de carga — pico de perguntas idênticas contra o servidor LLM falso.
+
+Simula a rajada causada por uma notificação push: centenas de usuários
+perguntando a mesma coisa ao mesmo tempo. Com o single-flight, o upstream
+recebe uma única chamada; sem coalescência seriam tantas quanto requisições.
+"""
+
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.integrations.llm_client import close_llm_client
+from app.main import app
+from app.repositories.chat_repo import chat_repo
+
+URL = "/v1/chat/conversations/conv-001/messages"
+USERS = 300
+
+
+async def _burst(questions: list[str]) -> list[httpx.Response]:
+    for i in range(len(questions)):
+        chat_repo.create_conversation(f"user-{i}", "conv-001")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as ac:
+        return await asyncio.gather(*[
+            ac.post(
+                URL,
+                json={"content": q},
+                headers={"Authorization": f"Bearer {create_access_token(f'user-{i}')}"},
+            )
+            for i, q in enumerate(questions)
+        ])
+
+
+async def test_identical_burst_hits_upstream_once(fake_llm, monkeypatch):
+    monkeypatch.setattr(settings, "answer_cache_enabled", False)  # isola o efeito do single-flight
+    await close_llm_client()
+    try:
+        responses = await _burst(["O que a reflexão de hoje ensina sobre Josué?"] * USERS)
+        assert all(r.status_code == 201 for r in responses)
+        assert len({r.json()["assistant_message"]["content"] for r in responses}) == 1
+
+        upstream = len(fake_llm.requests)
+        print(f"\n{USERS} requisições idênticas → {upstream} chamada(s) ao upstream")
+        assert upstream == 1
+    finally:
+        await close_llm_client()
+
+
+async def test_distinct_questions_are_not_coalesced(fake_llm, monkeypatch):
+    monkeypatch.setattr(settings, "answer_cache_enabled", False)
+    await close_llm_client()
+    try:
+        responses = await _burst([f"Pergunta número {i} sobre Josué" for i in range(20)])
+        assert all(r.status_code == 201 for r in responses)
+        assert len(fake_llm.requests) == 20
+    finally:
+        await close_llm_client()
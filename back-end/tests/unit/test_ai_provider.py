@@ -0,0 +1,122 @@
+"""
+Testes unitários — provedor com prazo por chamada e requisições hedged.
+"""
+
+import asyncio
+
+import pytest
+
+from app.integrations.ai_provider import AIProvider, DeadlineExceededError, HedgedProvider, LatencyTracker
+
+
+class ScriptedProvider(AIProvider):
+    """Cada chamada consome a próxima latência do roteiro (em segundos)."""
+
+    def __init__(self, latencies: list[float], tokens: list[str] | None = None) -> None:
+        self.latencies = list(latencies)
+        self.tokens = tokens or ["Paz", " seja", " convosco."]
+        self.calls = 0
+        self.cancelled = 0
+
+    async def complete(self, messages, max_tokens=600, temperature=0.7) -> str:
+        attempt = self.calls
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latencies[attempt])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"resposta {attempt}"
+
+    async def stream(self, messages, max_tokens=600, temperature=0.7):
+        attempt = self.calls
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latencies[attempt])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        for token in self.tokens:
+            yield f"{token}#{attempt}"
+
+
+MESSAGES = [{"role": "user", "content": "Oi"}]
+
+
+def test_latency_tracker_p95():
+    tracker = LatencyTracker(min_samples=20)
+    for i in range(19):
+        tracker.record(i / 100)
+    assert tracker.p95() is None
+    for i in range(19, 100):
+        tracker.record(i / 100)
+    assert tracker.p95() == pytest.approx(0.94)
+
+
+async def test_fast_call_does_not_hedge():
+    inner = ScriptedProvider([0.01])
+    provider = HedgedProvider(inner, deadline=1.0, hedge_initial_delay=0.1)
+
+    assert await provider.complete(MESSAGES) == "resposta 0"
+    assert inner.calls == 1
+    assert provider.hedges == 0
+
+
+async def test_slow_call_is_hedged_and_loser_cancelled():
+    inner = ScriptedProvider([0.5, 0.01])
+    provider = HedgedProvider(inner, deadline=1.0, hedge_initial_delay=0.05)
+
+    assert await provider.complete(MESSAGES) == "resposta 1"
+    assert inner.calls == 2
+    assert inner.cancelled == 1
+    assert provider.hedges == 1
+
+
+async def test_deadline_raises_and_cancels_attempts():
+    inner = ScriptedProvider([1.0, 1.0])
+    provider = HedgedProvider(inner, deadline=0.1, hedge_initial_delay=0.05)
+
+    with pytest.raises(DeadlineExceededError):
+        await provider.complete(MESSAGES)
+    assert inner.cancelled == 2
+    assert provider.deadlines_exceeded == 1
+
+
+async def test_hedge_delay_follows_p95():
+    provider = HedgedProvider(ScriptedProvider([]), deadline=10.0, hedge_initial_delay=2.0, hedge_min_delay=0.1)
+    assert provider._hedge_delay(provider.complete_latency) == 2.0
+    for _ in range(50):
+        provider.complete_latency.record(0.3)
+    assert provider._hedge_delay(provider.complete_latency) == pytest.approx(0.3)
+
+    provider.hedge_enabled = False
+    assert provider._hedge_delay(provider.complete_latency) is None
+
+
+async def test_first_failure_waits_for_hedge():
+    class FlakyProvider(ScriptedProvider):
+        async def complete(self, messages, max_tokens=600, temperature=0.7) -> str:
+            if self.calls == 0:
+                self.calls += 1
+                await asyncio.sleep(0.1)
+                raise RuntimeError("falha")
+            return await super().complete(messages)
+
+    inner = FlakyProvider([0.0, 0.2])
+    provider = HedgedProvider(inner, deadline=1.0, hedge_initial_delay=0.05)
+    assert await provider.complete(MESSAGES) == "resposta 1"
+
+
+async def test_stream_hedges_on_first_chunk():
+    inner = ScriptedProvider([0.5, 0.01])
+    provider = HedgedProvider(inner, deadline=1.0, hedge_initial_delay=0.05)
+
+    chunks = [c async for c in provider.stream(MESSAGES)]
+    assert chunks == ["Paz#1", " seja#1", " convosco.#1"]
+    assert inner.cancelled == 1
+
+
+async def test_stream_deadline_before_first_chunk():
+    provider = HedgedProvider(ScriptedProvider([1.0]), deadline=0.05, hedge_enabled=False)
+    with pytest.raises(DeadlineExceededError):
+        [c async for c in provider.stream(MESSAGES)]
@@ -0,0 +1,72 @@
+"""
+Testes unitários — cache de respostas do chat (chave exata, MinHash, TTL e LRU).
+"""
+
+from app.domain.chat.schemas import Citation
+from app.services.answer_cache import AnswerCache, normalize_question
+
+CITACOES = [Citation(reference="Filipenses 4:6-7", book="Filipenses", chapter=4, verse="6-7")]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(**kwargs) -> AnswerCache:
+    params = {"ttl_seconds": 60, "max_bytes": 1_000_000, "similarity": 0.9}
+    params.update(kwargs)
+    return AnswerCache(**params)
+
+
+def test_normalize_question_folds_case_accents_and_punctuation():
+    assert normalize_question("  O que a Bíblia diz sobre ANSIEDADE?! ") == "o que a biblia diz sobre ansiedade"
+
+
+def test_exact_hit_after_normalization():
+    cache = _cache()
+    cache.put("O que a Bíblia diz sobre ansiedade?", "v1", "Resposta", CITACOES)
+    assert cache.get("o que a biblia diz sobre ansiedade", "v1") == ("Resposta", CITACOES)
+    assert cache.stats.exact_hits == 1
+
+
+def test_near_match_above_threshold_hits():
+    cache = _cache()
+    cache.put("O que a Bíblia diz sobre ansiedade", "v1", "Resposta", [])
+    assert cache.get("O que a Bíblia diz sobre a ansiedade", "v1") == ("Resposta", [])
+    assert cache.stats.near_hits == 1
+
+
+def test_different_question_or_prompt_version_misses():
+    cache = _cache()
+    cache.put("O que a Bíblia diz sobre ansiedade", "v1", "Resposta", [])
+    assert cache.get("Quem foi o profeta Elias?", "v1") is None
+    assert cache.get("O que a Bíblia diz sobre ansiedade", "v2") is None
+    assert cache.stats.misses == 2
+    assert cache.stats.hit_rate == 0.0
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = _cache(ttl_seconds=10, clock=clock)
+    cache.put("O que é fé?", "v1", "Resposta", [])
+    clock.now = 11
+    assert cache.get("O que é fé?", "v1") is None
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_lru_eviction_respects_memory_budget():
+    cache = _cache(max_bytes=4_500)
+    cache.put("Pergunta sobre Moisés", "v1", "A" * 500, [])
+    cache.put("Pergunta sobre Elias", "v1", "B" * 500, [])
+    cache.get("Pergunta sobre Moisés", "v1")  # Moisés passa a ser o mais recente
+    cache.put("Pergunta sobre Josué", "v1", "C" * 500, [])
+
+    assert cache.size_bytes <= 4_500
+    assert cache.stats.evictions >= 1
+    assert cache.get("Pergunta sobre Elias", "v1") is None
+    assert cache.get("Pergunta sobre Moisés", "v1") is not None
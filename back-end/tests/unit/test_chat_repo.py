@@ -0,0 +1,87 @@
+"""
+Testes unitários — store de conversas (log somente-anexação, cabeçalhos e janelas).
+"""
+
+from app.repositories.chat_repo import ConversationStore
+
+
+def _message(i: int, content: str | None = None) -> dict:
+    return {
+        "id": f"msg-{i}",
+        "role": "user" if i % 2 == 0 else "assistant",
+        "content": content or f"Mensagem número {i}",
+        "citations": [],
+        "created_at": f"2024-10-24T10:00:{i:02d}Z",
+    }
+
+
+def _store_with(tmp_path, n: int) -> ConversationStore:
+    store = ConversationStore(tmp_path)
+    store.create_conversation("user-1", "conv-a", "2024-10-24T09:00:00Z")
+    for i in range(n):
+        store.append_message("user-1", "conv-a", _message(i))
+    return store
+
+
+def test_append_maintains_header(tmp_path):
+    store = _store_with(tmp_path, 3)
+    store.append_message("user-1", "conv-a", _message(3, "palavra " * 20))
+
+    header = store.get_conversation("user-1", "conv-a")
+    assert header["message_count"] == 4
+    assert header["updated_at"] == "2024-10-24T10:00:03Z"
+    assert len(header["last_message_preview"]) <= 63
+    assert header["last_message_preview"].endswith("...")
+
+
+def test_list_is_most_recent_first_and_per_user(tmp_path):
+    store = _store_with(tmp_path, 1)
+    store.create_conversation("user-1", "conv-b", "2025-01-01T00:00:00Z")
+    store.create_conversation("user-2", "conv-c")
+
+    assert [h["id"] for h in store.list_conversations("user-1")] == ["conv-b", "conv-a"]
+    assert store.get_conversation("user-2", "conv-a") is None
+
+
+def test_read_last_window_and_cursor(tmp_path):
+    store = _store_with(tmp_path, 10)
+
+    last, start = store.read_messages("user-1", "conv-a", limit=3)
+    assert [m["id"] for m in last] == ["msg-7", "msg-8", "msg-9"]
+    assert start == 7
+
+    older, start = store.read_messages("user-1", "conv-a", limit=3, before=start)
+    assert [m["id"] for m in older] == ["msg-4", "msg-5", "msg-6"]
+
+    first, start = store.read_messages("user-1", "conv-a", limit=10, before=2)
+    assert [m["id"] for m in first] == ["msg-0", "msg-1"]
+    assert start == 0
+
+
+def test_read_handles_empty_and_unicode(tmp_path):
+    store = ConversationStore(tmp_path)
+    store.create_conversation("user-1", "conv-a")
+    assert store.read_messages("user-1", "conv-a", limit=5) == ([], 0)
+
+    store.append_message("user-1", "conv-a", _message(0, "Coração em paz — João 14:27"))
+    store.append_message("user-1", "conv-a", _message(1, "Ação de graças"))
+    messages, _ = store.read_messages("user-1", "conv-a", limit=1, before=1)
+    assert messages[0]["content"] == "Coração em paz — João 14:27"
+
+
+def test_read_keeps_unicode_line_separators_inside_content(tmp_path):
+    store = ConversationStore(tmp_path)
+    store.create_conversation("user-1", "conv-a")
+    content = "Salmo 23\u2028O Senhor é meu pastor\u2029nada me faltará\x85"
+    store.append_message("user-1", "conv-a", _message(0))
+    store.append_message("user-1", "conv-a", _message(1, content))
+    store.append_message("user-1", "conv-a", _message(2))
+
+    messages, start = store.read_messages("user-1", "conv-a", limit=2)
+    assert start == 1
+    assert [m["content"] for m in messages] == [content, _message(2)["content"]]
+
+
+def test_invalid_conversation_id_is_not_found(tmp_path):
+    store = _store_with(tmp_path, 1)
+    assert store.get_conversation("user-1", "../conv-a") is None
@@ -0,0 +1,119 @@
+"""
+Testes unitários — contagem local de tokens e montagem do contexto do chat.
+"""
+
+from app.core.config import settings
+from app.core.tokens import count_message_tokens, count_tokens, truncate_to_tokens
+from app.services import context_builder
+from app.services.context_builder import build_context
+from app.services.prompt_compiler import compile_system_prompt
+
+SYSTEM = "Você é um especialista em Bíblia."
+
+
+def _seed(store, n: int, conversation_id: str = "conv-a") -> None:
+    store.create_conversation("user-1", conversation_id)
+    for i in range(n):
+        store.append_message("user-1", conversation_id, {
+            "id": f"msg-{i}",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Mensagem {i} sobre o Salmo {i + 1}. A fé de Davi sustentou o rei no deserto.",
+            "citations": [],
+            "created_at": f"2024-10-24T10:{i // 60:02d}:{i % 60:02d}Z",
+        })
+
+
+def test_count_tokens_approximates_bpe():
+    assert count_tokens("") == 0
+    assert count_tokens("Deus é amor.") == 4
+    assert count_tokens("misericordiosamente") == 5
+    assert count_tokens("João 3:16") == 4
+
+
+def test_message_tokens_include_overhead():
+    messages = [{"role": "system", "content": "Olá"}, {"role": "user", "content": "Paz"}]
+    assert count_message_tokens(messages) == 3 + 2 * (3 + 1)
+
+
+def test_truncate_to_tokens():
+    text = "No princípio criou Deus os céus e a terra."
+    assert count_tokens(truncate_to_tokens(text, 5)) <= 5
+    assert truncate_to_tokens(text, 1000) == text
+    assert truncate_to_tokens(text, 0) == ""
+
+
+def test_short_conversation_is_sent_verbatim(isolated_chat_repo):
+    _seed(isolated_chat_repo, 2)
+    context = build_context("user-1", "conv-a", "E sobre Josué?", SYSTEM)
+
+    assert [m["role"] for m in context.messages] == ["system", "user", "assistant", "user"]
+    assert context.history_messages == 2
+    assert context.summarized_messages == 0
+    assert context.prompt_tokens == count_message_tokens(context.messages)
+
+
+def test_old_turns_are_folded_into_summary(isolated_chat_repo, monkeypatch):
+    monkeypatch.setattr(settings, "chat_context_recent_turns", 2)
+    _seed(isolated_chat_repo, 10)
+    context = build_context(
+        "user-1", "conv-a", "E sobre Josué?", compile_system_prompt(SYSTEM, {"therapy_goal": "Esperança"})
+    )
+
+    roles = [m["role"] for m in context.messages]
+    assert roles == ["system", "system", "user", "assistant", "user", "assistant", "user"]
+    assert "Objetivo terapêutico: Esperança." in context.messages[0]["content"]
+    assert context.messages[1]["content"].startswith("Resumo da conversa até aqui:")
+    assert context.summarized_messages == 6
+    assert isolated_chat_repo.read_summary("user-1", "conv-a")["upto"] == 6
+
+
+def test_summary_is_updated_incrementally(isolated_chat_repo, monkeypatch):
+    monkeypatch.setattr(settings, "chat_context_recent_turns", 1)
+    _seed(isolated_chat_repo, 6)
+    build_context("user-1", "conv-a", "Pergunta", SYSTEM)
+
+    folded: list[int] = []
+    original = context_builder._fold
+    monkeypatch.setattr(context_builder, "_fold", lambda s, msgs: folded.append(len(msgs)) or original(s, msgs))
+
+    build_context("user-1", "conv-a", "Pergunta", SYSTEM)
+    assert folded == []  # resumo em cache
+
+    for i in range(6, 8):
+        isolated_chat_repo.append_message("user-1", "conv-a", {
+            "id": f"msg-{i}", "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Nova mensagem {i}.", "citations": [], "created_at": "2024-10-24T11:00:00Z",
+        })
+    build_context("user-1", "conv-a", "Pergunta", SYSTEM)
+    assert folded == [2]  # só os turnos que saíram da janela
+
+
+def test_budget_drops_oldest_turns_first(isolated_chat_repo, monkeypatch):
+    _seed(isolated_chat_repo, 8)
+    monkeypatch.setattr(settings, "chat_context_token_budget", 120)
+    context = build_context("user-1", "conv-a", "E sobre Josué?", SYSTEM)
+
+    assert context.prompt_tokens <= 120
+    assert context.messages[0]["content"] == SYSTEM
+    assert context.messages[-1]["content"] == "E sobre Josué?"
+    assert context.messages[-2]["content"].startswith("Mensagem 7")
+    assert context.history_messages < 8
+
+
+def test_turns_over_budget_are_folded_into_summary(isolated_chat_repo, monkeypatch):
+    _seed(isolated_chat_repo, 8)
+    monkeypatch.setattr(settings, "chat_context_token_budget", 160)
+    context = build_context("user-1", "conv-a", "E sobre Josué?", SYSTEM)
+
+    dropped = 8 - context.history_messages
+    assert 0 < dropped < 8
+    assert isolated_chat_repo.read_summary("user-1", "conv-a")["upto"] == dropped
+    assert context.messages[1]["content"].startswith("Resumo da conversa até aqui:")
+    assert context.summarized_messages == dropped
+    assert context.prompt_tokens <= 160
+
+    # com mais orçamento, o que já está no resumo não volta literalmente
+    monkeypatch.setattr(settings, "chat_context_token_budget", 4000)
+    context = build_context("user-1", "conv-a", "E sobre Josué?", SYSTEM)
+    assert context.history_messages == 8 - dropped
+    assert context.summarized_messages == dropped
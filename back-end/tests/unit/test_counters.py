@@ -0,0 +1,115 @@
+"""
+Testes unitários — contadores de uso de mensagens (memória com gravação
+periódica e Redis via fakeredis) e a sobreposição nas fichas de pacientes.
+"""
+
+import threading
+
+import fakeredis
+import pytest
+
+from app.core import counters, storage
+from app.core.counters import InMemoryCounterStore, RedisCounterStore
+from app.core.rate_limit import InMemoryRateLimiter, Quota, RedisRateLimiter
+from app.repositories import patient_repo
+
+
+@pytest.fixture
+def data_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(patient_repo, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return InMemoryCounterStore()
+    return RedisCounterStore(fakeredis.FakeRedis())
+
+
+def test_incr_starts_from_initial(store):
+    assert store.incr("p1", initial=10) == 11
+    assert store.incr("p1", amount=5, initial=0) == 16
+    assert store.get_many(["p1", "p2"]) == {"p1": 16}
+
+
+def test_incr_below_stops_at_limit(store):
+    assert store.incr_below("p1", limit=2, initial=1) == (True, 2)
+    assert store.incr_below("p1", limit=2) == (False, 2)
+    assert store.get_many(["p1"]) == {"p1": 2}
+
+
+def test_concurrent_increments_are_not_lost():
+    store = InMemoryCounterStore()
+
+    def hammer() -> None:
+        for _ in range(500):
+            store.incr_below("p1", limit=1500)
+
+    threads = [threading.Thread(target=hammer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.get_many(["p1"]) == {"p1": 1500}
+
+
+def test_memory_store_flushes_and_reloads(data_dir):
+    store = InMemoryCounterStore(counters.USAGE_FILE)
+    store.incr("p1", initial=3)
+    assert not (data_dir / counters.USAGE_FILE).exists()  # só grava no flush
+
+    store.close()
+    assert InMemoryCounterStore(counters.USAGE_FILE).get_many(["p1"]) == {"p1": 4}
+
+
+def test_flusher_writes_periodically(data_dir):
+    store = InMemoryCounterStore(counters.USAGE_FILE)
+    store.start_flusher(0.01)
+    try:
+        store.incr("p1")
+        for _ in range(200):
+            if storage.read_json(counters.USAGE_FILE) == {"p1": 1}:
+                break
+            threading.Event().wait(0.01)
+        assert storage.read_json(counters.USAGE_FILE) == {"p1": 1}
+    finally:
+        store.close()
+
+
+async def test_redis_limiter_counts_in_the_counter_keyspace():
+    server = fakeredis.FakeServer()
+    store = RedisCounterStore(fakeredis.FakeRedis(server=server))
+    limiter = RedisRateLimiter(fakeredis.FakeAsyncRedis(server=server), 5, 60, 3600)
+
+    decision = await limiter.acquire("user-1", Quota(key="p1", used=7, limit=10))
+    assert decision.messages_used == 8
+    assert store.get_many(["p1"]) == {"p1": 8}
+
+
+async def test_memory_limiter_calls_redis_counters_off_the_event_loop():
+    store = RedisCounterStore(fakeredis.FakeRedis())
+    threads = []
+    incr_below = store.incr_below
+
+    def tracked(*args):
+        threads.append(threading.get_ident())
+        return incr_below(*args)
+
+    store.incr_below = tracked
+    limiter = InMemoryRateLimiter(5, 60, 3600, counters=store)
+
+    decision = await limiter.acquire("user-1", Quota(key="p1", used=7, limit=10))
+    assert decision.messages_used == 8
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_patient_reads_overlay_current_counter(data_dir):
+    patient_repo.save_patients([{"id": "p1", "name": "P1", "messages_used": 2, "sessions": []}])
+    counters.get_counter_store().incr("p1", initial=2)
+
+    assert patient_repo.load_patients()[0]["messages_used"] == 3
+    assert next(patient_repo.iter_patients())["messages_used"] == 3
+    assert patient_repo.update_patient("p1", {"name": "P1b"})["messages_used"] == 3
+    assert storage.read_json("patients.json")[0]["messages_used"] == 2  # ficha não regravada pelo chat
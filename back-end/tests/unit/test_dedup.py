@@ -0,0 +1,73 @@
+"""
+Testes unitários — detecção de reflexões quase duplicadas (SimHash + LSH).
+"""
+
+import random
+
+from app.core.dedup import (
+    SimHashIndex,
+    find_duplicates,
+    format_fingerprint,
+    hamming_distance,
+    simhash,
+)
+
+TEXTO = (
+    "Uma notável imagem em baixo relevo está no jardim do Parlamento israelense, em Jerusalém. "
+    "Arão e Hur sustentam os braços de Moisés enquanto Josué conduz os exércitos israelenses "
+    "para a vitória, lá nas planícies baixas de Refidim. O nome Josué quer dizer Yahweh salva. "
+    "Deus lutaria por ele. Josué é um modelo de fiel obediência."
+)
+
+OUTRO_TEXTO = (
+    "O medo desestabilizou de tal modo o profeta Elias que ele caminhou um dia inteiro à "
+    "procura de um lugar solitário. Ali, sentado debaixo de um zimbro, pediu para morrer. "
+    "As emoções podem nos levar a decisões que comprometem o nosso chamado."
+)
+
+
+def test_simhash_is_deterministic():
+    assert simhash(TEXTO) == simhash(TEXTO)
+    assert simhash("") == 0
+
+
+def test_small_edit_stays_within_distance():
+    editado = TEXTO.replace("Jerusalém.", "Jerusalém!") + " Amém."
+    assert hamming_distance(simhash(TEXTO), simhash(editado)) <= 3
+
+
+def test_unrelated_texts_are_far_apart():
+    assert hamming_distance(simhash(TEXTO), simhash(OUTRO_TEXTO)) > 3
+
+
+def test_index_finds_near_duplicate_and_ignores_excluded_key():
+    index = SimHashIndex()
+    fp = simhash(TEXTO)
+    index.add("post-a", fp)
+
+    assert index.find_duplicate(fp ^ 0b101) == "post-a"
+    assert index.find_duplicate(fp, exclude="post-a") is None
+    assert index.find_duplicate(simhash(OUTRO_TEXTO)) is None
+
+
+def test_find_duplicates_keeps_oldest_post():
+    # Listagem gravada do mais novo para o mais antigo
+    posts = [
+        {"id": "post-novo", "body_text": TEXTO + " Amém."},
+        {"id": "post-outro", "body_text": OUTRO_TEXTO},
+        {"id": "post-antigo", "body_text": TEXTO},
+    ]
+    duplicates = find_duplicates(posts)
+    assert [(dup, orig) for dup, orig, _ in duplicates] == [("post-novo", "post-antigo")]
+    assert all("simhash" in p for p in posts)
+
+
+def test_find_duplicates_uses_stored_fingerprints():
+    rng = random.Random(42)
+    posts = [
+        {"id": f"post-{i}", "body_text": "x", "simhash": format_fingerprint(rng.getrandbits(64))}
+        for i in range(2000)
+    ]
+    posts.append({"id": "post-copia", "body_text": "x", "simhash": posts[10]["simhash"]})
+    duplicates = find_duplicates(list(reversed(posts)))
+    assert duplicates == [("post-copia", "post-10", 0)]
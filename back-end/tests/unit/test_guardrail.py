@@ -0,0 +1,83 @@
+"""
+Testes unitários — autômato Aho-Corasick e varredura incremental de `avoid_topics`.
+"""
+
+import random
+
+import pytest
+
+from app.core.guardrail import AhoCorasick, GuardrailViolation, TopicGuard, normalize_topic
+
+
+def _stream(guard: TopicGuard, chunks: list[str]) -> tuple[str, str | None]:
+    """Texto liberado e tema que interrompeu (ou None)."""
+    guarded = guard.stream()
+    released = ""
+    try:
+        for chunk in chunks:
+            released += guarded.feed(chunk)
+        released += guarded.finish()
+    except GuardrailViolation as exc:
+        return released + exc.safe_text, exc.topic
+    return released, None
+
+
+def test_automaton_matches_like_naive_search():
+    rng = random.Random(3)
+    patterns = {"he": "he", "she": "she", "his": "his", "hers": "hers", "ab": "ab", "bab": "bab"}
+    automaton = AhoCorasick(patterns)
+    for _ in range(200):
+        text = "".join(rng.choice("abehirs") for _ in range(30))
+        state, found = 0, set()
+        for c in text:
+            state = automaton.step(state, c)
+            if automaton.output(state):
+                found.add(automaton.output(state))
+        # o autômato reporta o maior termo que termina em cada posição
+        ends = {i for p in patterns for i in range(len(text)) if text[: i + 1].endswith(p)}
+        assert bool(found) == bool(ends)
+        assert found <= {p for p in patterns if p in text}
+
+
+def test_normalizes_case_accents_and_punctuation():
+    guard = TopicGuard(["Detalhes do falecimento"])
+    assert normalize_topic("  Óbito,  SÚBITO! ") == "obito subito"
+    assert guard.check("Os DETALHES — do   falecimento não importam") == "Detalhes do falecimento"
+    assert guard.check("Os detalhes do falecimento.") == "Detalhes do falecimento"
+    assert guard.check("Detalhes do falecido") is None
+
+
+def test_matches_whole_words_and_synonyms():
+    guard = TopicGuard(["luto", "morte"])
+    assert guard.check("Ele estava absoluto na fé") is None
+    assert guard.check("O lutador venceu") is None
+    assert guard.check("Luto") == "luto"
+    assert guard.check("Após o óbito do pai") == "morte"
+    assert not TopicGuard([])
+    assert not TopicGuard(["  ", "!!"])
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13])
+def test_chunk_boundaries_never_leak_a_term(size):
+    guard = TopicGuard(["detalhes do falecimento"])
+    text = "Deus consola quem chora. Sobre os detalhes do falecimento, prefiro não falar."
+    chunks = [text[i:i + size] for i in range(0, len(text), size)]
+
+    released, topic = _stream(guard, chunks)
+    assert topic == "detalhes do falecimento"
+    assert "detalhes" not in released
+    assert text.startswith(released)
+    assert released.startswith("Deus consola quem chora. Sobre os")
+
+
+def test_clean_text_is_released_intact_and_holdback_is_bounded():
+    guard = TopicGuard(["luto"])
+    text = "O Senhor é o meu pastor; nada me faltará. Lutar pela fé é bom."
+    released, topic = _stream(guard, [text[i:i + 4] for i in range(0, len(text), 4)])
+    assert topic is None
+    assert released == text
+
+    guarded = guard.stream()
+    assert guarded.feed("Sobre o lu") == "Sobre o"  # " lu" pode virar " luto "
+    assert guarded.feed("gar") == " lugar"
+    assert guarded.finish() == ""
@@ -0,0 +1,125 @@
+"""
+Testes unitários — favoritos por usuário (log de operações, compactação,
+importação do arquivo legado), títulos/tags vindos do catálogo de posts e
+histórico de leitura particionado por mês.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from app.core import storage
+from app.core.dependencies import MOCK_USER_ID
+from app.repositories import library_repo, post_repo
+from app.repositories.library_repo import CompactionStats, FavoriteStore, HistoryStore, load_favorites
+
+
+@pytest.fixture
+def data_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(post_repo, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+def test_add_and_remove_are_idempotent_and_per_user(tmp_path):
+    store = FavoriteStore(tmp_path, legacy_file=None)
+    assert store.add("u1", ["p1", "p2", "p1"]) == ["p1", "p2"]
+    assert store.add("u1", ["p2", "p3"]) == ["p3"]
+    assert store.remove("u1", ["p2", "p9"]) == ["p2"]
+
+    assert store.post_ids("u1") == {"p1", "p3"}
+    assert store.post_ids("u2") == set()
+    assert [e["post_id"] for e in store.entries("u1")] == ["p3", "p1"]
+
+
+def test_log_is_replayed_after_restart(tmp_path):
+    store = FavoriteStore(tmp_path, legacy_file=None)
+    store.apply("u1", add=["p1", "p2", "p3"], remove=[])
+    store.apply("u1", add=["p4"], remove=["p1"])
+
+    reloaded = FavoriteStore(tmp_path, legacy_file=None)
+    assert reloaded.post_ids("u1") == {"p2", "p3", "p4"}
+    assert reloaded.contains("u1", "p4") and not reloaded.contains("u1", "p1")
+
+
+def test_log_is_compacted_when_mostly_dead(tmp_path):
+    store = FavoriteStore(tmp_path, legacy_file=None)
+    for _ in range(50):
+        store.add("u1", ["p1"])
+        store.remove("u1", ["p1"])
+    store.add("u1", ["p2"])
+
+    lines = store._path("u1").read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 2 + library_repo._COMPACT_SLACK
+    assert FavoriteStore(tmp_path, legacy_file=None).post_ids("u1") == {"p2"}
+
+
+def test_legacy_global_favorites_go_to_the_mock_user(data_dir):
+    storage.write_json("favorites.json", [
+        {"id": "fav-1", "post_id": "post-x", "title": "Antigo", "subtitle": "", "saved_at": "2024-10-20", "tags": ["Fé"]},
+    ])
+    store = FavoriteStore(data_dir / "favorites")
+    assert store.post_ids(MOCK_USER_ID) == {"post-x"}
+    assert store.post_ids("outro") == set()
+
+    assert FavoriteStore(data_dir / "favorites", legacy_file=None).post_ids(MOCK_USER_ID) == {"post-x"}
+
+
+def test_load_favorites_hydrates_titles_and_tags_in_bulk(data_dir, isolated_favorites):
+    storage.write_json("posts.json", [{"id": "post-a", "title": "Título A", "tags": ["Paz"]}])
+    isolated_favorites.add("u1", ["post-a", "post-sumido"])
+
+    items = {i.post_id: i for i in load_favorites("u1")}
+    assert (items["post-a"].title, items["post-a"].tags) == ("Título A", ["Paz"])
+    assert items["post-sumido"].title == "Post post-sumido"
+    assert items["post-a"].id == "fav-post-a"
+
+
+# ── Histórico de leitura ──────────────────────────────────────────────────────
+
+def _at(day: str, hour: int = 12) -> datetime:
+    return datetime.fromisoformat(f"{day}T{hour:02d}:00:00+00:00")
+
+
+def test_history_is_partitioned_by_month_and_deduplicated(tmp_path):
+    store = HistoryStore(tmp_path)
+    store.record("u1", "p1", _at("2026-09-30"))
+    store.record("u1", "p2", _at("2026-10-02"))
+    store.record("u1", "p1", _at("2026-10-03", 9))
+    store.record("u1", "p1", _at("2026-10-03", 8))
+
+    directory = next(tmp_path.iterdir())
+    assert sorted(p.name for p in directory.iterdir()) == ["2026-09.jsonl", "2026-10.jsonl"]
+
+    reads = store.last_reads("u1")
+    assert [(r["post_id"], r["read_at"][:13]) for r in reads] == [("p1", "2026-10-03T09"), ("p2", "2026-10-02T12")]
+    assert [r["post_id"] for r in store.last_reads("u1", date(2026, 9, 1), date(2026, 9, 30))] == ["p1"]
+    assert store.last_reads("u2") == []
+
+
+def test_period_query_opens_only_the_months_in_range(tmp_path, monkeypatch):
+    store = HistoryStore(tmp_path)
+    for month in range(1, 11):
+        store.record("u1", f"p{month}", _at(f"2026-{month:02d}-15"))
+    opened = []
+    real_read_log = library_repo._read_log
+    monkeypatch.setattr(library_repo, "_read_log", lambda path: opened.append(path.stem) or real_read_log(path))
+
+    reads = store.last_reads("u1", date(2026, 9, 10), date(2026, 10, 16))
+    assert [r["post_id"] for r in reads] == ["p10", "p9"]
+    assert opened == ["2026-09", "2026-10"]
+
+
+def test_compaction_keeps_one_read_per_post_and_day_in_closed_months(tmp_path):
+    store = HistoryStore(tmp_path)
+    for hour in range(10):
+        store.record("u1", "p1", _at("2026-09-01", hour))
+        store.record("u1", "p1", _at("2026-10-01", hour))
+    store.record("u1", "p1", _at("2026-09-02"))
+    before = store.last_reads("u1", date(2026, 9, 1), date(2026, 9, 1))
+
+    stats = store.compact(today=date(2026, 10, 19))
+    assert stats == CompactionStats(partitions=1, lines_before=11, lines_after=2)
+    assert store.last_reads("u1", date(2026, 9, 1), date(2026, 9, 1)) == before
+    assert len(store.last_reads("u1")) == 1
+    assert store.compact(today=date(2026, 10, 19)).lines_after == 2  # mês corrente intocado
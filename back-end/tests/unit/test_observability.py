@@ -0,0 +1,74 @@
+"""
+Testes unitários — histogramas de latência do chat.
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.core.observability import LATENCY_BUCKETS, ChatMetrics, Histogram
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    h = Histogram(LATENCY_BUCKETS)
+    for _ in range(90):
+        h.observe(0.3)  # bucket (0.25, 0.5]
+    for _ in range(10):
+        h.observe(5.0)  # bucket (4, 8]
+
+    assert h.count == 100
+    assert 0.25 < h.quantile(0.5) <= 0.5
+    assert 4.0 < h.quantile(0.95) <= 5.0  # limitado pelo máximo observado
+    assert h.quantile(0.99) <= 5.0
+
+
+def test_histogram_overflow_bucket_and_empty():
+    h = Histogram((1.0, 2.0))
+    assert h.quantile(0.5) is None
+    h.observe(10.0)
+    assert h.counts == [0, 0, 1]
+    assert h.quantile(0.5) == pytest.approx(6.0)
+    assert h.summary()["buckets"][-1] == {"le": None, "count": 1}
+
+
+def test_chat_metrics_series_by_model_and_user_kind():
+    metrics = ChatMetrics()
+    metrics.record("gpt-4o-mini", "user", ttft=0.2, total=1.2, prompt_tokens=300, completion_tokens=50)
+    metrics.record("gpt-4o-mini", "patient", ttft=0.1, total=0.1, prompt_tokens=0, completion_tokens=40, cache_hit=True)
+    metrics.record_error("gpt-4o-mini", "user")
+
+    series = {s["user_kind"]: s for s in metrics.snapshot()}
+    assert series["user"]["requests"] == 2
+    assert series["user"]["errors"] == 1
+    assert series["user"]["tokens_per_second"]["max"] == pytest.approx(50.0)
+    assert series["patient"]["cache_hits"] == 1
+    assert series["patient"]["prompt_tokens"]["count"] == 0  # acerto de cache não gera tokens
+
+    p95, samples = metrics.total_latency_p95()
+    assert samples == 2
+    assert p95 <= 1.2
+
+
+def test_latency_alert_window_forgets_old_samples(monkeypatch):
+    monkeypatch.setattr(settings, "chat_latency_alert_window_seconds", 100.0)
+    clock = FakeClock()
+    metrics = ChatMetrics(clock=clock)
+    for _ in range(10):
+        metrics.record("gpt-4o-mini", "user", ttft=0.1, total=20.0, prompt_tokens=10, completion_tokens=10)
+
+    clock.now = 55.0
+    metrics.record("gpt-4o-mini", "user", ttft=0.1, total=0.3, prompt_tokens=10, completion_tokens=10)
+    assert metrics.recent_latency_p95() == (pytest.approx(20.0), 11)
+
+    clock.now = 105.0  # as lentas saíram da janela; a recente continua
+    p95, samples = metrics.recent_latency_p95()
+    assert samples == 1
+    assert p95 <= 0.3
+    assert metrics.total_latency_p95()[1] == 11  # o acumulado de /metrics não esquece
@@ -0,0 +1,81 @@
+"""
+Testes unitários — exportação em fluxo de pacientes e leitura incremental do arquivo.
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import date
+
+from app.core.config import settings
+from app.repositories import patient_repo
+from app.repositories.patient_repo import MOCK_PATIENTS, iter_patients
+from app.services import patient_export
+from app.services.patient_export import SESSION_COLUMNS, export_patients
+
+
+def _patient(pid: str, status: str, created: str, sessions: int) -> dict:
+    return {
+        "id": pid,
+        "name": f"Paciente {pid}",
+        "email": f"{pid}@email.com",
+        "status": status,
+        "created_at": f"{created}T10:00:00Z",
+        "focus_topics": ["sono", "luto"],
+        "sessions": [
+            {
+                "id": f"{pid}-s{i}",
+                "patient_id": pid,
+                "date": "2025-03-01",
+                "summary": "Resumo, com vírgula",
+                "mood": "good",
+                "topics_covered": ["sono"],
+                "created_at": "2025-03-01T10:00:00Z",
+            }
+            for i in range(sessions)
+        ],
+    }
+
+
+PATIENTS = [
+    _patient("p1", "active", "2025-01-10", 2),
+    _patient("p2", "paused", "2025-02-10", 0),
+    _patient("p3", "active", "2025-03-10", 1),
+]
+
+
+def test_iter_patients_reads_the_file_incrementally(monkeypatch, tmp_path):
+    monkeypatch.setattr(patient_repo, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(patient_repo, "_READ_CHUNK", 5)
+    (tmp_path / "patients.json").write_text(json.dumps(MOCK_PATIENTS, indent=2), encoding="utf-8")
+    assert list(iter_patients()) == MOCK_PATIENTS
+
+
+def test_ndjson_export_filters_by_status_and_date(monkeypatch):
+    monkeypatch.setattr(patient_export, "iter_patients", lambda: iter(PATIENTS))
+    body = b"".join(export_patients("ndjson", {"active"}, created_from=date(2025, 2, 1)))
+    records = [json.loads(line) for line in body.decode().splitlines()]
+    assert [r["id"] for r in records] == ["p3"]
+    assert records[0]["sessions"][0]["id"] == "p3-s0"
+
+
+def test_csv_export_has_one_row_per_session(monkeypatch):
+    monkeypatch.setattr(patient_export, "iter_patients", lambda: iter(PATIENTS))
+    rows = list(csv.DictReader(io.StringIO(b"".join(export_patients("csv")).decode())))
+    assert [(r["id"], r["session_id"]) for r in rows] == [("p1", "p1-s0"), ("p1", "p1-s1"), ("p2", ""), ("p3", "p3-s0")]
+    assert rows[0]["focus_topics"] == "sono;luto"
+    assert rows[0]["session_summary"] == "Resumo, com vírgula"
+    assert "session_patient_id" not in SESSION_COLUMNS
+
+
+def test_gzip_stream_starts_early_and_decompresses(monkeypatch):
+    many = [_patient(f"p{i}", "active", "2025-01-10", 3) for i in range(300)]
+    monkeypatch.setattr(patient_export, "iter_patients", lambda: iter(many))
+    monkeypatch.setattr(settings, "patient_export_chunk_bytes", 4096)
+
+    chunks = export_patients("ndjson", gzip=True)
+    first = next(chunks)
+    assert first  # o primeiro registro sai antes de percorrer os demais
+    body = gzip.decompress(first + b"".join(chunks)).decode()
+    assert len(body.splitlines()) == 300
@@ -0,0 +1,68 @@
+"""
+Testes unitários — importação em lote de pacientes (CSV/NDJSON em fluxo).
+"""
+
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services import patient_import
+from app.services.patient_import import import_patients, iter_lines
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Lotes gravados, um por chamada de `add_patients`."""
+    patients = [{"id": "pat-001", "email": "ana@email.com"}]
+    saved = []
+    monkeypatch.setattr(patient_import, "iter_patients", lambda: iter(patients))
+    monkeypatch.setattr(patient_import, "add_patients", lambda batch: saved.append(list(batch)))
+    return saved
+
+
+async def test_lines_survive_chunks_split_inside_characters():
+    data = "nome\r\nJoão Conceição\nÚltima".encode("utf-8")
+    lines = [line async for line in iter_lines(_chunks(data, size=3))]
+    assert lines == ["nome", "João Conceição", "Última"]
+
+
+async def test_csv_import_validates_rows_and_reports_errors(store):
+    csv_body = (
+        "name,email,focus_topics,messages_limit,suicidal_ideation\n"
+        'Bia,bia@email.com,"ansiedade; sono",50,false\n'
+        "Sem email,,,,\n"
+        'Caio,caio@email.com,"luto\nfamília",,\n'
+        "Ana de novo,ANA@email.com,,,\n"
+        "Curta,curta@email.com\n"
+    ).encode("utf-8")
+    created = []
+    report = await import_patients(_chunks(csv_body), "csv", on_batch=created.extend)
+
+    assert (report.imported, report.failed) == (2, 3)
+    assert [e.line for e in report.errors] == [3, 6, 7]
+    assert "email" in report.errors[0].errors[0]
+    assert "já cadastrado" in report.errors[1].errors[0]
+    bia, caio = created
+    assert (bia["focus_topics"], bia["messages_limit"]) == (["ansiedade", "sono"], 50)
+    assert caio["focus_topics"] == ["luto\nfamília"]
+    assert [[p["email"] for p in batch] for batch in store] == [["bia@email.com", "caio@email.com"]]
+
+
+async def test_ndjson_import_in_batches_with_capped_errors(store, monkeypatch):
+    monkeypatch.setattr(settings, "patient_import_batch_size", 3)
+    monkeypatch.setattr(settings, "patient_import_max_errors", 2)
+    lines = [json.dumps({"name": f"P{i}", "email": f"p{i}@email.com"}) for i in range(7)]
+    lines += ["{quebrado", "[1, 2]", json.dumps({"name": "Sem email"})]
+    batches = []
+    report = await import_patients(_chunks("\n".join(lines).encode()), "ndjson", on_batch=batches.append)
+
+    assert (report.imported, report.failed) == (7, 3)
+    assert [e.line for e in report.errors] == [8, 9]
+    assert [len(batch) for batch in store] == [3, 3, 1]  # uma gravação por lote, assim que ele fecha
+    assert batches == store
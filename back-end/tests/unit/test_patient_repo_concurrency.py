@@ -0,0 +1,61 @@
+"""
+Testes unitários — compare-and-swap do armazenamento e versões dos registros de pacientes.
+"""
+
+import threading
+
+import pytest
+
+from app.core import storage
+from app.repositories import patient_repo
+from app.repositories.patient_repo import SessionNotFound, VersionConflict, update_patient, update_session
+
+
+@pytest.fixture
+def patients_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(patient_repo, "DATA_DIR", tmp_path)
+    patients = [
+        {"id": f"p{i}", "name": f"P{i}", "therapy_goal": None, "sessions": [{"id": f"s{i}", "mood": "good"}]}
+        for i in range(4)
+    ]
+    storage.write_json("patients.json", patients)
+    return tmp_path
+
+
+def test_compare_and_swap_rejects_stale_token(patients_file):
+    data, token = storage.read_json_versioned("patients.json")
+    storage.write_json("patients.json", data)  # outro escritor grava no meio tempo
+    assert not storage.compare_and_swap("patients.json", token, [])
+    assert storage.read_json("patients.json") == data
+    assert not list(patients_file.glob("*.tmp"))
+
+
+def test_concurrent_writes_to_different_patients_are_not_lost(patients_file):
+    def edit(patient_id: str) -> None:
+        for n in range(15):
+            update_patient(patient_id, {"therapy_goal": f"{patient_id}-{n}"})
+
+    threads = [threading.Thread(target=edit, args=(f"p{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    patients = storage.read_json("patients.json")
+    assert [(p["therapy_goal"], p["version"]) for p in patients] == [(f"p{i}-14", 16) for i in range(4)]
+
+
+def test_if_match_versions(patients_file):
+    assert update_patient("p0", {"name": "Novo"}, if_match={1})["version"] == 2
+    with pytest.raises(VersionConflict) as exc:
+        update_patient("p0", {"name": "Atrasado"}, if_match={1})
+    assert exc.value.current == 2
+
+    patient, session = update_session("p1", "s1", {"mood": "low"}, if_match={1})
+    assert (session["version"], patient["version"]) == (2, 2)
+    with pytest.raises(VersionConflict):
+        update_session("p1", "s1", {"mood": "great"}, if_match={1})
+    with pytest.raises(SessionNotFound):
+        update_session("p1", "s9", {"mood": "great"})
+    assert storage.read_json("patients.json")[0]["name"] == "Novo"
@@ -0,0 +1,76 @@
+"""
+Testes unitários — busca de pacientes por trigramas.
+"""
+
+from app.services.patient_search import PatientSearchIndex, fold, trigrams
+
+
+def _patient(pid: str, name: str, email: str) -> dict:
+    return {
+        "id": pid,
+        "name": name,
+        "email": email,
+        "status": "active",
+        "messages_used": 0,
+        "messages_limit": 100,
+        "created_at": "2025-01-01T00:00:00Z",
+        "sessions": [{"id": "s1"}],
+    }
+
+
+PATIENTS = [
+    _patient("p1", "João Conceição", "joao.c@example.com"),
+    _patient("p2", "Maria Aparecida Souza", "cida@example.com"),
+    _patient("p3", "Mariana Lopes", "mari.lopes@example.com"),
+    _patient("p4", "Pedro Álvares", "pedro@example.com"),
+]
+
+
+def _index() -> PatientSearchIndex:
+    index = PatientSearchIndex()
+    index.rebuild(PATIENTS)
+    return index
+
+
+def _ids(index: PatientSearchIndex, query: str) -> list[str]:
+    return [s["id"] for s in index.search(query)[0]]
+
+
+def test_fold_and_trigrams():
+    assert fold("João.Conceição@Exemplo") == "joao conceicao exemplo"
+    assert trigrams("Jo") == {"  j", " jo", "jo "}
+
+
+def test_search_folds_accents_and_tolerates_typos():
+    index = _index()
+    assert _ids(index, "joao")[0] == "p1"
+    assert _ids(index, "conceicão")[0] == "p1"
+    assert _ids(index, "concieção")[0] == "p1"  # letras trocadas
+    assert _ids(index, "cida@example")[0] == "p2"
+    assert _ids(index, "xyzw") == []
+
+
+def test_ranking_prefers_the_closest_field():
+    index = _index()
+    assert _ids(index, "maria")[:2] == ["p2", "p3"]
+    assert _ids(index, "mariana")[0] == "p3"
+
+
+def test_results_are_summaries_and_paged():
+    index = _index()
+    page, total = index.search(None, offset=1, limit=2)
+    assert total == 4
+    assert [s["id"] for s in page] == ["p2", "p3"]
+    assert "sessions" not in page[0]
+
+
+def test_index_follows_edits_and_usage():
+    index = _index()
+    renamed = {**PATIENTS[3], "name": "Pietro Costa"}
+    index.patient_saved(renamed)
+    index.messages_used_changed("p4", 42)
+
+    assert _ids(index, "pedro") == ["p4"]  # ainda casa pelo e-mail
+    [summary], _ = index.search("pietro")
+    assert (summary["name"], summary["messages_used"]) == ("Pietro Costa", 42)
+    assert _ids(index, "alvares") == []
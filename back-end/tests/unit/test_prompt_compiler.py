@@ -0,0 +1,110 @@
+"""
+Testes unitários — prompt de sistema compilado por paciente e invalidação do cache.
+"""
+
+from app.services import prompt_compiler as compiler_module
+from app.services.prompt_compiler import (
+    SYSTEM_PROMPT,
+    SYSTEM_PROMPT_VERSION,
+    PromptCompiler,
+    compile_system_prompt,
+    patient_guidelines,
+)
+
+PATIENTS = {
+    "user-pac-1": {
+        "id": "pat-1",
+        "therapy_goal": "Elaboração do luto",
+        "focus_topics": ["luto", "família"],
+        "avoid_topics": ["detalhes do falecimento"],
+        "response_depth": "detailed",
+    },
+}
+
+
+def _compiler(monkeypatch, patients: dict) -> PromptCompiler:
+    lookups: list[str] = []
+
+    def find(user_id: str):
+        lookups.append(user_id)
+        return patients.get(user_id)
+
+    monkeypatch.setattr(compiler_module, "find_patient_by_user", find)
+    compiler = PromptCompiler()
+    compiler.lookups = lookups
+    return compiler
+
+
+def test_patient_guidelines():
+    assert patient_guidelines(None) is None
+    text = patient_guidelines({"therapy_goal": "Reduzir ansiedade", "avoid_topics": ["morte"], "response_depth": "brief"})
+    assert "Reduzir ansiedade" in text
+    assert "Temas a evitar: morte." in text
+    assert "respostas breves" in text
+
+
+def test_compiled_prompt_keeps_shared_prefix():
+    prompt = compile_system_prompt(SYSTEM_PROMPT, PATIENTS["user-pac-1"])
+    assert prompt.startswith(SYSTEM_PROMPT + "\n\n")
+    assert "Temas a enfatizar: luto, família." in prompt
+    assert compile_system_prompt(SYSTEM_PROMPT, None) is SYSTEM_PROMPT
+
+
+def test_prompt_is_compiled_once_and_reused(monkeypatch):
+    compiler = _compiler(monkeypatch, dict(PATIENTS))
+    first = compiler.for_user("user-pac-1")
+    second = compiler.for_user("user-pac-1")
+
+    assert second is first
+    assert compiler.lookups == ["user-pac-1"]
+    assert first.patient["id"] == "pat-1"
+    assert first.version != SYSTEM_PROMPT_VERSION
+
+    plain = compiler.for_user("user-comum")
+    assert plain.patient is None
+    assert plain.system_prompt == SYSTEM_PROMPT
+    assert plain.version == SYSTEM_PROMPT_VERSION
+
+
+def test_invalidate_recompiles_only_affected_users(monkeypatch):
+    patients = {**PATIENTS, "user-pac-2": {"id": "pat-2", "therapy_goal": "Autoestima"}}
+    compiler = _compiler(monkeypatch, patients)
+    before = compiler.for_user("user-pac-1")
+    other = compiler.for_user("user-pac-2")
+    compiler.for_user("user-novo")
+
+    patients["user-pac-1"] = {**PATIENTS["user-pac-1"], "avoid_topics": []}
+    patients["user-novo"] = {"id": "pat-3", "therapy_goal": "Esperança"}
+    compiler.invalidate("pat-1")
+
+    after = compiler.for_user("user-pac-1")
+    assert "Temas a evitar" not in after.system_prompt
+    assert after.version != before.version
+    assert compiler.for_user("user-pac-2") is other
+    assert compiler.for_user("user-novo").patient["id"] == "pat-3"  # vínculo novo é percebido
+
+
+def test_invalidate_users_keeps_everyone_else(monkeypatch):
+    patients = dict(PATIENTS)
+    compiler = _compiler(monkeypatch, patients)
+    kept = compiler.for_user("user-pac-1")
+    compiler.for_user("user-importado")
+    untouched = compiler.for_user("user-comum")
+
+    patients["user-importado"] = {"id": "pat-9", "therapy_goal": "Esperança"}
+    compiler.invalidate_users(["user-importado"])
+
+    assert compiler.for_user("user-importado").patient["id"] == "pat-9"
+    assert compiler.for_user("user-pac-1") is kept
+    assert compiler.for_user("user-comum") is untouched
+
+
+def test_compilation_racing_with_invalidation_is_not_cached(monkeypatch):
+    compiler = PromptCompiler()
+    monkeypatch.setattr(
+        compiler_module,
+        "find_patient_by_user",
+        lambda user_id: compiler.invalidate("pat-1") or PATIENTS[user_id],
+    )
+    compiler.for_user("user-pac-1")
+    assert compiler._by_user == {}
@@ -0,0 +1,94 @@
+"""
+Testes unitários — vigia de cotas de mensagens (heap + alertas por limiar).
+"""
+
+import random
+
+from app.services import quota_watcher
+from app.services.quota_watcher import QuotaWatcher
+
+
+def _patient(pid: str, used: int, limit: int = 100) -> dict:
+    return {"id": pid, "name": f"Paciente {pid}", "messages_used": used, "messages_limit": limit}
+
+
+def _watcher(patients: list[dict]) -> QuotaWatcher:
+    watcher = QuotaWatcher(thresholds=[0.8, 0.95, 1.0])
+    watcher.rebuild(patients)
+    return watcher
+
+
+def test_top_k_follows_updates_and_matches_sort():
+    rng = random.Random(7)
+    patients = {f"p{i}": _patient(f"p{i}", rng.randint(0, 100), rng.choice([0, 50, 100, 200])) for i in range(200)}
+    watcher = _watcher(list(patients.values()))
+
+    for _ in range(2000):
+        pid = f"p{rng.randrange(200)}"
+        if rng.random() < 0.8:
+            patients[pid]["messages_used"] += 1
+            watcher.update_usage(pid, patients[pid]["messages_used"])
+        else:
+            patients[pid]["messages_limit"] = rng.choice([0, 50, 100, 200])
+            p = patients[pid]
+            watcher.update(pid, p["name"], p["messages_used"], p["messages_limit"])
+
+    def ratio(p: dict) -> float:
+        return p["messages_used"] / p["messages_limit"] if p["messages_limit"] > 0 else 0.0
+
+    expected = sorted((ratio(p) for p in patients.values()), reverse=True)[:15]
+    assert [e.ratio for e in watcher.top(15)] == expected
+    stale = len(watcher._heap) - len(patients)  # entradas obsoletas compactadas
+    assert stale <= quota_watcher._MAX_STALE_FRACTION * len(patients) + quota_watcher._STALE_SLACK
+
+
+def test_near_limit_stops_at_lowest_threshold():
+    watcher = _watcher([_patient("a", 79), _patient("b", 80), _patient("c", 99), _patient("d", 5, limit=0)])
+    assert [e.patient_id for e in watcher.near_limit()] == ["c", "b"]
+    assert [e.patient_id for e in watcher.top(1)] == ["c"]
+
+
+def test_alerts_escalate_on_crossing_and_clear_when_limit_is_raised():
+    watcher = _watcher([_patient("a", 70)])
+    assert watcher.alerts() == []
+
+    watcher.update_usage("a", 80)
+    [alert] = watcher.alerts()
+    assert (alert.id, alert.level) == ("alert-quota-a", "warning")
+    first_triggered = alert.triggered_at
+
+    watcher.update_usage("a", 81)  # mesmo limiar: o alerta não é disparado de novo
+    assert watcher.alerts()[0].triggered_at == first_triggered
+
+    watcher.update_usage("a", 100)
+    [alert] = watcher.alerts()
+    assert alert.level == "critical" and alert.subtitle == "Message quota reached"
+
+    watcher.update("a", "Paciente a", 100, 200)
+    assert watcher.alerts() == []
+
+
+def test_rebuild_keeps_trigger_time_of_alerts_still_active(monkeypatch):
+    watcher = _watcher([_patient("a", 90), _patient("b", 96), _patient("c", 85)])
+    before = {a.id: a.triggered_at for a in watcher.alerts()}
+    monkeypatch.setattr(quota_watcher, "_now_iso", lambda: "2099-01-01T00:00:00Z")
+
+    watcher.rebuild([_patient("a", 91), _patient("b", 100), _patient("d", 99)])
+    after = {a.id: a.triggered_at for a in watcher.alerts()}
+    assert after["alert-quota-a"] == before["alert-quota-a"]  # continua no mesmo nível
+    assert after["alert-quota-b"] == "2099-01-01T00:00:00Z"  # subiu de nível
+    assert after["alert-quota-d"] == "2099-01-01T00:00:00Z"
+    assert "alert-quota-c" not in after  # saiu do arquivo
+
+
+def test_top_skips_few_stale_entries_after_many_limit_raises(monkeypatch):
+    watcher = _watcher([_patient(f"p{i}", 100 if i < 300 else i % 50) for i in range(400)])
+    for i in range(300):  # limites aumentados: as entradas antigas (100%) ficam no topo do heap
+        watcher.update(f"p{i}", f"Paciente p{i}", 100, 1000)
+
+    visited = []
+    real_heappop = quota_watcher.heapq.heappop
+    monkeypatch.setattr(quota_watcher.heapq, "heappop", lambda heap: visited.append(1) or real_heappop(heap))
+
+    assert [e.ratio for e in watcher.top(5)] == [0.49, 0.49, 0.48, 0.48, 0.47]
+    assert len(visited) <= 5 + quota_watcher._MAX_STALE_FRACTION * 400 + quota_watcher._STALE_SLACK
@@ -0,0 +1,93 @@
+"""
+Testes unitários — limitador do chat (token bucket e cota do paciente),
+em memória e no Redis (fakeredis com suporte a Lua).
+"""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.core.counters import RedisCounterStore
+from app.core.rate_limit import InMemoryRateLimiter, Quota, RedisRateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "memory-redis-counters", "redis"])
+def limiter(request):
+    params = {"burst": 3, "per_minute": 60, "quota_retry_after": 3600}
+    if request.param == "memory":
+        return InMemoryRateLimiter(**params)
+    if request.param == "memory-redis-counters":
+        return InMemoryRateLimiter(counters=RedisCounterStore(fakeredis.FakeRedis()), **params)
+    return RedisRateLimiter(fakeredis.FakeAsyncRedis(), **params)
+
+
+async def test_burst_then_denied_with_retry_after(limiter):
+    results = [await limiter.acquire("user-1") for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[-1].reason == "burst"
+    assert 0 < results[-1].retry_after <= 1.0
+    assert (await limiter.acquire("user-2")).allowed  # buckets independentes
+
+
+async def test_quota_counts_and_blocks(limiter):
+    quota = Quota(key="pat-001", used=98, limit=100)
+
+    first = await limiter.acquire("user-1", quota)
+    second = await limiter.acquire("user-1", quota)
+    third = await limiter.acquire("user-1", quota)
+
+    assert (first.messages_used, second.messages_used) == (99, 100)
+    assert not third.allowed
+    assert third.reason == "quota"
+    assert third.retry_after == 3600
+
+
+async def test_raised_limit_unblocks_quota(limiter):
+    await limiter.acquire("user-1", Quota(key="pat-001", used=5, limit=5))
+    decision = await limiter.acquire("user-1", Quota(key="pat-001", used=5, limit=6))
+    assert decision.allowed
+    assert decision.messages_used == 6
+
+
+async def test_release_returns_the_token_and_the_quota_message(limiter):
+    quota = Quota(key="pat-001", used=9, limit=10)
+    assert (await limiter.acquire("user-1", quota)).messages_used == 10
+    assert await limiter.release("user-1", quota) == 9
+    assert await limiter.release("user-2") is None
+
+    results = [await limiter.acquire("user-1") for _ in range(3)]
+    assert [r.allowed for r in results] == [True, True, True]  # a ficha devolvida voltou ao bucket
+    assert (await limiter.acquire("user-3", quota)).messages_used == 10
+
+
+async def test_concurrent_requests_never_exceed_quota():
+    limiter = RedisRateLimiter(fakeredis.FakeAsyncRedis(), burst=100, per_minute=60, quota_retry_after=60)
+    quota = Quota(key="pat-001", used=0, limit=10)
+
+    results = await asyncio.gather(*[limiter.acquire(f"user-{i}", quota) for i in range(50)])
+
+    assert sum(r.allowed for r in results) == 10
+
+
+async def test_in_memory_bucket_refills_at_sustained_rate():
+    clock = FakeClock()
+    limiter = InMemoryRateLimiter(burst=2, per_minute=30, quota_retry_after=60, clock=clock)
+    assert (await limiter.acquire("user-1")).allowed
+    assert (await limiter.acquire("user-1")).allowed
+
+    denied = await limiter.acquire("user-1")
+    assert denied.retry_after == pytest.approx(2.0)
+
+    clock.now = 2.0
+    assert (await limiter.acquire("user-1")).allowed
+    assert not (await limiter.acquire("user-1")).allowed
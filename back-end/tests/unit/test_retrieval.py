@@ -0,0 +1,133 @@
+"""
+Testes unitários — índice BM25 do acervo devocional e contexto com trechos recuperados.
+"""
+
+import json
+import os
+
+import pytest
+
+from app.core import storage
+from app.core.config import settings
+from app.core.tokens import count_tokens
+from app.repositories.chat_repo import chat_repo
+from app.services import retrieval
+from app.services.context_builder import build_context
+from app.services.retrieval import ArchiveRetriever, BM25Index
+
+POSTS = [
+    {
+        "id": "post-coragem",
+        "title": "A batalha que não é sua!",
+        "reference": "Josué 1:9",
+        "verse_content": "Sê forte e corajoso; não temas, nem te espantes.",
+        "body_text": "Deus está contigo por onde quer que andares.",
+    },
+    {
+        "id": "post-ansiedade",
+        "title": "Entregue suas preocupações",
+        "reference": "Filipenses 4:6",
+        "verse_content": "Não andeis ansiosos de coisa alguma.",
+        "body_text": "A oração transforma a ansiedade em paz.",
+    },
+    {
+        "id": "post-amor",
+        "title": "O maior mandamento",
+        "reference": "1 Coríntios 13:4",
+        "verse_content": "O amor é paciente, o amor é bondoso.",
+        "body_text": "Amar ao próximo é viver a fé no cotidiano.",
+    },
+]
+
+
+@pytest.fixture
+def posts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(retrieval, "DATA_DIR", tmp_path)
+
+    def write(posts: list[dict]) -> None:
+        path = tmp_path / "posts.json"
+        path.write_text(json.dumps(posts, ensure_ascii=False), encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # garante mtime novo
+
+    write(POSTS)
+    return write
+
+
+def test_bm25_ranks_by_relevance_and_folds_accents():
+    index = BM25Index()
+    for post in POSTS:
+        index.upsert(post["id"], post)
+
+    results = index.search("Estou muito ANSIOSO, como orar pela ansiedade?", k=3)
+    assert results[0][0] == "post-ansiedade"
+    assert index.search("corajoso", k=3)[0][0] == "post-coragem"
+    assert index.search("xyz inexistente", k=3) == []
+
+
+def test_bm25_reference_outweighs_body():
+    index = BM25Index()
+    index.upsert("ref", {"reference": "Salmos 23", "body_text": "Texto qualquer."})
+    index.upsert("body", {"reference": "Isaías 40", "body_text": "Como diz salmos, o Senhor é pastor."})
+    assert index.search("salmos", k=2)[0][0] == "ref"
+
+
+def test_upsert_skips_unchanged_and_remove_cleans_postings():
+    index = BM25Index()
+    assert index.upsert("p1", POSTS[0]) is True
+    assert index.upsert("p1", dict(POSTS[0])) is False
+    assert index.upsert("p1", {**POSTS[0], "body_text": "Novo texto sobre esperança."}) is True
+    assert index.search("esperanca", k=1)[0][0] == "p1"
+    assert index.search("andares", k=1) == []
+
+    index.remove("p1")
+    assert len(index) == 0
+    assert index._postings == {} and index._total_length == 0
+
+
+def test_retriever_refreshes_incrementally(posts_dir):
+    retriever = ArchiveRetriever()
+    assert retriever.retrieve("amor paciente").citations[0].post_id == "post-amor"
+
+    calls = []
+    original = retriever.index.upsert
+    retriever.index.upsert = lambda post_id, post: calls.append(post_id) or original(post_id, post)
+
+    retriever.retrieve("amor")  # arquivo não mudou: nada é relido
+    assert calls == []
+
+    edited = [POSTS[0], {**POSTS[1], "body_text": "Esperança renovada."}]
+    posts_dir(edited)
+    result = retriever.retrieve("esperança")
+    assert [c.post_id for c in result.citations] == ["post-ansiedade"]
+    assert "post-amor" not in retriever.index
+    assert len(retriever.index) == 2
+
+
+def test_retriever_formats_passages_within_budget(posts_dir, monkeypatch):
+    monkeypatch.setattr(settings, "rag_context_tokens", 20)
+    result = ArchiveRetriever().retrieve("fé amor forte corajoso ansiosos")
+
+    assert result.context and count_tokens(result.context) <= 20
+    assert result.citations[0].reference in result.context
+    assert result.citations[0].title
+
+
+def test_favorites_boost_marks_result_personalized(posts_dir):
+    retriever = ArchiveRetriever()
+    plain = retriever.retrieve("paz e fé")
+    boosted = retriever.retrieve("paz e fé", favorite_ids={"post-amor"})
+
+    assert plain.personalized is False
+    assert boosted.citations[0].post_id == "post-amor"
+    assert boosted.personalized is True
+
+
+def test_build_context_includes_knowledge():
+    chat_repo.create_conversation("user-1", "conv-a")
+    context = build_context("user-1", "conv-a", "Como vencer o medo?", "Sistema", knowledge="- Josué 1:9: Sê forte.")
+
+    assert context.messages[1]["role"] == "system"
+    assert context.messages[1]["content"].endswith("- Josué 1:9: Sê forte.")
+    assert context.messages[-1]["content"] == "Como vencer o medo?"
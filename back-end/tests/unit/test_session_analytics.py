@@ -0,0 +1,75 @@
+"""
+Testes unitários — séries de humor e temas das sessões terapêuticas.
+"""
+
+import numpy as np
+
+from app.services.session_analytics import SessionAnalytics, rolling_mean
+
+
+def _session(sid: str, date: str, mood: str, topics: list[str]) -> dict:
+    return {"id": sid, "date": date, "mood": mood, "topics_covered": topics}
+
+
+PATIENT = {
+    "id": "p1",
+    "sessions": [
+        _session("s2", "2025-01-08", "neutral", ["Ansiedade", "trabalho"]),
+        _session("s1", "2025-01-01", "very_low", ["ansiedade"]),
+        _session("s3", "2025-01-15", "great", ["Família", " Ansiedade "]),
+    ],
+}
+
+
+def test_rolling_mean_uses_partial_windows():
+    assert rolling_mean(np.array([1, 3, 5, 7]), 2).tolist() == [1.0, 2.0, 4.0, 6.0]
+    assert rolling_mean(np.array([2, 4]), 5).tolist() == [2.0, 3.0]
+
+
+def test_mood_is_ordered_by_date_with_rolling_average():
+    analytics = SessionAnalytics()
+    analytics.rebuild([PATIENT])
+    series = analytics.mood("p1", window=2)
+
+    assert series.session_ids == ["s1", "s2", "s3"]
+    assert series.moods == ["very_low", "neutral", "great"]
+    assert series.rolling.tolist() == [1.0, 2.0, 4.0]
+    assert series.average == 3.0
+    assert analytics.mood("desconhecido", 2) is None
+
+
+def test_topics_are_case_insensitive_and_follow_edits():
+    analytics = SessionAnalytics()
+    analytics.rebuild([PATIENT])
+    topics, total = analytics.top_topics("p1", k=2)
+    assert total == 3
+    assert topics == [("Ansiedade", 3), ("trabalho", 1)]
+
+    analytics.session_saved("p1", _session("s2", "2025-01-08", "good", ["família"]))
+    analytics.session_saved("p1", _session("s4", "2025-01-22", "good", ["Família"]))
+    topics, total = analytics.top_topics("p1", k=5)
+    assert total == 4
+    assert topics == [("Família", 3), ("Ansiedade", 2)]
+    assert analytics.mood("p1", 1).scores.tolist() == [1, 4, 5, 4]
+
+
+def test_series_grow_past_initial_capacity():
+    analytics = SessionAnalytics()
+    analytics.rebuild([{"id": "p1", "sessions": []}])
+    moods = ["very_low", "low", "neutral", "good", "great"]
+    for i in range(300):
+        analytics.session_saved("p1", _session(f"s{i}", f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", moods[i % 5], [f"t{i % 7}"]))
+
+    series = analytics.mood("p1", window=10)
+    assert len(series.scores) == 300 and series.dates == sorted(series.dates)
+    assert sum(count for _, count in analytics.top_topics("p1", k=7)[0]) == 300
+
+
+def test_rows_with_unknown_mood_are_skipped_on_rebuild():
+    patient = {"id": "p1", "sessions": [*PATIENT["sessions"], _session("s9", "2025-01-20", "ansioso", ["sono"])]}
+    patient["sessions"].append({"id": "s10", "date": "2025-01-21", "topics_covered": []})
+    analytics = SessionAnalytics()
+    analytics.rebuild([patient])
+
+    assert analytics.mood("p1", window=2).session_ids == ["s1", "s2", "s3"]
+    assert analytics.top_topics("p1", k=5)[1] == 3
@@ -0,0 +1,118 @@
+"""
+Testes unitários — coalescência single-flight de chamadas idênticas.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight, SingleFlightOverflowError, SingleFlightTimeoutError
+
+
+async def test_concurrent_calls_with_same_key_share_one_execution():
+    flights = SingleFlight(max_waiters=100, timeout=1)
+    calls = 0
+
+    async def upstream() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "resposta"
+
+    results = await asyncio.gather(*[flights.do("k", upstream) for _ in range(50)])
+    assert results == ["resposta"] * 50
+    assert calls == 1
+    assert flights.coalesced == 49
+    assert flights.in_flight() == 0
+
+
+async def test_errors_are_shared_with_waiters():
+    flights = SingleFlight(max_waiters=10, timeout=1)
+
+    async def failing() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream caiu")
+
+    results = await asyncio.gather(*[flights.do("k", failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+async def test_waiter_limit_and_timeout():
+    flights = SingleFlight(max_waiters=1, timeout=0.02)
+
+    async def slow() -> str:
+        await asyncio.sleep(0.2)
+        return "ok"
+
+    leader = asyncio.ensure_future(flights.do("k", slow))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(flights.do("k", slow))
+    await asyncio.sleep(0)
+    with pytest.raises(SingleFlightOverflowError):
+        await flights.do("k", slow)
+    with pytest.raises(SingleFlightTimeoutError):
+        await waiter
+    assert await leader == "ok"
+
+
+async def test_stream_followers_replay_and_follow_the_leader():
+    flights = SingleFlight(max_waiters=10, timeout=1)
+    calls = 0
+
+    async def tokens():
+        nonlocal calls
+        calls += 1
+        for token in ["A", " paz", " de", " Deus"]:
+            await asyncio.sleep(0.01)
+            yield token
+
+    async def consume(delay: float) -> str:
+        await asyncio.sleep(delay)
+        return "".join([t async for t in flights.stream("k", tokens)])
+
+    results = await asyncio.gather(consume(0), consume(0.025), consume(0.035))
+    assert results == ["A paz de Deus"] * 3
+    assert calls == 1
+
+
+async def test_stream_upstream_is_closed_when_the_last_consumer_leaves():
+    flights = SingleFlight(max_waiters=10, timeout=1)
+    produced, closed = [], asyncio.Event()
+
+    async def tokens():
+        try:
+            for i in range(100):
+                await asyncio.sleep(0.01)
+                produced.append(i)
+                yield str(i)
+        finally:
+            closed.set()
+
+    async def take(n: int) -> list[str]:
+        stream = flights.stream("k", tokens)
+        try:
+            return [await anext(stream) for _ in range(n)]
+        finally:
+            await stream.aclose()
+
+    leader, follower = await asyncio.gather(take(2), take(5))
+    assert follower == ["0", "1", "2", "3", "4"]  # a saída de quem iniciou não derruba a carona
+    assert closed.is_set()
+    assert len(produced) < 10
+    assert flights.in_flight() == 0
+
+
+async def test_stream_leader_gives_up_on_a_stuck_upstream():
+    flights = SingleFlight(max_waiters=10, timeout=0.05)
+
+    async def stuck():
+        yield "A"
+        await asyncio.sleep(10)
+        yield " paz"
+
+    received = []
+    with pytest.raises(SingleFlightTimeoutError):
+        async for token in flights.stream("k", stuck):
+            received.append(token)
+    assert received == ["A"]
+    assert flights.in_flight() == 0
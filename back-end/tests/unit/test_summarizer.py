@@ -0,0 +1,47 @@
+"""
+Testes unitários — sumarização extrativa (TF-IDF + TextRank).
+"""
+
+from app.core.summarizer import apply_summaries, summarize_batch
+
+TEXTO = (
+    "Moisés é a figura proeminente do Antigo Testamento. "
+    "Naturalmente acanhado e humilde, Moisés relutou diante do chamado de Deus.\n\n"
+    "Deus chamou Moisés no deserto e Moisés obedeceu ao chamado de Deus. "
+    "O faraó endureceu o coração. "
+    "Através de Moisés, Deus libertou o povo e transformou a maldição em bênção."
+)
+
+
+def test_summary_sentences_come_from_text_in_original_order():
+    [(summary, key_points)] = summarize_batch([TEXTO])
+    assert summary
+    assert all(k in TEXTO for k in key_points)
+    assert 1 <= len(key_points) <= 3
+    assert all(20 < len(k) < 200 for k in key_points)
+    assert [TEXTO.index(k) for k in key_points] == sorted(TEXTO.index(k) for k in key_points)
+
+
+def test_central_sentence_is_ranked_first():
+    [(summary, _)] = summarize_batch([TEXTO], summary_sentences=1)
+    assert "Moisés" in summary and "Deus" in summary
+
+
+def test_batch_keeps_order_and_handles_short_texts():
+    results = summarize_batch([TEXTO, "", "Uma frase só."])
+    assert len(results) == 3
+    assert results[1] == ("", [])
+    assert results[2][0] == "Uma frase só."
+
+
+def test_exhausted_cpu_budget_falls_back_to_lead_sentences():
+    [(summary, _)] = summarize_batch([TEXTO], cpu_budget=-1)
+    assert summary.startswith("Moisés é a figura proeminente")
+
+
+def test_apply_summaries_skips_posts_without_body():
+    posts = [{"id": "a", "body_text": TEXTO}, {"id": "b", "body_text": "", "ai_summary": "x"}]
+    apply_summaries(posts)
+    assert posts[0]["ai_summary"]
+    assert posts[0]["key_points"]
+    assert posts[1]["ai_summary"] == "x"
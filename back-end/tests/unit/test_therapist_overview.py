@@ -0,0 +1,97 @@
+"""
+Testes unitários — agregados incrementais do dashboard do psicólogo.
+"""
+
+import copy
+
+from app.services.therapist_overview import OverviewAggregates, replay
+
+
+def _patient(pid: str, status: str = "active", used: int = 0, limit: int = 100, created: str = "2025-01-01") -> dict:
+    return {
+        "id": pid,
+        "name": f"Paciente {pid}",
+        "status": status,
+        "messages_used": used,
+        "messages_limit": limit,
+        "created_at": f"{created}T00:00:00Z",
+        "sessions": [],
+    }
+
+
+PATIENTS = [
+    _patient("p1", used=90, created="2025-01-01"),
+    _patient("p2", status="paused", created="2025-01-02"),
+    _patient("p3", status="discharged", used=10, limit=0, created="2025-01-03"),
+]
+
+
+def test_rebuild_counts_statuses_near_limit_and_recent():
+    aggregates = OverviewAggregates()
+    aggregates.rebuild(copy.deepcopy(PATIENTS))
+    overview = aggregates.overview()
+
+    assert (overview.total_patients, overview.active_patients) == (3, 1)
+    assert (overview.paused_patients, overview.discharged_patients) == (1, 1)
+    assert [p.id for p in overview.near_limit_patients] == ["p1"]
+    assert [a.patient_name for a in overview.recent_activity] == ["Paciente p3", "Paciente p2", "Paciente p1"]
+
+
+def test_write_hooks_keep_state_equal_to_recompute():
+    patients = copy.deepcopy(PATIENTS)
+    aggregates = OverviewAggregates()
+    aggregates.rebuild(copy.deepcopy(patients))
+
+    new = _patient("p4", used=79, created="2025-02-01")
+    patients.append(new)
+    aggregates.patient_created(new)
+
+    patients[1]["status"] = "active"
+    aggregates.patient_updated(patients[1])
+
+    patients[0]["messages_limit"] = 200
+    aggregates.patient_updated(patients[0])
+
+    patients[3]["messages_used"] = 80
+    aggregates.messages_used_changed("p4", 80)
+
+    session = {"id": "s1", "created_at": "2025-03-01T00:00:00Z"}
+    patients[2]["sessions"].append(session)
+    aggregates.session_created(patients[2], session)
+
+    overview = aggregates.overview()
+    assert overview.active_patients == 3 and overview.paused_patients == 0
+    assert [p.id for p in overview.near_limit_patients] == ["p4"]
+    assert overview.recent_activity[0].action == "Sessão registrada"
+    assert aggregates.check(patients) == []
+
+
+def test_check_reports_and_repairs_divergence():
+    patients = copy.deepcopy(PATIENTS)
+    aggregates = OverviewAggregates()
+    aggregates.rebuild(copy.deepcopy(patients))
+
+    patients[1]["status"] = "discharged"  # escrita que não passou pelos ganchos
+    patients[1]["messages_used"] = 100
+
+    differences = aggregates.check(patients)
+    assert "paused_patients: 1 != 0" in differences
+    assert "near_limit_patients" in differences
+    assert aggregates.check(patients) == []
+
+
+def test_repair_keeps_quota_alerts_trigger_time():
+    patients = copy.deepcopy(PATIENTS)
+    aggregates = OverviewAggregates()
+    aggregates.rebuild(copy.deepcopy(patients))
+    [alert] = aggregates._quota.alerts()
+
+    patients[1]["status"] = "discharged"
+    assert aggregates.check(patients) != []
+    assert aggregates._quota.alerts() == [alert]
+
+
+def test_replay_through_hooks_matches_recompute():
+    patients = copy.deepcopy(PATIENTS)
+    patients[0]["sessions"] = [{"id": "s1", "created_at": "2025-01-05T00:00:00Z"}]
+    assert replay(patients).check(patients, repair=False) == []